@@ -42,6 +42,8 @@ FILES=(
   "index.html"
   "main.js"
   "styles.css"
+  "sweeps.html"
+  "sweeps.js"
 )
 
 # Copy files to the temporary directory
@@ -9,16 +9,76 @@
 import os
 import json
 import argparse
-import glob
+import fnmatch
 import csv
 import warnings
 import statistics
 
 from tabulate import tabulate
-from collections import defaultdict
-from typing import Dict, Any, Optional, Tuple, List, Set, Union
+from typing import Dict, Any, Optional, Tuple, List, Union
 from omegaconf import OmegaConf
 
+from benchmark_output import has_output, parse_output
+from iteration_metrics import parse_iteration_metrics
+from results_index import INDEX_FILE_NAME, ResultsIndex
+
+# Bump when the extraction of configs or metrics from iteration directories changes, to re-parse indexed results
+PARSER_VERSION = 14
+
+THROUGHPUT_METRIC = 'throughput_gbps'
+
+# Metrics reported in addition to throughput when any iteration has them, with their column headers and whether
+# larger values are better, as for throughput, or smaller ones, as for latencies, ramp, memory and CPU cost
+DETAILED_METRICS = {
+    'iops': ('IOPS', True),
+    'clat_p50_ms': ('p50 (ms)', False),
+    'clat_p90_ms': ('p90 (ms)', False),
+    'clat_p99_ms': ('p99 (ms)', False),
+    'clat_p99.9_ms': ('p99.9 (ms)', False),
+    'ttfb_p50_ms': ('TTFB p50 (ms)', False),
+    'ttfb_p90_ms': ('TTFB p90 (ms)', False),
+    'ttfb_p99_ms': ('TTFB p99 (ms)', False),
+    'ttfb_p99.9_ms': ('TTFB p99.9 (ms)', False),
+    'durable_p50_ms': ('Durable p50 (ms)', False),
+    'durable_p90_ms': ('Durable p90 (ms)', False),
+    'durable_p99_ms': ('Durable p99 (ms)', False),
+    'durable_p99.9_ms': ('Durable p99.9 (ms)', False),
+    'steady_throughput_gbps': ('Steady (Gbps)', True),
+    'ramp_seconds': ('Ramp (s)', False),
+    'read_throughput_gbps': ('Read (Gbps)', True),
+    'write_throughput_gbps': ('Write (Gbps)', True),
+    'peak_memory_mib': ('Peak memory (MiB)', False),
+    'mount_min_throughput_gbps': ('Slowest mount (Gbps)', True),
+    'mount_max_throughput_gbps': ('Fastest mount (Gbps)', True),
+    'cold_throughput_gbps': ('Cold (Gbps)', True),
+    'warm_throughput_gbps': ('Warm (Gbps)', True),
+    'cache_speedup': ('Cache speedup', True),
+    'peak_rss_mib': ('Peak RSS (MiB)', False),
+    'p99_rss_mib': ('p99 RSS (MiB)', False),
+    'steady_rss_mib': ('Steady RSS (MiB)', False),
+    'peak_pss_mib': ('Peak PSS (MiB)', False),
+    'steady_pss_mib': ('Steady PSS (MiB)', False),
+    'peak_reserved_mib': ('Peak reserved (MiB)', False),
+    'steady_reserved_mib': ('Steady reserved (MiB)', False),
+    'throughput_per_gib': ('Gbps per GiB', True),
+    'mount_p50_ms': ('Mount p50 (ms)', False),
+    'mount_p99_ms': ('Mount p99 (ms)', False),
+    'lookup_p50_ms': ('Lookup p50 (ms)', False),
+    'lookup_p99_ms': ('Lookup p99 (ms)', False),
+    'first_byte_p50_ms': ('First byte p50 (ms)', False),
+    'first_byte_p99_ms': ('First byte p99 (ms)', False),
+    'rows_per_second': ('Rows/s', True),
+    'db_size_mib': ('DB size (MiB)', False),
+    'lookup_us': ('Lookup (us)', False),
+    'cycles_per_byte': ('Cycles/byte', False),
+    'instructions_per_byte': ('Instructions/byte', False),
+    'ipc': ('IPC', True),
+    'cache_miss_rate': ('Cache miss rate', False),
+}
+
+# Parameters which differ between every run, and so are never grouped by
+IGNORE_PARAMS = ['hydra.job.num', 'hydra.run.dir', 'hydra.job.id', 'hydra.job.name', 'iteration']
+
 
 def parse_hydra_config(iteration_dir: str) -> Dict[str, Any]:
     """Parse Hydra config and overrides for an iteration using OmegaConf and flattens the result"""
@@ -49,18 +109,6 @@ def parse_hydra_config(iteration_dir: str) -> Dict[str, Any]:
     return flatten_config(config_dict)
 
 
-def to_gigabits_per_second(
-    bytes: Union[int, float],
-    seconds: Union[int, float],
-) -> float:
-    """
-    Converts bytes to gigabits per second
-    """
-    bits = bytes * 8
-    gigabits = bits / 1_000_000_000
-    return gigabits / float(seconds)
-
-
 def flatten_config(config: Dict[str, Any], parent_key: str = '', sep: str = '.') -> Dict[str, Any]:
     """Flatten nested configuration dictionary."""
     result = {}
@@ -73,100 +121,78 @@ def flatten_config(config: Dict[str, Any], parent_key: str = '', sep: str = '.')
     return result
 
 
-def parse_benchmark_file(file_path: str) -> Optional[float]:
-    """Parse benchmark output file and return throughput."""
-    try:
-        with open(file_path, 'r') as f:
-            data = json.load(f)
-
-        match data:
-            # CRT format
-            case {'throughput_gbps': throughput}:
-                return throughput
-
-            # Client/Prefetch format
-            case {'summary': {'total_bytes': total_bytes, 'total_elapsed_seconds': total_seconds}}:
-                return to_gigabits_per_second(bytes=total_bytes, seconds=total_seconds)
-
-            # Client/Prefetch format with missing fields
-            case {'summary': summary}:
-                total_bytes = summary.get('total_bytes', 0)
-                total_seconds = summary.get('total_elapsed_seconds', 1)
-                return to_gigabits_per_second(bytes=total_bytes, seconds=total_seconds)
-
-            # FIO format
-            case {'jobs': [{'read': {'io_bytes': io_bytes, 'runtime': runtime_ms}}, *_]}:
-                return to_gigabits_per_second(bytes=io_bytes, seconds=runtime_ms / 1000)
-
-            # Unknown format
-            case _:
-                warnings.warn(f"Unknown format in {file_path}")
-                return None
-
-    except Exception as e:
-        warnings.warn(f"Warning: Error parsing {file_path}: {e}")
-        return None
-
-
-def process_iteration(iteration_dir: str) -> Tuple[Dict[str, Any], Optional[float]]:
-    """Process a single iteration directory."""
+def process_iteration(iteration_dir: str) -> Tuple[Dict[str, Any], Optional[float], Optional[float]]:
+    """Process a single iteration directory, returning its config, throughput and bytes transferred."""
     config = parse_hydra_config(iteration_dir)
 
-    throughput = None
-    # FIXME: Do not use this glob hack for fio throughput
-    for file_pattern in ['crt_output.json', 'client-output.json', 'prefetch-output.json', 'fio.*.json']:
-        files = glob.glob(os.path.join(iteration_dir, file_pattern))
-        if files:
-            throughput = parse_benchmark_file(files[0])
-            if throughput is not None:
-                break
+    throughput, total_bytes = parse_output(iteration_dir)
 
-    if throughput is None:
+    if throughput is None and not has_output(iteration_dir):
         warnings.warn(f"Warning: No valid throughput data found in {iteration_dir}")
 
-    return config, throughput
+    return config, throughput, total_bytes
 
 
-def find_varying_parameters(all_configs: List[Dict[str, Any]]) -> Set[str]:
-    """Identify parameters that vary across configurations, ignoring run-specific parameters."""
-    if not all_configs:
-        return set()
+def extract_iteration(iteration_dir: str) -> Tuple[Dict[str, Any], Dict[str, Optional[float]]]:
+    """Extract the flattened config and the metrics of an iteration, for the results index."""
+    config, throughput, total_bytes = process_iteration(iteration_dir)
+    metrics = {THROUGHPUT_METRIC: throughput}
+    # Benchmarks without a throughput, like the startup benchmark, are reported by their other metrics
+    if throughput is not None or has_output(iteration_dir):
+        metrics.update(parse_iteration_metrics(iteration_dir))
+        # Throughput per GiB of peak memory, the measure of efficiency when capacity is sized by memory
+        if throughput is not None and metrics.get('peak_rss_mib'):
+            metrics['throughput_per_gib'] = throughput / (metrics['peak_rss_mib'] / 1024)
+        # CPU cost of the data delivered, the measure of efficiency when capacity is sized by CPU
+        if total_bytes:
+            for event in ['cycles', 'instructions']:
+                if f'perf.{event}' in metrics:
+                    metrics[f'{event}_per_byte'] = metrics[f'perf.{event}'] / total_bytes
+    return config, metrics
 
-    # Get all keys from all configs
-    all_keys = set()
-    for config in all_configs:
-        all_keys.update(config.keys())
 
-    # Parameters to ignore
-    ignore_params = {'hydra.job.num', 'hydra.run.dir', 'hydra.job.id', 'hydra.job.name', 'iteration'}
+def median_or_none(values: List[Optional[float]]) -> Optional[float]:
+    """Median of the values of iterations which have the metric."""
+    present = [value for value in values if value is not None]
+    return statistics.median(present) if present else None
 
-    # Check which parameters vary
-    varying = {key for key in all_keys if len({str(config.get(key, 'N/A')) for config in all_configs}) > 1}
 
-    varying -= ignore_params
+def find_varying_parameters(index: ResultsIndex) -> List[str]:
+    """Identify parameters that vary across configurations, ignoring run-specific parameters."""
+    varying = set(index.varying_parameters(ignore=IGNORE_PARAMS))
 
     # Always include benchmark_type if it exists in any config
-    if 'benchmark_type' in all_keys:
+    if index.has_parameter('benchmark_type'):
         varying.add('benchmark_type')
 
-    return varying
+    return sorted(varying)
 
 
-def combine_raw_values(all_results: List[Tuple[Dict[str, Any], float, str]]) -> List[Dict[str, Any]]:
-    varying_params = sorted(find_varying_parameters([config for config, _, _ in all_results]))
+def select_metrics(metric_names: List[str], patterns: List[str], exclude: List[str]) -> List[str]:
+    """Metrics matching any of the glob patterns, in the order of the patterns."""
+    selected = []
+    for pattern in patterns:
+        matches = fnmatch.filter(metric_names, pattern)
+        if not matches:
+            print(f"Warning: no metric matches {pattern}")
+        selected += [metric for metric in matches if metric not in exclude and metric not in selected]
+    return selected
 
-    grouped_results = defaultdict(list)
-    for config, throughput, iter_num in all_results:
-        key = tuple((param, str(config.get(param, 'N/A'))) for param in sorted(varying_params) if param != 'iteration')
-        grouped_results[key].append(throughput)
 
+def combine_raw_values(
+    grouped_results: List[Tuple[Tuple[Tuple[str, str], ...], Dict[str, List[Optional[float]]]]],
+    detailed_metrics: List[str],
+) -> List[Dict[str, Any]]:
     combined_results = []
-    for config_key, throughputs in grouped_results.items():
+    for config_key, metrics in grouped_results:
+        throughputs = metrics[THROUGHPUT_METRIC]
         result = {}
         for param, value in config_key:
             result[param] = value
-        result['throughputs'] = [round(t, 2) for t in throughputs]
+        result['throughputs'] = [round(t, 2) if t is not None else None for t in throughputs]
         result['count'] = len(throughputs)
+        for metric in detailed_metrics:
+            result[metric] = [round(value, 3) if value is not None else None for value in metrics[metric]]
         combined_results.append(result)
 
     return combined_results
@@ -177,63 +203,84 @@ def main() -> None:
     parser.add_argument('--base-dir', required=True, help='Base directory containing benchmark results')
     parser.add_argument('--csv-output', help='Optional CSV file to write the results to')
     parser.add_argument('--json-output', help='Optional JSON file to write the results')
+    parser.add_argument(
+        '--index',
+        help=f'SQLite index of parsed results, reused across invocations (default: <base-dir>/{INDEX_FILE_NAME})',
+    )
+    parser.add_argument('--workers', type=int, help='Number of processes parsing new results (default: CPU count)')
+    parser.add_argument(
+        '--metric',
+        action='append',
+        default=[],
+        help='Also report metrics matching this glob pattern, e.g. "log.s3.requests*.sum" for metrics logged by '
+        'Mountpoint (can be repeated)',
+    )
 
     args = parser.parse_args()
 
-    # List to store all results
-    all_results = []
-
-    # Process all iteration directories
-    for root, dirs, files in os.walk(args.base_dir):
-        for dir_name in dirs:
-            if dir_name.isdigit():
-                iteration_path = os.path.join(root, dir_name)
-                config, throughput = process_iteration(iteration_path)
-                if throughput is not None:
-                    all_results.append((config, throughput, dir_name))
-
-    # Sort results by iteration number
-    all_results.sort(key=lambda x: int(x[2]))
+    # Parse new or changed iteration directories into the index
+    index = ResultsIndex(args.index or os.path.join(args.base_dir, INDEX_FILE_NAME), parser_version=PARSER_VERSION)
+    parsed_count = index.update(args.base_dir, extract_iteration, workers=args.workers)
+    print(f"Parsed {parsed_count} new or changed iterations")
 
     # Find parameters that vary between iterations
-    varying_params = sorted(find_varying_parameters([config for config, _, _ in all_results]))
+    varying_params = find_varying_parameters(index)
 
     # Print varying parameters
     print("\nVarying parameters between iterations:")
     print(", ".join(varying_params))
 
     # Group by varying parameters
-    grouped_results = defaultdict(list)
-    for config, throughput, iter_num in all_results:
-        key = tuple((param, str(config.get(param, 'N/A'))) for param in sorted(varying_params))
-        grouped_results[key].append(throughput)
-
-    # Aggregated results table
-    aggregated_headers = varying_params + [
-        "Count",
-        "Median (Gbps)",
-        "Std Dev (Gbps)",
-        "Min (Gbps)",
-        "Max (Gbps)",
-    ]
+    indexed_metrics = set(index.metric_names())
+    detailed_metrics = [metric for metric in DETAILED_METRICS if metric in indexed_metrics]
+    detailed_metrics += select_metrics(sorted(indexed_metrics), args.metric, exclude=detailed_metrics)
+    grouped_results = index.group_metrics(varying_params, [THROUGHPUT_METRIC, *detailed_metrics])
+
+    # Aggregated results table, detailed metrics are reported as their median across iterations
+    aggregated_headers = (
+        varying_params
+        + [
+            "Count",
+            "Median (Gbps)",
+            "Std Dev (Gbps)",
+            "Min (Gbps)",
+            "Max (Gbps)",
+        ]
+        + [DETAILED_METRICS[metric][0] if metric in DETAILED_METRICS else metric for metric in detailed_metrics]
+    )
     aggregated_rows = []
-    for config_key, throughputs in grouped_results.items():
+    for config_key, metrics in grouped_results:
+        # Iterations of benchmarks without a throughput, like the startup benchmark, have None
+        throughputs = [value for value in metrics[THROUGHPUT_METRIC] if value is not None]
         row = []
         for _, value in config_key:
             row.append(value)
-        row.append(len(throughputs))
-        row.append(f"{statistics.median(throughputs):.2f}")
+        row.append(len(metrics[THROUGHPUT_METRIC]))
+        row.append(f"{statistics.median(throughputs):.2f}" if throughputs else "N/A")
         if len(throughputs) > 1:
             row.append(f"{statistics.stdev(throughputs):.2f}")
         else:
             row.append("N/A")
-        row.append(f"{min(throughputs):.2f}")
-        row.append(f"{max(throughputs):.2f}")
+        row.append(f"{min(throughputs):.2f}" if throughputs else "N/A")
+        row.append(f"{max(throughputs):.2f}" if throughputs else "N/A")
+        for metric in detailed_metrics:
+            median = median_or_none(metrics[metric])
+            row.append(f"{median:.2f}" if median is not None else "N/A")
         aggregated_rows.append(row)
 
     # Custom sorting function for benchmark types
     def benchmark_type_sort_key(value: str) -> int:
-        benchmark_order = {'crt': 0, 'client': 1, 'client-bp': 2, 'prefetch': 3, 'fio': 4}
+        benchmark_order = {
+            'crt': 0,
+            'client': 1,
+            'client-bp': 2,
+            'prefetch': 3,
+            's3io': 4,
+            'upload': 5,
+            'startup': 6,
+            'manifest': 7,
+            'fio': 8,
+        }
         return benchmark_order.get(value, 999)  # Unknown types go to end
 
     # Sort rows by all columns
@@ -267,7 +314,7 @@ def main() -> None:
         print(f"\nResults written to CSV: {args.csv_output}")
 
     if args.json_output:
-        combined_data = combine_raw_values(all_results)
+        combined_data = combine_raw_values(grouped_results, detailed_metrics)
         with open(args.json_output, 'w') as jsonfile:
             json.dump(combined_data, jsonfile, indent=2)
         print(f"Combined data written to JSON: {args.json_output}")
@@ -0,0 +1,119 @@
+"""Throughput and bytes transferred of an iteration, from the output file of its benchmark.
+
+Shared by the analysis scripts and the sweeper, which schedules adaptive and tuning sweeps from earlier results.
+The startup benchmark times mounts rather than transferring data, so its output has no throughput,
+and its phase latencies are reported instead.
+"""
+
+import glob
+import json
+import os
+import warnings
+from typing import Optional, Tuple, Union
+
+# Output files of each benchmark type, in the order they are looked for in an iteration directory
+OUTPUT_FILE_PATTERNS = [
+    'crt_output.json',
+    'client-output.json',
+    'prefetch-output.json',
+    's3io-output.json',
+    'upload-output.json',
+    'startup-output.json',
+    'manifest-output.json',
+    'fio.*.json',
+]
+
+
+def to_gigabits_per_second(
+    bytes: Union[int, float],
+    seconds: Union[int, float],
+) -> float:
+    """
+    Converts bytes to gigabits per second
+    """
+    bits = bytes * 8
+    gigabits = bits / 1_000_000_000
+    return gigabits / float(seconds)
+
+
+def parse_benchmark_file(file_path: str) -> Optional[float]:
+    """Parse benchmark output file and return throughput."""
+    try:
+        with open(file_path, 'r') as f:
+            data = json.load(f)
+
+        match data:
+            # CRT format
+            case {'throughput_gbps': throughput}:
+                return throughput
+
+            # Startup format, which has no throughput
+            case {'summary': {'first_byte_seconds': _}}:
+                return None
+
+            # Client/Prefetch/s3io/upload/manifest format
+            case {'summary': {'total_bytes': total_bytes, 'total_elapsed_seconds': total_seconds}}:
+                return to_gigabits_per_second(bytes=total_bytes, seconds=total_seconds)
+
+            # Client/Prefetch format with missing fields
+            case {'summary': summary}:
+                total_bytes = summary.get('total_bytes', 0)
+                total_seconds = summary.get('total_elapsed_seconds', 1)
+                return to_gigabits_per_second(bytes=total_bytes, seconds=total_seconds)
+
+            # FIO format
+            case {'jobs': [{'read': {'io_bytes': io_bytes, 'runtime': runtime_ms}}, *_]}:
+                return to_gigabits_per_second(bytes=io_bytes, seconds=runtime_ms / 1000)
+
+            # Unknown format
+            case _:
+                warnings.warn(f"Unknown format in {file_path}")
+                return None
+
+    except Exception as e:
+        warnings.warn(f"Warning: Error parsing {file_path}: {e}")
+        return None
+
+
+def parse_benchmark_bytes(file_path: str) -> Optional[float]:
+    """Parse benchmark output file and return the bytes transferred, if it records them."""
+    try:
+        with open(file_path, 'r') as f:
+            data = json.load(f)
+    except Exception as e:
+        warnings.warn(f"Warning: Error parsing {file_path}: {e}")
+        return None
+
+    match data:
+        case {'summary': {'total_bytes': total_bytes}}:
+            return total_bytes
+        case {'jobs': [{'read': {'io_bytes': read_bytes}, 'write': {'io_bytes': write_bytes}}, *_]}:
+            return read_bytes + write_bytes
+        case _:
+            return None
+
+
+def has_output(iteration_dir: str) -> bool:
+    """Whether the benchmark of an iteration wrote a complete output file, even if it has no throughput."""
+    for file_pattern in OUTPUT_FILE_PATTERNS:
+        files = sorted(glob.glob(os.path.join(iteration_dir, file_pattern)))
+        if files:
+            try:
+                with open(files[0], 'r') as f:
+                    json.load(f)
+                return True
+            except (OSError, ValueError):
+                return False
+    return False
+
+
+def parse_output(iteration_dir: str) -> Tuple[Optional[float], Optional[float]]:
+    """Throughput and bytes transferred of an iteration, from the first output file with a valid throughput."""
+    # FIXME: Do not use this glob hack for fio throughput
+    for file_pattern in OUTPUT_FILE_PATTERNS:
+        files = sorted(glob.glob(os.path.join(iteration_dir, file_pattern)))
+        if files:
+            throughput = parse_benchmark_file(files[0])
+            if throughput is not None:
+                return throughput, parse_benchmark_bytes(files[0])
+    return None, None
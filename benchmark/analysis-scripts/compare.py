@@ -0,0 +1,172 @@
+# /// script
+# requires-python = ">=3.13"
+# dependencies = [
+#     "omegaconf",
+#     "tabulate",
+# ]
+# ///
+
+import argparse
+import csv
+import os
+import sys
+from typing import Dict, List, Optional, Tuple
+
+from tabulate import tabulate
+
+from autogroup import DETAILED_METRICS, PARSER_VERSION, THROUGHPUT_METRIC, extract_iteration, find_varying_parameters
+from results_index import INDEX_FILE_NAME, ResultsIndex
+from significance import compare_samples
+
+# Metrics for which larger values are better, smaller values are better for all others
+HIGHER_IS_BETTER = {THROUGHPUT_METRIC} | {
+    metric for metric, (_, higher_is_better) in DETAILED_METRICS.items() if higher_is_better
+}
+
+GroupKey = Tuple[Tuple[str, str], ...]
+
+
+def load_results(base_dir: str, index_path: Optional[str], workers: Optional[int]) -> ResultsIndex:
+    """Index the results below `base_dir`, parsing only new or changed iterations."""
+    index = ResultsIndex(index_path or os.path.join(base_dir, INDEX_FILE_NAME), parser_version=PARSER_VERSION)
+    parsed_count = index.update(base_dir, extract_iteration, workers=workers)
+    print(f"Parsed {parsed_count} new or changed iterations in {base_dir}")
+    return index
+
+
+def group_samples(
+    index: ResultsIndex, group_by: List[str], metrics: List[str]
+) -> Dict[GroupKey, Dict[str, List[float]]]:
+    """Per-iteration values of each metric, for each configuration group."""
+    return {
+        key: {metric: [value for value in values[metric] if value is not None] for metric in metrics}
+        for key, values in index.group_metrics(group_by, metrics)
+    }
+
+
+def improvement(metric: str, relative_change: float) -> float:
+    """Relative change of a metric, signed such that positive values are improvements."""
+    return relative_change if metric in HIGHER_IS_BETTER else -relative_change
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description='Compare benchmark results of a candidate against a baseline, '
+        'and exit with status 1 if any metric significantly regressed by more than a threshold'
+    )
+    parser.add_argument('--baseline', required=True, help='Base directory containing the baseline results')
+    parser.add_argument('--candidate', required=True, help='Base directory containing the candidate results')
+    parser.add_argument(
+        '--baseline-index', help=f'Index of the baseline results (default: <baseline>/{INDEX_FILE_NAME})'
+    )
+    parser.add_argument(
+        '--candidate-index', help=f'Index of the candidate results (default: <candidate>/{INDEX_FILE_NAME})'
+    )
+    parser.add_argument('--workers', type=int, help='Number of processes parsing new results (default: CPU count)')
+    parser.add_argument(
+        '--test',
+        choices=['mann-whitney', 'bootstrap'],
+        default='mann-whitney',
+        help='Test of the per-iteration values (default: mann-whitney)',
+    )
+    parser.add_argument('--alpha', type=float, default=0.05, help='Significance level (default: 0.05)')
+    parser.add_argument(
+        '--fail-threshold',
+        type=float,
+        default=0.05,
+        help='Relative regression of a median above which a significant regression fails the comparison (default: 0.05)',
+    )
+    parser.add_argument('--all', action='store_true', help='Also list changes which are not significant')
+    parser.add_argument('--csv-output', help='Optional CSV file to write the comparison to')
+
+    args = parser.parse_args()
+
+    baseline = load_results(args.baseline, args.baseline_index, args.workers)
+    candidate = load_results(args.candidate, args.candidate_index, args.workers)
+
+    # Parameters which are the same in all iterations of each result set (such as the Mountpoint version) are what is
+    # being compared, so only group by parameters which vary within either result set
+    group_by = sorted(set(find_varying_parameters(baseline)) | set(find_varying_parameters(candidate)))
+    common_metrics = set(baseline.metric_names()) & set(candidate.metric_names())
+    metrics = [THROUGHPUT_METRIC] + [metric for metric in DETAILED_METRICS if metric in common_metrics]
+
+    print("\nGrouping by parameters:")
+    print(", ".join(group_by))
+
+    baseline_groups = group_samples(baseline, group_by, metrics)
+    candidate_groups = group_samples(candidate, group_by, metrics)
+
+    for name, groups, other_groups in [
+        ('baseline', baseline_groups, candidate_groups),
+        ('candidate', candidate_groups, baseline_groups),
+    ]:
+        for key in groups.keys() - other_groups.keys():
+            print(f"Warning: group only in {name}: {', '.join(f'{param}={value}' for param, value in key)}")
+
+    headers = group_by + [
+        "Metric",
+        "Baseline",
+        "Candidate",
+        "Change (%)",
+        "p-value",
+        "Rank-biserial",
+        "n",
+        "Verdict",
+    ]
+    rows = []
+    failed = False
+    for key in sorted(baseline_groups.keys() & candidate_groups.keys()):
+        for metric in metrics:
+            baseline_values = baseline_groups[key][metric]
+            candidate_values = candidate_groups[key][metric]
+            if not baseline_values or not candidate_values:
+                continue
+
+            comparison = compare_samples(baseline_values, candidate_values, test=args.test)
+            score = improvement(metric, comparison.relative_change)
+            significant = comparison.p_value < args.alpha
+            if not significant:
+                verdict = "no change"
+            elif score >= 0:
+                verdict = "improvement"
+            else:
+                verdict = "regression"
+                if -score > args.fail_threshold:
+                    verdict = "REGRESSION"
+                    failed = True
+
+            if significant or args.all:
+                row = [value for _, value in key]
+                row += [
+                    metric,
+                    f"{comparison.baseline_median:.2f}",
+                    f"{comparison.candidate_median:.2f}",
+                    f"{comparison.relative_change * 100:+.1f}",
+                    f"{comparison.p_value:.3f}",
+                    f"{comparison.rank_biserial:+.2f}",
+                    f"{len(baseline_values)}/{len(candidate_values)}",
+                    verdict,
+                ]
+                rows.append((score, row))
+
+    # Worst regressions first
+    rows.sort(key=lambda scored_row: scored_row[0])
+    rows = [row for _, row in rows]
+
+    print(f"\nSignificant changes (p < {args.alpha}, {args.test}):" if not args.all else "\nAll changes:")
+    print(tabulate(rows, headers=headers, tablefmt="grid"))
+
+    if args.csv_output:
+        with open(args.csv_output, 'w', newline='') as csvfile:
+            writer = csv.writer(csvfile)
+            writer.writerow(headers)
+            writer.writerows(rows)
+        print(f"\nComparison written to CSV: {args.csv_output}")
+
+    if failed:
+        print(f"\nFAILED: significant regressions of more than {args.fail_threshold * 100:.1f}%")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
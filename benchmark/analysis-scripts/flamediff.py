@@ -0,0 +1,206 @@
+# /// script
+# requires-python = ">=3.13"
+# dependencies = [
+#     "omegaconf",
+#     "tabulate",
+# ]
+# ///
+
+"""Compare the CPU profiles of a configuration between a baseline and a candidate sweep.
+
+The collapsed stacks (`stacks.txt.gz`) written by `FlamegraphTool` are merged across the iterations of the selected
+configuration in each sweep. Functions are ranked by how much their share of the samples changed, either by their
+own samples (self) or by the samples of stacks they are part of (inclusive). Shares rather than sample counts are
+compared, as runs differ in duration. With the FlameGraph scripts, differential flamegraphs are rendered too.
+"""
+
+import argparse
+import csv
+import glob
+import gzip
+import os
+import subprocess
+import sys
+from collections import Counter
+from typing import Dict, Iterable, List, Tuple
+
+from tabulate import tabulate
+
+from autogroup import parse_hydra_config
+from results_index import find_iteration_dirs
+
+STACKS_FILE = 'stacks.txt.gz'
+
+
+def read_stacks(path: str) -> Counter:
+    """Parse collapsed stacks: one line per stack, its frames separated by `;`, then its number of samples."""
+    stacks = Counter()
+    with gzip.open(path, 'rt') as f:
+        for line in f:
+            stack, _, count = line.rstrip('\n').rpartition(' ')
+            if stack and count.isdigit():
+                stacks[stack] += int(count)
+    return stacks
+
+
+def parse_filters(filters: List[str]) -> Dict[str, str]:
+    parsed = {}
+    for item in filters:
+        key, sep, value = item.partition('=')
+        if not sep:
+            raise ValueError(f"Filter {item!r} is not of the form key=value")
+        parsed[key] = value
+    return parsed
+
+
+def find_stack_files(base_dir: str, filters: Dict[str, str]) -> List[str]:
+    """Stacks of the iterations whose config matches all filters, including those of each mount of an iteration."""
+    stack_files = []
+    for iteration_dir in sorted(find_iteration_dirs(base_dir)):
+        config = parse_hydra_config(iteration_dir)
+        if all(key in config and str(config[key]) == value for key, value in filters.items()):
+            stack_files += sorted(glob.glob(os.path.join(iteration_dir, '**', STACKS_FILE), recursive=True))
+    return stack_files
+
+
+def merge_stacks(paths: Iterable[str]) -> Counter:
+    merged = Counter()
+    for path in paths:
+        merged.update(read_stacks(path))
+    return merged
+
+
+def function_shares(stacks: Counter) -> Dict[str, Tuple[float, float]]:
+    """Share of the samples of each function, as the leaf of stacks (self) and anywhere in stacks (inclusive)."""
+    total = sum(stacks.values())
+    self_samples = Counter()
+    inclusive_samples = Counter()
+    for stack, count in stacks.items():
+        frames = stack.split(';')
+        self_samples[frames[-1]] += count
+        # Recursive functions are only counted once per stack
+        for frame in set(frames):
+            inclusive_samples[frame] += count
+    return {
+        function: (self_samples[function] / total, inclusive_samples[function] / total)
+        for function in inclusive_samples
+    }
+
+
+def write_diff_stacks(baseline: Counter, candidate: Counter, path: str) -> None:
+    """Write stacks with their baseline and candidate samples, in the input format of `flamegraph.pl` for diffs.
+
+    Baseline samples are scaled to the total of the candidate, so that the colors show changes of share.
+    """
+    scale = sum(candidate.values()) / sum(baseline.values())
+    with open(path, 'w') as f:
+        for stack in sorted(baseline.keys() | candidate.keys()):
+            f.write(f"{stack} {round(baseline.get(stack, 0) * scale)} {candidate.get(stack, 0)}\n")
+
+
+def render_flamegraph(flamegraph_script: str, stacks_path: str, svg_path: str, args: List[str]) -> None:
+    with open(stacks_path, 'r') as stacks, open(svg_path, 'w') as svg:
+        subprocess.run([flamegraph_script, *args], stdin=stacks, stdout=svg, check=True)
+    print(f"Differential flamegraph written to {svg_path}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description='Rank the functions whose share of CPU samples changed between a baseline and a candidate'
+    )
+    parser.add_argument('--baseline', required=True, help='Base directory containing the baseline results')
+    parser.add_argument('--candidate', required=True, help='Base directory containing the candidate results')
+    parser.add_argument(
+        '--where',
+        action='append',
+        default=[],
+        help='Only merge the stacks of iterations with this parameter value, e.g. "benchmark_type=fio" '
+        '(can be repeated)',
+    )
+    parser.add_argument(
+        '--sort', choices=['self', 'inclusive'], default='inclusive', help='Share to rank functions by the change of'
+    )
+    parser.add_argument('--top', type=int, default=30, help='Number of functions listed (default: 30)')
+    parser.add_argument('--csv-output', help='Optional CSV file to write all functions to')
+    parser.add_argument(
+        '--flamegraph-scripts-path',
+        help='Directory containing flamegraph.pl, to render differential flamegraphs into --output-dir',
+    )
+    parser.add_argument('--output-dir', default='.', help='Directory to write differential flamegraphs to')
+
+    args = parser.parse_args()
+    filters = parse_filters(args.where)
+
+    profiles = []
+    for name, base_dir in [('baseline', args.baseline), ('candidate', args.candidate)]:
+        stack_files = find_stack_files(base_dir, filters)
+        stacks = merge_stacks(stack_files)
+        print(f"Merged {len(stack_files)} profiles of {name} with {sum(stacks.values())} samples")
+        if not stacks:
+            print(
+                f"No {STACKS_FILE} found for {name}, profile with `monitoring.with_flamegraph=true` and "
+                "`monitoring.flamegraph_scripts_path`"
+            )
+            sys.exit(1)
+        profiles.append(stacks)
+    baseline, candidate = profiles
+
+    baseline_shares = function_shares(baseline)
+    candidate_shares = function_shares(candidate)
+    sort_index = 0 if args.sort == 'self' else 1
+    headers = [
+        "Function",
+        "Baseline self (%)",
+        "Candidate self (%)",
+        "Change self (pp)",
+        "Baseline incl. (%)",
+        "Candidate incl. (%)",
+        "Change incl. (pp)",
+    ]
+    scored_rows = []
+    for function in baseline_shares.keys() | candidate_shares.keys():
+        base = baseline_shares.get(function, (0.0, 0.0))
+        cand = candidate_shares.get(function, (0.0, 0.0))
+        change = cand[sort_index] - base[sort_index]
+        row = [
+            function,
+            f"{base[0] * 100:.2f}",
+            f"{cand[0] * 100:.2f}",
+            f"{(cand[0] - base[0]) * 100:+.2f}",
+            f"{base[1] * 100:.2f}",
+            f"{cand[1] * 100:.2f}",
+            f"{(cand[1] - base[1]) * 100:+.2f}",
+        ]
+        scored_rows.append((abs(change), function, row))
+
+    # Largest changes first, whether the function got more or less of the samples
+    scored_rows.sort(key=lambda scored_row: (-scored_row[0], scored_row[1]))
+    rows = [row for _, _, row in scored_rows]
+
+    print(f"\nFunctions by change of {args.sort} share of samples:")
+    print(tabulate(rows[: args.top], headers=headers, tablefmt="grid"))
+
+    if args.csv_output:
+        with open(args.csv_output, 'w', newline='') as csvfile:
+            writer = csv.writer(csvfile)
+            writer.writerow(headers)
+            writer.writerows(rows)
+        print(f"\nAll functions written to CSV: {args.csv_output}")
+
+    if args.flamegraph_scripts_path:
+        flamegraph_script = os.path.join(args.flamegraph_scripts_path, 'flamegraph.pl')
+        os.makedirs(args.output_dir, exist_ok=True)
+        # Shaped like the candidate, red where its share grew and blue where it shrank
+        diff_path = os.path.join(args.output_dir, 'flamediff.folded')
+        write_diff_stacks(baseline, candidate, diff_path)
+        render_flamegraph(flamegraph_script, diff_path, os.path.join(args.output_dir, 'flamediff.svg'), [])
+        # Shaped like the baseline, showing what the candidate no longer spends time on
+        reverse_path = os.path.join(args.output_dir, 'flamediff-baseline.folded')
+        write_diff_stacks(candidate, baseline, reverse_path)
+        render_flamegraph(
+            flamegraph_script, reverse_path, os.path.join(args.output_dir, 'flamediff-baseline.svg'), ['--negate']
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,382 @@
+"""Latency percentiles and throughput over time of a single iteration, complementing its overall throughput.
+
+fio reports completion latency percentiles in its JSON output, and its bandwidth logs give the throughput per interval.
+The client and prefetch benchmarks record the time to first byte of each object they download.
+The s3io benchmark reports bytes and elapsed time per job, so reads and writes of mixed workloads are split.
+The upload benchmark records the time from completing each upload until it is durable in S3.
+The startup benchmark records the time until mounted, until the first lookup and until the first byte of each mount.
+The manifest benchmark records the rows ingested per second, the size of the metadata store and the time of lookups.
+With several mounts, `FioBenchmark` records the throughput of each mount in the metadata,
+and with warm passes over Mountpoint's caches, the throughput of each pass.
+With `monitoring.with_memory`, the harness summarizes the memory of the target process in `memory.json`,
+and the reservations of Mountpoint's memory limiter in the metadata.
+With several mounts, each mount's files are in its `mount-<index>/` directory, and its metadata in `mounts`.
+The harness also summarizes the metrics Mountpoint logs with `--log-metrics` in `log_metrics.json`, one for each mount,
+and with `monitoring.with_otlp_receiver`, the metrics it exports over OTLP in `otlp_metrics.json`, one for each mount.
+With `monitoring.with_perf_stat`, `perf stat` counts CPU events of the target process in `perfstat.json`, every interval.
+"""
+
+import glob
+import json
+import os
+import statistics
+import warnings
+from collections import defaultdict
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Percentiles reported for latencies, by their name in metric names
+PERCENTILES = {'p50': 50.0, 'p90': 90.0, 'p99': 99.0, 'p99.9': 99.9}
+
+# Prefix of fio's bandwidth and latency logs, as passed to fio by `FioBenchmark`
+FIO_LOG_PREFIX = 'fio'
+
+# Statistics of each logged metric which are indexed, as `log.<metric>.<statistic>`
+LOG_METRIC_STATISTICS = ['sum', 'mean', 'max']
+
+# Statistics of each OTLP metric which are indexed, as `otlp.<metric>.<statistic>`
+OTLP_METRIC_STATISTICS = ['last', 'mean', 'max']
+
+# Name of the interval counts written by `PerfStatTool`, one for each profiled mount
+PERF_STAT_FILE = 'perfstat.json'
+
+# Output directories of several concurrent mounts, see `mount_output_dir` in `benchmarks/mountpoint.py`
+MOUNT_DIR_PATTERN = 'mount-*'
+
+# Fraction of the steady-state throughput after which the ramp is considered to be over
+RAMP_THRESHOLD = 0.9
+
+
+def percentile(values: Sequence[float], p: float) -> float:
+    """Percentile of `values`, interpolating linearly between the closest ranks."""
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * p / 100
+    lower = int(rank)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (rank - lower)
+
+
+def fio_metrics(data: Dict) -> Dict[str, float]:
+    """Operations per second and completion latency percentiles in milliseconds (e.g. `clat_p99_ms`) from fio's JSON
+    output. For stat-only jobs, each operation is a stat() call."""
+    job = data['jobs'][0]
+    # Jobs are aggregated by `group_reporting`, use the direction which transferred data
+    direction = 'read' if job['read']['io_bytes'] > 0 or job['read'].get('total_ios', 0) > 0 else 'write'
+    reported = job[direction]['clat_ns'].get('percentile', {})
+
+    metrics = {}
+    if 'iops' in job[direction]:
+        metrics['iops'] = job[direction]['iops']
+    for name, p in PERCENTILES.items():
+        value_ns = reported.get(f'{p:.6f}')
+        if value_ns is not None:
+            metrics[f'clat_{name}_ms'] = value_ns / 1_000_000
+    return metrics
+
+
+def first_byte_metrics(data: Dict) -> Dict[str, float]:
+    """Time to first byte percentiles in milliseconds over all objects of all iterations, e.g. `ttfb_p99_ms`."""
+    latencies = [
+        latency for iteration in data.get('iterations', []) for latency in iteration.get('first_byte_seconds', [])
+    ]
+    if not latencies:
+        return {}
+    return {f'ttfb_{name}_ms': percentile(latencies, p) * 1000 for name, p in PERCENTILES.items()}
+
+
+def s3io_metrics(data: Dict) -> Dict[str, float]:
+    """Throughput in Gbps of the read and write jobs of the s3io benchmark, and its peak memory usage in MiB."""
+    metrics = {}
+    for workload_type in ['read', 'write']:
+        jobs = [job for job in data.get('jobs', []) if job.get('workload_type') == workload_type]
+        elapsed_seconds = max((job['elapsed_seconds'] for job in jobs), default=0)
+        if elapsed_seconds > 0:
+            total_bytes = sum(job['total_bytes'] for job in jobs)
+            metrics[f'{workload_type}_throughput_gbps'] = total_bytes * 8 / 1_000_000_000 / elapsed_seconds
+    if 'peak_memory_mib' in data.get('summary', {}):
+        metrics['peak_memory_mib'] = data['summary']['peak_memory_mib']
+    return metrics
+
+
+def upload_metrics(data: Dict) -> Dict[str, float]:
+    """Time-to-durable percentiles in milliseconds over all uploads of all iterations, e.g. `durable_p99_ms`.
+
+    Also the throughput in Gbps of writing the objects, before completing their uploads.
+    """
+    iterations = data.get('iterations', [])
+    durable = [latency for iteration in iterations for latency in iteration.get('durable_seconds', [])]
+    if not durable:
+        return {}
+    metrics = {f'durable_{name}_ms': percentile(durable, p) * 1000 for name, p in PERCENTILES.items()}
+    write_seconds = sum(max(iteration['write_seconds']) for iteration in iterations if iteration.get('write_seconds'))
+    if write_seconds > 0:
+        total_bytes = sum(iteration['bytes'] for iteration in iterations)
+        metrics['write_throughput_gbps'] = total_bytes * 8 / 1_000_000_000 / write_seconds
+    return metrics
+
+
+def startup_metrics(data: Dict) -> Dict[str, float]:
+    """Percentiles in milliseconds over all mounts of the time from executing Mountpoint until it is mounted, until the
+    first lookup and until the first byte is read, e.g. `mount_p99_ms`, `lookup_p99_ms` and `first_byte_p99_ms`."""
+    repetitions = data.get('repetitions', [])
+    if not repetitions:
+        return {}
+    metrics = {}
+    for phase in ['mount', 'lookup', 'first_byte']:
+        durations = [repetition[f'{phase}_seconds'] for repetition in repetitions]
+        for name, p in PERCENTILES.items():
+            metrics[f'{phase}_{name}_ms'] = percentile(durations, p) * 1000
+    return metrics
+
+
+def manifest_metrics(data: Dict) -> Dict[str, float]:
+    """Rows ingested per second, size of the metadata store in MiB, and mean time of a lookup in microseconds."""
+    summary = data.get('summary', {})
+    if 'rows_per_second' not in summary:
+        return {}
+    metrics = {'rows_per_second': summary['rows_per_second'], 'db_size_mib': summary['db_size_bytes'] / (1024 * 1024)}
+    if summary.get('lookups'):
+        metrics['lookup_us'] = summary['lookup_seconds'] / summary['lookups'] * 1_000_000
+    return metrics
+
+
+def mount_metrics(data: Dict) -> Dict[str, float]:
+    """Throughput in Gbps of the slowest and fastest of several concurrent mounts, from an iteration's metadata."""
+    throughputs = [
+        mount['throughput_gbps'] for mount in data.get('mounts', []) if mount.get('throughput_gbps') is not None
+    ]
+    if not throughputs:
+        return {}
+    return {'mount_min_throughput_gbps': min(throughputs), 'mount_max_throughput_gbps': max(throughputs)}
+
+
+def pass_metrics(data: Dict) -> Dict[str, float]:
+    """Throughput in Gbps of the first (cold) pass and of the later (warm) passes, from an iteration's metadata.
+
+    The speedup is the median warm throughput over the cold throughput.
+    """
+    throughputs = [run['throughput_gbps'] for run in data.get('passes', [])]
+    if len(throughputs) < 2:
+        return {}
+    cold = throughputs[0]
+    warm = statistics.median(throughputs[1:])
+    metrics = {'cold_throughput_gbps': cold, 'warm_throughput_gbps': warm}
+    if cold:
+        metrics['cache_speedup'] = warm / cold
+    return metrics
+
+
+def memory_metrics(data: Dict) -> Dict[str, float]:
+    """Peak, 99th percentile and steady-state RSS, and peak and steady-state PSS, in MiB, from `memory.json`."""
+    metrics = {}
+    for column, name, statistics_names in [
+        ('rss_bytes', 'rss', ['peak', 'p99', 'steady']),
+        ('pss_bytes', 'pss', ['peak', 'steady']),
+    ]:
+        summary = data.get(column)
+        if summary is not None:
+            for statistic in statistics_names:
+                metrics[f'{statistic}_{name}_mib'] = summary[statistic] / (1024 * 1024)
+    return metrics
+
+
+def reservation_metrics(data: Dict) -> Dict[str, float]:
+    """Peak and steady-state total reservations of the memory limiter in MiB, from an iteration's metadata."""
+    total = data.get('memory_reservations', {}).get('total')
+    if total is None:
+        return {}
+    return {
+        'peak_reserved_mib': total['peak'] / (1024 * 1024),
+        'steady_reserved_mib': total['steady'] / (1024 * 1024),
+    }
+
+
+def mount_file_metrics(iteration_dir: str, file_name: str, parse) -> Dict[str, Dict[str, float]]:
+    """Metrics parsed from `file_name` in the directory of each of several mounts, by the name of that directory."""
+    metrics = {}
+    for file_path in sorted(glob.glob(os.path.join(iteration_dir, MOUNT_DIR_PATTERN, file_name))):
+        with open(file_path, 'r') as f:
+            metrics[os.path.basename(os.path.dirname(file_path))] = parse(json.load(f))
+    return metrics
+
+
+def mount_memory_metrics(iteration_dir: str) -> Dict[str, float]:
+    """Memory and reservation metrics of each of several mounts, as `<mount directory>.<metric>` (e.g.
+    `mount-0.peak_rss_mib`), and their sum over all mounts as the total of the host (e.g. `peak_rss_mib`)."""
+    by_mount = defaultdict(dict)
+    for mount, metrics in mount_file_metrics(iteration_dir, 'memory.json', memory_metrics).items():
+        by_mount[mount].update(metrics)
+    metadata_path = os.path.join(iteration_dir, 'metadata.json')
+    if os.path.exists(metadata_path):
+        with open(metadata_path, 'r') as f:
+            metadata = json.load(f)
+        for mount in metadata.get('mounts', []):
+            by_mount[os.path.basename(mount['output_dir'])].update(reservation_metrics(mount))
+
+    metrics = {}
+    totals = defaultdict(float)
+    for mount, values in sorted(by_mount.items()):
+        for name, value in values.items():
+            metrics[f'{mount}.{name}'] = value
+            totals[name] += value
+    metrics.update(totals)
+    return metrics
+
+
+def log_metrics(data: Dict) -> Dict[str, float]:
+    """Sum, mean and maximum over the run of each metric logged by Mountpoint, from `log_metrics.json`.
+
+    For counters, which are reset each time they are logged, the sum is the total over the run.
+    """
+    return {
+        f'log.{name}.{statistic}': summary[statistic]
+        for name, summary in data.items()
+        for statistic in LOG_METRIC_STATISTICS
+    }
+
+
+def otlp_metrics(data: Dict) -> Dict[str, float]:
+    """Last value, mean and maximum over the run of each metric exported by Mountpoint, from `otlp_metrics.json`.
+
+    Metrics are exported with cumulative temporality by default, so the last value of a counter is its total.
+    """
+    return {
+        f'otlp.{name}.{statistic}': summary[statistic]
+        for name, summary in data.items()
+        for statistic in OTLP_METRIC_STATISTICS
+    }
+
+
+def read_perf_stat(file_path: str) -> Tuple[Dict[str, float], float]:
+    """Total count of each event over the run, and the duration of the run in seconds, from `perf stat -I -j` output.
+
+    Each line holds the count of an event in an interval, events which could not be counted are skipped.
+    """
+    totals = defaultdict(float)
+    elapsed_seconds = 0.0
+    with open(file_path, 'r') as f:
+        for line in f:
+            if not line.strip() or line.startswith('#'):
+                continue
+            sample = json.loads(line)
+            try:
+                value = float(sample['counter-value'])
+            except (KeyError, ValueError):
+                continue
+            totals[sample['event']] += value
+            elapsed_seconds = max(elapsed_seconds, float(sample.get('interval', 0)))
+    return totals, elapsed_seconds
+
+
+def perf_stat_metrics(iteration_dir: str) -> Dict[str, float]:
+    """Instructions per cycle, cache miss rate, and rate per second of every counted event (`perf.<event>.per_second`)
+    over all profiled mounts, with the total cycles and instructions, to relate them to the bytes transferred."""
+    totals = defaultdict(float)
+    per_second = defaultdict(float)
+    file_paths = glob.glob(os.path.join(iteration_dir, PERF_STAT_FILE))
+    file_paths += glob.glob(os.path.join(iteration_dir, 'mount-*', PERF_STAT_FILE))
+    for file_path in file_paths:
+        file_totals, elapsed_seconds = read_perf_stat(file_path)
+        for event, total in file_totals.items():
+            totals[event] += total
+            if elapsed_seconds > 0:
+                per_second[event] += total / elapsed_seconds
+
+    metrics = {f'perf.{event}.per_second': rate for event, rate in per_second.items()}
+    for event in ['cycles', 'instructions']:
+        if event in totals:
+            metrics[f'perf.{event}'] = totals[event]
+    if totals.get('cycles') and 'instructions' in totals:
+        metrics['ipc'] = totals['instructions'] / totals['cycles']
+    if totals.get('cache-references') and 'cache-misses' in totals:
+        metrics['cache_miss_rate'] = totals['cache-misses'] / totals['cache-references']
+    return metrics
+
+
+def fio_throughput_series(iteration_dir: str) -> List[Tuple[float, float]]:
+    """Throughput over time in Gbps, summed over all fio jobs, from the bandwidth logs of an iteration.
+
+    Returns:
+        (seconds since start, throughput in Gbps) for each second
+    """
+    kib_per_second = defaultdict(float)
+    for log_path in glob.glob(os.path.join(iteration_dir, f'{FIO_LOG_PREFIX}_bw.*.log')):
+        # Jobs log at slightly different times, so average each job's samples per second before summing the jobs
+        job_samples = defaultdict(list)
+        with open(log_path, 'r') as f:
+            for line in f:
+                # time (msec), value (KiB/s), data direction, block size, offset
+                fields = line.split(',')
+                if len(fields) < 2:
+                    continue
+                job_samples[round(int(fields[0]) / 1000)].append(int(fields[1]))
+        for second, samples in job_samples.items():
+            kib_per_second[second] += statistics.mean(samples)
+    return [(second, value * 1024 * 8 / 1_000_000_000) for second, value in sorted(kib_per_second.items())]
+
+
+def steady_state_metrics(series: Sequence[Tuple[float, float]]) -> Dict[str, float]:
+    """Split a throughput time series into the ramp and the steady state.
+
+    The steady-state level is estimated as the median of the second half of the series, which is assumed to be past
+    the ramp. The ramp ends at the first interval reaching `RAMP_THRESHOLD` of that level, so it is zero when the first
+    interval already does.
+    """
+    if len(series) < 2:
+        return {}
+    level = statistics.median(value for _, value in series[len(series) // 2 :])
+    ramp_end = next(i for i, (_, value) in enumerate(series) if value >= RAMP_THRESHOLD * level)
+    return {
+        'ramp_seconds': series[ramp_end][0] - series[0][0],
+        'steady_throughput_gbps': statistics.median(value for _, value in series[ramp_end:]),
+    }
+
+
+def parse_iteration_metrics(iteration_dir: str) -> Dict[str, Optional[float]]:
+    """Latency and throughput over time metrics of an iteration, for whichever output files it contains."""
+    metrics = {}
+    for file_pattern, parse in [
+        ('client-output.json', first_byte_metrics),
+        ('prefetch-output.json', first_byte_metrics),
+        ('s3io-output.json', s3io_metrics),
+        ('upload-output.json', upload_metrics),
+        ('startup-output.json', startup_metrics),
+        ('manifest-output.json', manifest_metrics),
+        ('fio.*.json', fio_metrics),
+        ('metadata.json', mount_metrics),
+        ('metadata.json', pass_metrics),
+        ('metadata.json', reservation_metrics),
+        ('memory.json', memory_metrics),
+        ('log_metrics.json', log_metrics),
+        ('otlp_metrics.json', otlp_metrics),
+    ]:
+        for file_path in glob.glob(os.path.join(iteration_dir, file_pattern)):
+            try:
+                with open(file_path, 'r') as f:
+                    metrics.update(parse(json.load(f)))
+            except Exception as e:
+                warnings.warn(f"Warning: Error parsing latencies from {file_path}: {e}")
+
+    # Metrics of each of several mounts are prefixed by its directory, e.g. `mount-0.log.<metric>.sum`
+    for file_name, parse in [('log_metrics.json', log_metrics), ('otlp_metrics.json', otlp_metrics)]:
+        try:
+            for mount, values in mount_file_metrics(iteration_dir, file_name, parse).items():
+                metrics.update({f'{mount}.{name}': value for name, value in values.items()})
+        except Exception as e:
+            warnings.warn(f"Warning: Error parsing {file_name} of mounts in {iteration_dir}: {e}")
+
+    try:
+        metrics.update(mount_memory_metrics(iteration_dir))
+    except Exception as e:
+        warnings.warn(f"Warning: Error parsing memory of mounts in {iteration_dir}: {e}")
+
+    try:
+        metrics.update(perf_stat_metrics(iteration_dir))
+    except Exception as e:
+        warnings.warn(f"Warning: Error parsing perf stat output in {iteration_dir}: {e}")
+
+    try:
+        metrics.update(steady_state_metrics(fio_throughput_series(iteration_dir)))
+    except Exception as e:
+        warnings.warn(f"Warning: Error parsing fio bandwidth logs in {iteration_dir}: {e}")
+
+    return metrics
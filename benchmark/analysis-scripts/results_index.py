@@ -0,0 +1,205 @@
+"""Incremental SQLite index of parsed benchmark results.
+
+Parsing the Hydra config and output files of every iteration directory is slow on large result archives,
+so the parsed configuration and metrics of each iteration are stored in an index next to the results.
+Only iteration directories which are new or changed since the last run are parsed again.
+"""
+
+import json
+import os
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+INDEX_FILE_NAME = '.autogroup-index.sqlite'
+
+# Bump when the schema changes, to rebuild existing indexes
+SCHEMA_VERSION = 1
+
+# Parses an iteration directory into its flattened config and its metrics
+IterationParser = Callable[[str], Tuple[Dict[str, Any], Dict[str, Optional[float]]]]
+
+
+def find_iteration_dirs(base_dir: str) -> Iterator[str]:
+    """Yield all iteration directories (named by their job number) below `base_dir`, without descending into them."""
+    for root, dirs, _ in os.walk(base_dir):
+        iteration_dirs = [dir_name for dir_name in dirs if dir_name.isdigit()]
+        for dir_name in iteration_dirs:
+            yield os.path.join(root, dir_name)
+        dirs[:] = [dir_name for dir_name in dirs if not dir_name.isdigit() and not dir_name.startswith('.')]
+
+
+def iteration_mtime(iteration_dir: str) -> float:
+    """Latest modification time of the iteration directory and its Hydra config files."""
+    mtime = os.stat(iteration_dir).st_mtime
+    for name in ['config.yaml', 'overrides.yaml']:
+        try:
+            mtime = max(mtime, os.stat(os.path.join(iteration_dir, '.hydra', name)).st_mtime)
+        except FileNotFoundError:
+            pass
+    return mtime
+
+
+class ResultsIndex:
+    """Index of the results below one base directory, keyed by iteration directory and its modification time."""
+
+    def __init__(self, index_path: str, parser_version: int = 1):
+        """
+        index_path: Location of the SQLite database
+        parser_version: Version of the iteration parser, all iterations are parsed again when it changes
+        """
+        self.connection = sqlite3.connect(index_path)
+        version = SCHEMA_VERSION * 1000 + parser_version
+        if self.connection.execute('PRAGMA user_version').fetchone()[0] != version:
+            self.connection.executescript(
+                """
+                DROP TABLE IF EXISTS iterations;
+                DROP TABLE IF EXISTS params;
+                DROP TABLE IF EXISTS metrics;
+                """
+            )
+            self.connection.execute(f'PRAGMA user_version = {version}')
+        self.connection.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS iterations (path TEXT PRIMARY KEY, job_num INTEGER, mtime REAL);
+            CREATE TABLE IF NOT EXISTS params (
+                path TEXT REFERENCES iterations(path) ON DELETE CASCADE,
+                key TEXT,
+                value TEXT,
+                PRIMARY KEY (path, key)
+            );
+            CREATE TABLE IF NOT EXISTS metrics (
+                path TEXT REFERENCES iterations(path) ON DELETE CASCADE,
+                name TEXT,
+                value REAL,
+                PRIMARY KEY (path, name)
+            );
+            CREATE INDEX IF NOT EXISTS params_by_key ON params (key, value);
+            CREATE INDEX IF NOT EXISTS metrics_by_name ON metrics (name);
+            """
+        )
+        self.connection.execute('PRAGMA foreign_keys = ON')
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def update(self, base_dir: str, parser: IterationParser, workers: Optional[int] = None) -> int:
+        """
+        Parse new or changed iteration directories below `base_dir` in a process pool, and drop removed ones.
+
+        Paths are stored relative to `base_dir`, so that the results and their index can be moved together.
+
+        Returns:
+            Number of iteration directories parsed
+        """
+        current = {
+            os.path.relpath(iteration_dir, base_dir): iteration_mtime(iteration_dir)
+            for iteration_dir in find_iteration_dirs(base_dir)
+        }
+        indexed = dict(self.connection.execute('SELECT path, mtime FROM iterations'))
+
+        removed = [(path,) for path in indexed if path not in current]
+        changed = [path for path, mtime in current.items() if indexed.get(path) != mtime]
+
+        with self.connection:
+            self.connection.executemany('DELETE FROM iterations WHERE path = ?', removed)
+            self.connection.executemany('DELETE FROM iterations WHERE path = ?', [(path,) for path in changed])
+
+            if changed:
+                paths = [os.path.join(base_dir, path) for path in changed]
+                workers = workers or os.cpu_count() or 1
+                with ProcessPoolExecutor(max_workers=workers) as executor:
+                    parsed = executor.map(parser, paths, chunksize=max(1, len(paths) // (4 * workers)))
+                    for path, (config, metrics) in zip(changed, parsed):
+                        self._insert(path, current[path], config, metrics)
+
+        return len(changed)
+
+    def _insert(self, path: str, mtime: float, config: Dict[str, Any], metrics: Dict[str, Optional[float]]) -> None:
+        job_num = int(os.path.basename(path))
+        self.connection.execute('INSERT INTO iterations VALUES (?, ?, ?)', (path, job_num, mtime))
+        self.connection.executemany(
+            'INSERT INTO params VALUES (?, ?, ?)', [(path, key, str(value)) for key, value in config.items()]
+        )
+        self.connection.executemany(
+            'INSERT INTO metrics VALUES (?, ?, ?)',
+            [(path, name, value) for name, value in metrics.items() if value is not None],
+        )
+
+    def varying_parameters(self, ignore: Sequence[str] = ()) -> List[str]:
+        """
+        Parameters which vary across the iterations having a value for any metric.
+
+        A parameter missing from some iterations counts as varying, as it is reported as 'N/A' for them.
+        """
+        placeholders = ', '.join('?' for _ in ignore)
+        rows = self.connection.execute(
+            f"""
+            WITH results AS (SELECT DISTINCT path FROM metrics)
+            SELECT key FROM params JOIN results USING (path)
+            WHERE key NOT IN ({placeholders})
+            GROUP BY key
+            HAVING COUNT(DISTINCT value) > 1 OR COUNT(*) < (SELECT COUNT(*) FROM results)
+            ORDER BY key
+            """,
+            list(ignore),
+        )
+        return [key for (key,) in rows]
+
+    def has_parameter(self, key: str) -> bool:
+        return self.connection.execute('SELECT 1 FROM params WHERE key = ? LIMIT 1', (key,)).fetchone() is not None
+
+    def metric_names(self) -> List[str]:
+        return [name for (name,) in self.connection.execute('SELECT DISTINCT name FROM metrics ORDER BY name')]
+
+    def group_metrics(
+        self, group_by: Sequence[str], metrics: Sequence[str]
+    ) -> List[Tuple[Tuple[Tuple[str, str], ...], Dict[str, List[Optional[float]]]]]:
+        """
+        Group iterations by the values of the `group_by` parameters, and collect each metric's values per group.
+
+        Iterations having any of the metrics are included, metrics are None where missing.
+        Values are ordered by job number within each group, so values at the same position are from the same iteration.
+
+        Returns:
+            For each group, its (parameter, value) pairs and the list of values for each metric
+        """
+        # Parameters and metrics are pivoted into columns, as a join per column would exceed SQLite's limit of
+        # 64 tables in a join with many metrics
+        group_columns = [f"MAX(CASE WHEN key = ? THEN value END) AS g{i}" for i in range(len(group_by))]
+        metric_columns = [f'MAX(CASE WHEN name = ? THEN value END) AS v{i}' for i in range(len(metrics))]
+        group_names = [f'g{i}' for i in range(len(group_by))]
+        aggregates = ['json_group_array(job_num)'] + [f'json_group_array(v{i})' for i in range(len(metrics))]
+
+        group_values = ''
+        if group_by:
+            group_values = f"""
+                LEFT JOIN (
+                    SELECT path, {', '.join(group_columns)} FROM params
+                    WHERE key IN ({', '.join('?' for _ in group_by)}) GROUP BY path
+                ) USING (path)"""
+        query = f"""
+            SELECT {', '.join([f"COALESCE({name}, 'N/A')" for name in group_names] + aggregates)} FROM (
+                SELECT * FROM iterations{group_values}
+                JOIN (
+                    SELECT path, {', '.join(metric_columns)} FROM metrics
+                    WHERE name IN ({', '.join('?' for _ in metrics)}) GROUP BY path
+                ) USING (path)
+                WHERE {' OR '.join(f'v{i} IS NOT NULL' for i in range(len(metrics)))}
+            )
+            {'GROUP BY ' + ', '.join(group_names) if group_names else ''}
+        """
+        parameters = [*group_by, *group_by, *metrics, *metrics]
+        groups = []
+        for row in self.connection.execute(query, parameters):
+            key = tuple(zip(group_by, row[: len(group_by)]))
+            job_nums = json.loads(row[len(group_by)])
+            if not job_nums:
+                continue
+            order = sorted(range(len(job_nums)), key=job_nums.__getitem__)
+            values = {}
+            for metric, metric_values in zip(metrics, row[len(group_by) + 1 :]):
+                metric_values = json.loads(metric_values)
+                values[metric] = [metric_values[i] for i in order]
+            groups.append((key, values))
+        return groups
@@ -0,0 +1,121 @@
+"""Statistical tests comparing the per-iteration results of a baseline and a candidate configuration."""
+
+import math
+import random
+import statistics
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import List, Sequence, Tuple
+
+# Use the exact distribution of U when there are no ties and at most this many samples in total
+EXACT_MAX_SAMPLES = 40
+
+
+@dataclass
+class Comparison:
+    baseline_median: float
+    candidate_median: float
+    p_value: float
+    # Probability that a candidate sample is larger than a baseline sample, minus the converse, in [-1, 1]
+    rank_biserial: float
+
+    @property
+    def relative_change(self) -> float:
+        """Change of the median relative to the baseline, e.g. -0.1 for a 10% decrease."""
+        if self.baseline_median == 0:
+            return math.inf if self.candidate_median > 0 else (-math.inf if self.candidate_median < 0 else 0.0)
+        return (self.candidate_median - self.baseline_median) / abs(self.baseline_median)
+
+
+def _ranks(values: Sequence[float]) -> Tuple[List[float], List[int]]:
+    """Ranks starting at 1, with ties given their average rank, and the sizes of the groups of tied values."""
+    order = sorted(range(len(values)), key=values.__getitem__)
+    ranks = [0.0] * len(values)
+    tie_sizes = []
+    i = 0
+    while i < len(order):
+        j = i
+        while j + 1 < len(order) and values[order[j + 1]] == values[order[i]]:
+            j += 1
+        for k in range(i, j + 1):
+            ranks[order[k]] = (i + j) / 2 + 1
+        if j > i:
+            tie_sizes.append(j - i + 1)
+        i = j + 1
+    return ranks, tie_sizes
+
+
+@lru_cache(maxsize=None)
+def _u_count(n1: int, n2: int, u: int) -> int:
+    """Number of orderings of n1 and n2 distinct samples whose U statistic is `u`."""
+    if u < 0 or u > n1 * n2:
+        return 0
+    if n1 == 0 or n2 == 0:
+        return 1 if u == 0 else 0
+    # The largest sample is either from the first group, contributing n2 to U, or from the second
+    return _u_count(n1 - 1, n2, u - n2) + _u_count(n1, n2 - 1, u)
+
+
+def mann_whitney_u(baseline: Sequence[float], candidate: Sequence[float]) -> Tuple[float, float]:
+    """Two-sided Mann-Whitney U test.
+
+    Returns:
+        U statistic of the candidate samples, and the p-value of the hypothesis that both have the same distribution
+    """
+    n1, n2 = len(candidate), len(baseline)
+    if n1 == 0 or n2 == 0:
+        raise ValueError("cannot compare empty samples")
+    ranks, tie_sizes = _ranks(list(candidate) + list(baseline))
+    u = sum(ranks[:n1]) - n1 * (n1 + 1) / 2
+
+    if not tie_sizes and n1 + n2 <= EXACT_MAX_SAMPLES:
+        total = math.comb(n1 + n2, n1)
+        u = int(u)
+        lower = sum(_u_count(n1, n2, k) for k in range(u + 1)) / total
+        upper = sum(_u_count(n1, n2, k) for k in range(u, n1 * n2 + 1)) / total
+        return u, min(1.0, 2 * min(lower, upper))
+
+    # Normal approximation with tie and continuity corrections
+    n = n1 + n2
+    mean = n1 * n2 / 2
+    tie_correction = sum(t**3 - t for t in tie_sizes) / (n * (n - 1))
+    variance = n1 * n2 / 12 * ((n + 1) - tie_correction)
+    if variance == 0:
+        return u, 1.0
+    z = (abs(u - mean) - 0.5) / math.sqrt(variance)
+    return u, min(1.0, math.erfc(max(z, 0.0) / math.sqrt(2)))
+
+
+def bootstrap_median_difference(
+    baseline: Sequence[float], candidate: Sequence[float], resamples: int = 10000, seed: int = 0
+) -> float:
+    """Two-sided bootstrap p-value of the difference between the medians of candidate and baseline being zero."""
+    if not baseline or not candidate:
+        raise ValueError("cannot compare empty samples")
+    rng = random.Random(seed)
+    below = 0
+    above = 0
+    for _ in range(resamples):
+        difference = statistics.median(rng.choices(candidate, k=len(candidate))) - statistics.median(
+            rng.choices(baseline, k=len(baseline))
+        )
+        if difference <= 0:
+            below += 1
+        if difference >= 0:
+            above += 1
+    return min(1.0, 2 * min(below, above) / resamples)
+
+
+def compare_samples(baseline: Sequence[float], candidate: Sequence[float], test: str = 'mann-whitney') -> Comparison:
+    """Compare candidate samples against baseline samples with the given test, `mann-whitney` or `bootstrap`."""
+    u, p_value = mann_whitney_u(baseline, candidate)
+    if test == 'bootstrap':
+        p_value = bootstrap_median_difference(baseline, candidate)
+    elif test != 'mann-whitney':
+        raise ValueError(f"unknown test: {test}")
+    return Comparison(
+        baseline_median=statistics.median(baseline),
+        candidate_median=statistics.median(candidate),
+        p_value=p_value,
+        rank_biserial=2 * u / (len(baseline) * len(candidate)) - 1,
+    )
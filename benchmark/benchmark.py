@@ -2,9 +2,10 @@ import json
 import logging
 import os
 import subprocess
+import time
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Sequence, Tuple
 
 import hydra
 from hydra.core.hydra_config import HydraConfig
@@ -12,13 +13,25 @@ from hydra.types import RunMode
 from omegaconf import DictConfig, OmegaConf
 import urllib.request
 
+from benchmarks.base_benchmark import pass_output_dir
 from benchmarks.client_benchmark import ClientBenchmark
-from benchmarks.command import CommandResult
+from benchmarks.command import Command, CommandResult
+from benchmarks.config_utils import get_s3_keys
 from benchmarks.crt_benchmark import CrtBenchmark
 from benchmarks.fio_benchmark import FioBenchmark
+from benchmarks.local_s3 import LocalS3Process
+from benchmarks.manifest_benchmark import ManifestBenchmark
+from benchmarks.output_capture import OutputCapture
+from benchmarks.placement import benchmark_prefix, place_harness, placement_metadata
 from benchmarks.prefetch_benchmark import PrefetchBenchmark
+from benchmarks.s3io_benchmark import S3ioBenchmark
+from benchmarks.startup_benchmark import StartupBenchmark
+from benchmarks.upload_benchmark import UploadBenchmark
 
 from monitoring import ResourceMonitoring
+from monitoring.memory import MemorySamplerTool
+from monitoring.otlp import OtlpReceiverTool
+from monitoring.sampler import ProcfsSamplerTool, read_cpu_seconds
 from monitoring.tools import MonitoringTool, MpstatTool, BwmNgTool, PerfStatTool, FlamegraphTool
 
 logging.basicConfig(level=os.environ.get('LOGLEVEL', 'INFO').upper())
@@ -64,6 +77,69 @@ def write_metadata(metadata: Dict[str, Any]) -> None:
         log.error("Failed to write metadata", exc_info=True)
 
 
+def start_local_s3(cfg: DictConfig) -> LocalS3Process:
+    """Start a local stand-in for S3 holding the objects read by the benchmarks, and direct them to it."""
+    object_size = cfg.object_size_in_gib * 1024 * 1024 * 1024
+    keys = get_s3_keys(cfg.s3_keys, cfg.application_workers, cfg.object_size_in_gib)
+    local_s3 = LocalS3Process(
+        {key: object_size for key in keys},
+        latency_ms=cfg.local_s3.latency_ms,
+        bandwidth_gbps=cfg.local_s3.bandwidth_gbps,
+    )
+    cfg.endpoint_url = local_s3.start()
+    return local_s3
+
+
+def start_otlp_receiver(cfg: DictConfig) -> OtlpReceiverTool:
+    """Start a local receiver of the OTLP metrics exported by Mountpoint, and direct Mountpoint to it."""
+    otlp_receiver = OtlpReceiverTool()
+    otlp_receiver.start()
+    cfg.mountpoint.otlp_metrics = True
+    cfg.mountpoint.otlp_endpoint = otlp_receiver.endpoint
+    if cfg.mountpoint.otlp_export_interval is None:
+        # Export as often as metrics are logged, rather than every minute
+        cfg.mountpoint.otlp_export_interval = 5
+    return otlp_receiver
+
+
+def read_target_cpu_seconds(metadata: Dict[str, Any]) -> Optional[float]:
+    """CPU time of the target process so far, summed over all mounts, or None if it cannot be read (any more)."""
+    pids = [mount["target_pid"] for mount in metadata.get("mounts", [])] or [metadata["target_pid"]]
+    try:
+        return sum(read_cpu_seconds(pid) for pid in pids)
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def start_command(
+    command: Command, capture_cfg: DictConfig, output_dir: str = ".", prefix: Sequence[str] = ()
+) -> Tuple[subprocess.Popen, OutputCapture]:
+    """Start a benchmark command, streaming its output to disk rather than buffering it all in memory.
+
+    `prefix` is prepended to the command's arguments, to place it on some CPUs.
+    """
+    process = subprocess.Popen(
+        [*prefix, *command.args],
+        env=command.env,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+    )
+    capture = OutputCapture(
+        output_dir=output_dir,
+        segment_bytes=capture_cfg.segment_mib * 1024 * 1024,
+        max_segments=capture_cfg.max_segments,
+        tail_bytes=capture_cfg.tail_kib * 1024,
+    )
+    capture.start(process.stdout, process.stderr)
+    return process, capture
+
+
+def wait_command(process: subprocess.Popen, capture: OutputCapture) -> CommandResult:
+    process.wait()
+    capture.join()
+    return capture.result(process.returncode)
+
+
 def upload_results_to_s3(bucket_name: str, region: str) -> None:
     """
     Upload benchmark results to S3 bucket using the AWS CLI.
@@ -114,6 +190,8 @@ def run_experiment(cfg: DictConfig) -> None:
         "start_time": datetime.now(tz=timezone.utc),
         "success": False,
     }
+    # CPUs of the harness before it is placed, kept by benchmark commands without a placement of their own
+    harness_cpus = sorted(os.sched_getaffinity(0))
 
     if benchmark_type == "fio":
         benchmark = FioBenchmark(cfg, metadata)
@@ -125,46 +203,100 @@ def run_experiment(cfg: DictConfig) -> None:
         benchmark = ClientBenchmark(cfg, metadata)
     elif benchmark_type == "client_bp":
         benchmark = ClientBenchmark(cfg, metadata, backpressure=True)
+    elif benchmark_type == "s3io":
+        benchmark = S3ioBenchmark(cfg, metadata)
+    elif benchmark_type == "upload":
+        benchmark = UploadBenchmark(cfg, metadata)
+    elif benchmark_type == "startup":
+        benchmark = StartupBenchmark(cfg, metadata)
+    elif benchmark_type == "manifest":
+        benchmark = ManifestBenchmark(cfg, metadata)
     else:
         raise ValueError(f"Unsupported benchmark type: {benchmark_type}")
 
     result = None
+    local_s3 = None
+    otlp_receiver = None
     try:
+        if cfg.local_s3.enabled:
+            local_s3 = start_local_s3(cfg)
+            metadata["endpoint_url"] = cfg.endpoint_url
+        # Unlike the other monitoring tools, the receiver must be listening before Mountpoint is mounted in `setup`
+        if cfg.monitoring.with_otlp_receiver:
+            otlp_receiver = start_otlp_receiver(cfg)
+
+        metadata["placement"] = placement_metadata(cfg)
         with_flamegraph = cfg.monitoring.with_flamegraph
         benchmark.setup(with_flamegraph=with_flamegraph)
         command = benchmark.get_command()
-
-        process = subprocess.Popen(
-            command.args,
-            env=command.env,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
-        )
+        command_prefix = benchmark_prefix(cfg, harness_cpus)
+        process, capture = start_command(command, cfg.output_capture, prefix=command_prefix)
+        # Only now, as the mount and the benchmark process would otherwise inherit the placement of the harness
+        place_harness(cfg)
 
         target_pid = metadata.get("target_pid", process.pid)
         metadata["target_pid"] = target_pid
+        start_cpu_seconds = read_target_cpu_seconds(metadata)
+        start_time = time.monotonic()
 
         # Construct monitoring tools
-        tools: List[MonitoringTool] = [MpstatTool()]
+        tools: List[MonitoringTool] = []
+        if cfg.monitoring.with_procfs:
+            tools.append(
+                ProcfsSamplerTool(
+                    target_pid,
+                    interval_secs=cfg.monitoring.procfs_interval_ms / 1000,
+                    interface_names=list(cfg.network.interface_names),
+                    mount_dir=metadata.get("mount_dir"),
+                )
+            )
+        else:
+            tools.append(MpstatTool())
         if cfg.monitoring.with_bwm:
             tools.append(BwmNgTool())
-        if cfg.monitoring.with_perf_stat:
-            tools.append(PerfStatTool(target_pid))
-        if cfg.monitoring.with_flamegraph:
-            tools.append(FlamegraphTool(target_pid, cfg.monitoring.flamegraph_scripts_path))
+        # With several mounts, each one is profiled separately into its own directory
+        profiled = [(mount["target_pid"], mount["output_dir"]) for mount in metadata.get("mounts", [])]
+        for pid, output_dir in profiled or [(target_pid, ".")]:
+            if cfg.monitoring.with_memory:
+                memory_target_mib = metadata.get("max_memory_target_mib")
+                tools.append(
+                    MemorySamplerTool(
+                        pid,
+                        interval_secs=cfg.monitoring.memory_interval_ms / 1000,
+                        memory_target_bytes=memory_target_mib * 1024 * 1024 if memory_target_mib is not None else None,
+                        output_dir=output_dir,
+                    )
+                )
+            if cfg.monitoring.with_perf_stat:
+                tools.append(PerfStatTool(pid, output_dir, cfg.monitoring.perf_stat_events))
+            if cfg.monitoring.with_flamegraph:
+                tools.append(FlamegraphTool(pid, cfg.monitoring.flamegraph_scripts_path, output_dir))
 
         with ResourceMonitoring.managed(tools):
-            stdout, stderr = process.communicate()
-
-            if stdout is not None and isinstance(stdout, bytes):
-                stdout = stdout.decode('utf-8')
-            if stderr is not None and isinstance(stderr, bytes):
-                stderr = stderr.decode('utf-8')
-
-            result = CommandResult(returncode=process.returncode, stdout=stdout, stderr=stderr)
-
-        metadata["success"] = True
+            result = wait_command(process, capture)
+            # Counters are divided by the bytes of the first pass, so they must not count the warm passes
+            for tool in tools:
+                if isinstance(tool, PerfStatTool):
+                    tool.stop()
+            # CPU used by the target process, e.g. the mount, over the first pass, whose throughput is reported
+            end_cpu_seconds = read_target_cpu_seconds(metadata)
+            if start_cpu_seconds is not None and end_cpu_seconds is not None:
+                metadata["target_cpu_seconds"] = end_cpu_seconds - start_cpu_seconds
+                metadata["target_cpu_cores"] = (end_cpu_seconds - start_cpu_seconds) / (time.monotonic() - start_time)
+
+            # Further passes against the same setup, e.g. reading again with a warm cache, stopping at the first failure
+            pass_index = 1
+            while result.returncode == 0 and (command := benchmark.get_pass_command(pass_index)) is not None:
+                output_dir = pass_output_dir(pass_index)
+                os.makedirs(output_dir, exist_ok=True)
+                log.info(f"Starting pass {pass_index}, with output in {output_dir}")
+                result = wait_command(*start_command(command, cfg.output_capture, output_dir, prefix=command_prefix))
+                pass_index += 1
+
+        # Set again below if post-processing fails, as the results would then be incomplete
+        metadata["success"] = result.returncode == 0
+        if result.returncode != 0:
+            log.error(f"Benchmark exited with code {result.returncode}")
 
     except Exception:
         log.error("Benchmark execution failed:", exc_info=True)
@@ -175,7 +307,14 @@ def run_experiment(cfg: DictConfig) -> None:
                 benchmark.post_process(result)
         except Exception:
             log.error("Post-processing failed:", exc_info=True)
+            metadata["success"] = False
         finally:
+            # Stopped after unmounting in `post_process`, to receive the last export of each mount
+            if otlp_receiver is not None:
+                otlp_receiver.stop()
+            if local_s3 is not None:
+                local_s3.stop()
+
             result_bucket_name = cfg.s3_result_bucket
             region = cfg.region
             if result_bucket_name:
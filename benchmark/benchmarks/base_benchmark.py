@@ -1,17 +1,35 @@
 from abc import ABC, abstractmethod
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
 
+from omegaconf import DictConfig
+
+from .cargo_helper import BuildTarget
 from .command import Command, CommandResult
 
 
+def pass_output_dir(pass_index: int) -> str:
+    """Directory of the output of a further pass of a benchmark, relative to the job's output directory."""
+    return f"pass-{pass_index}"
+
+
 class BaseBenchmark(ABC):
     """
     Abstract base class for all benchmarks.
     - setup: Prepare the environment for the benchmark
     - get_command: Return the command to execute for this benchmark
+    - get_pass_command: Optionally, return the commands of further passes against the same setup
     - post_process: Process results, collect logs, and clean up
     """
 
+    @staticmethod
+    def build_targets(cfg: DictConfig) -> List[BuildTarget]:
+        """
+        Return the Rust targets this benchmark compiles in setup for the given configuration.
+
+        These are compiled once before a sweep is launched, so that jobs find them in the build cache.
+        """
+        return []
+
     @abstractmethod
     def setup(self, with_flamegraph: bool = False) -> Dict[str, Any]:
         """
@@ -35,6 +53,21 @@ class BaseBenchmark(ABC):
         """
         pass
 
+    def get_pass_command(self, pass_index: int) -> Optional[Command]:
+        """
+        Return the command of a further pass against the same setup, or None once there are no more passes.
+
+        Passes are numbered from 1, `get_command` being the first one. Each pass runs once the previous one succeeded,
+        under the same monitoring, with its output captured to `pass-<index>/`.
+
+        Args:
+            pass_index: Number of the pass
+
+        Returns:
+            Command object, or None to stop
+        """
+        return None
+
     @abstractmethod
     def post_process(self, result: CommandResult) -> Dict[str, Any]:
         """
@@ -1,11 +1,61 @@
+from contextlib import contextmanager
+from dataclasses import dataclass
+import fcntl
+import hashlib
 import json
 import logging
+import shutil
 import subprocess
-from typing import List, Optional, Dict
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Dict, Tuple
 import os
 
 log = logging.getLogger(__name__)
 
+# Directory for the build cache, or "off" to always invoke cargo
+BUILD_CACHE_ENV_VAR = "MOUNTPOINT_BENCHMARK_BUILD_CACHE"
+DEFAULT_BUILD_CACHE_DIR = Path.home() / ".cache" / "mountpoint-s3-benchmark" / "builds"
+
+# Environment variables which change the build output, in addition to those passed as `build_env`
+BUILD_AFFECTING_ENV_VARS = ["CFLAGS", "RUSTFLAGS", "CARGO_PROFILE_RELEASE_DEBUG"]
+
+
+@dataclass(frozen=True)
+class BuildTarget:
+    """A Rust binary or example to compile, with everything that affects its build output."""
+
+    binary_name: Optional[str] = None
+    example_name: Optional[str] = None
+    features: Tuple[str, ...] = ()
+    build_env: Tuple[Tuple[str, str], ...] = ()
+    with_flamegraph: bool = False
+
+    def build(self) -> str:
+        """Compile the target, or fetch it from the build cache, and return the path to the executable."""
+        return _build_and_get_executable(
+            binary_name=self.binary_name,
+            example_name=self.example_name,
+            features=list(self.features) or None,
+            build_env=dict(self.build_env) or None,
+            with_flamegraph=self.with_flamegraph,
+        )
+
+
+def prebuild(targets: Iterable[BuildTarget]) -> Dict[BuildTarget, str]:
+    """
+    Compile each distinct target once, populating the build cache ahead of the benchmark jobs.
+
+    Builds run one after another, as cargo parallelises within a build and
+    serializes concurrent builds sharing a target directory anyway.
+
+    Returns:
+        Mapping from each target to the path of its executable
+    """
+    executables = {}
+    for target in dict.fromkeys(targets):
+        executables[target] = target.build()
+    return executables
+
 
 def build_example(
     name: str,
@@ -97,6 +147,89 @@ def _build_and_get_executable(
     if build_env or with_flamegraph:
         log.info(f"Build environment: CFLAGS='{env.get('CFLAGS', '')}' RUSTFLAGS='{env.get('RUSTFLAGS', '')}'")
 
+    cache_dir = _build_cache_dir()
+    if cache_dir is None:
+        return _cargo_build(cargo_args, env)
+
+    source_hash = _source_tree_hash()
+    if source_hash is None:
+        log.warning("Could not determine the source tree hash, bypassing the build cache")
+        return _cargo_build(cargo_args, env)
+
+    affecting_env = {key: env.get(key, "") for key in sorted({*BUILD_AFFECTING_ENV_VARS, *(build_env or {})})}
+    cache_key = hashlib.sha256(json.dumps([source_hash, cargo_args, affecting_env]).encode()).hexdigest()[:32]
+    cache_entry = cache_dir / cache_key
+
+    # Hold the lock while building, so concurrent jobs needing the same build wait for it instead of repeating it
+    with _locked(cache_dir / f"{cache_key}.lock"):
+        cached_executables = [
+            path for path in (cache_entry.iterdir() if cache_entry.is_dir() else []) if not path.name.startswith(".")
+        ]
+        if cached_executables:
+            log.info(f"Using cached build of {binary_name or example_name}: {cached_executables[0]}")
+            return str(cached_executables[0])
+
+        executable = Path(_cargo_build(cargo_args, env))
+        cache_entry.mkdir(parents=True, exist_ok=True)
+        partial_path = cache_entry / f".{executable.name}.partial"
+        shutil.copy2(executable, partial_path)
+        cached_executable = cache_entry / executable.name
+        os.replace(partial_path, cached_executable)
+        log.info(f"Cached build of {binary_name or example_name} at {cached_executable}")
+        return str(cached_executable)
+
+
+def _build_cache_dir() -> Optional[Path]:
+    configured = os.environ.get(BUILD_CACHE_ENV_VAR)
+    if configured == "off":
+        return None
+    cache_dir = Path(configured) if configured else DEFAULT_BUILD_CACHE_DIR
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    return cache_dir
+
+
+@contextmanager
+def _locked(lock_path: Path) -> Iterator[None]:
+    with open(lock_path, "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _source_tree_hash() -> Optional[str]:
+    """
+    Hash the state of the source tree: the committed tree, uncommitted changes to tracked files, and untracked files.
+    """
+    try:
+        tree = subprocess.run(
+            ["git", "rev-parse", "HEAD^{tree}"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+        diff = subprocess.run(["git", "diff", "HEAD", "--binary"], capture_output=True, check=True).stdout
+        untracked = subprocess.run(
+            ["git", "ls-files", "--others", "--exclude-standard", "-z", "--full-name"],
+            capture_output=True,
+            check=True,
+        ).stdout
+        toplevel = subprocess.run(
+            ["git", "rev-parse", "--show-toplevel"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+    digest = hashlib.sha256(tree.encode())
+    digest.update(diff)
+    for path in sorted(filter(None, untracked.split(b"\0"))):
+        digest.update(path)
+        try:
+            digest.update(Path(toplevel, path.decode()).read_bytes())
+        except OSError:
+            continue
+    return digest.hexdigest()
+
+
+def _cargo_build(cargo_args: List[str], env: Dict[str, str]) -> str:
     log.info(f"Compiling: {' '.join(cargo_args)}")
 
     try:
@@ -1,11 +1,11 @@
 import logging
 import subprocess
-from typing import Dict, Any
+from typing import Dict, Any, List
 
 from benchmarks.base_benchmark import BaseBenchmark
 from benchmarks.command import Command, CommandResult
-from benchmarks.cargo_helper import build_example
-from benchmarks.config_utils import get_s3_keys
+from benchmarks.cargo_helper import BuildTarget, build_example
+from benchmarks.config_utils import get_s3_keys, s3_endpoint_env
 from omegaconf import DictConfig
 
 log = logging.getLogger(__name__)
@@ -17,6 +17,10 @@ class ClientBenchmark(BaseBenchmark):
         self.metadata = metadata
         self.backpressure = backpressure
 
+    @staticmethod
+    def build_targets(cfg: DictConfig) -> List[BuildTarget]:
+        return [BuildTarget(example_name="client_benchmark", with_flamegraph=cfg.monitoring.with_flamegraph)]
+
     def setup(self, with_flamegraph: bool = False) -> Dict[str, Any]:
         # Compile the client_benchmark example
         features = None
@@ -64,7 +68,7 @@ class ClientBenchmark(BaseBenchmark):
         else:
             raise ValueError("Seeing fewer objects than app workers. So cannot proceed with the run.")
 
-        client_env = {}
+        client_env = s3_endpoint_env(self.cfg)
         if not self.cfg.download_checksums:
             client_env["EXPERIMENTAL_MOUNTPOINT_NO_DOWNLOAD_INTEGRITY_VALIDATION"] = "ON"
         if (crt_eventloop_threads := self.cfg.crt_eventloop_threads) is not None:
@@ -1,5 +1,5 @@
 from dataclasses import dataclass, field
-from typing import List, Dict, Optional
+from typing import Any, List, Dict, Optional
 import os
 
 
@@ -10,6 +10,8 @@ class CommandResult:
     returncode: int
     stdout: Optional[str] = None
     stderr: Optional[str] = None
+    # Progress lines parsed while the command ran, see `benchmarks.output_capture`
+    progress: List[Dict[str, Any]] = field(default_factory=list)
 
 
 @dataclass
@@ -1,5 +1,11 @@
 """Shared configuration utilities for benchmarks."""
 
+from typing import Dict
+
+from omegaconf import DictConfig
+
+from benchmarks.local_s3 import CREDENTIALS_ENV
+
 
 def get_s3_keys(s3_keys_config, app_workers: int, object_size_in_gib: int) -> list:
     """Get S3 keys from config or generate defaults."""
@@ -15,3 +21,13 @@ def default_object_keys(app_workers, object_size_in_gib) -> list:
     for i in range(app_workers):
         keys.append(f"j{i}_{object_size_in_gib}GiB.bin")
     return keys
+
+
+def s3_endpoint_env(cfg: DictConfig) -> Dict[str, str]:
+    """Environment variables directing the S3 client of a benchmark to the configured endpoint, if any."""
+    env = {}
+    if cfg.endpoint_url is not None:
+        env["AWS_ENDPOINT_URL"] = cfg.endpoint_url
+    if cfg.local_s3.enabled:
+        env.update(CREDENTIALS_ENV)
+    return env
@@ -22,6 +22,10 @@ class CrtBenchmark(BaseBenchmark):
         self.crt_benchmarks_path = cfg.benchmarks.crt.crt_benchmarks_path
         if self.crt_benchmarks_path is None:
             raise ValueError("crt_benchmarks_path is required. Please populate benchmarks.crt.crt_benchmarks_path")
+        if cfg.endpoint_url is not None or cfg.local_s3.enabled:
+            raise ValueError(
+                "crt benchmarks always use the region's S3 endpoint, and cannot use endpoint_url or local_s3"
+            )
 
         self.crt_benchmark_runner = f"{self.crt_benchmarks_path}/build/c/install/bin/s3-benchrunner-c"
         self.crt_cfg_file = None
@@ -123,7 +127,12 @@ class CrtBenchmark(BaseBenchmark):
 
         log.info("CRT benchmark completed successfully")
 
-        metrics = self.parse_benchmark_output(result.stdout)
+        if result.progress:
+            # Parsed from the first run while the benchmark was running
+            run = result.progress[0]
+            metrics = {"duration_secs": run["elapsed_seconds"], "throughput_gbps": run["throughput_gbps"]}
+        else:
+            metrics = self.parse_benchmark_output(result.stdout)
 
         with open(f"{os.getcwd()}/crt_output.json", 'w') as f:
             json.dump(metrics, f, indent=4)
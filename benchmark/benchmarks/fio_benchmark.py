@@ -1,38 +1,99 @@
+import glob
+import json
 import logging
+import math
+import os
+import shutil
+import statistics
 import subprocess
 import tempfile
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime, timezone
 
-from benchmarks.base_benchmark import BaseBenchmark
+from benchmarks.base_benchmark import BaseBenchmark, pass_output_dir
+from benchmarks.cargo_helper import BuildTarget
 from benchmarks.command import Command, CommandResult
 import hydra
 from omegaconf import DictConfig
 
-from benchmarks.mountpoint import mount_mp, cleanup_mp
+from benchmarks.mountpoint import MP_LOGS_DIRECTORY, mount_mp, cleanup_mounts, mount_output_dir, mountpoint_build_target
+from benchmarks.log_metrics import LogMetricsSeries, memory_reservations, read_log_lines
 
 log = logging.getLogger(__name__)
 
+FIO_BINARY = "fio"
+
+# Prefix of the bandwidth and latency logs written by fio, which are parsed by `analysis-scripts/iteration_metrics.py`
+FIO_LOG_PREFIX = "fio"
+
+# Jobs which read files laid out by another job, or None for jobs which do not read existing files.
+# Other jobs lay out their own files.
+LAYOUT_JOBS: Dict[str, Optional[str]] = {
+    "sequential_write": None,
+    "metadata": "small_file_read",
+}
+
+# Jobs whose files are laid out unless `benchmarks.fio.layout` is set, as their tree is not found in existing buckets
+LAYOUT_BY_DEFAULT = {"small_file_read", "metadata"}
+
+# Interval of the bandwidth logs with several mounts when `benchmarks.fio.log_avg_msec` is not set,
+# as the throughput of each mount is computed from them
+MOUNT_LOG_AVG_MSEC = 1000
+
+
+def job_throughput_gbps(log_path: str) -> Optional[float]:
+    """Mean throughput in Gbps of a single fio job, from its bandwidth log."""
+    samples = []
+    with open(log_path, "r") as f:
+        for line in f:
+            # time (msec), value (KiB/s), data direction, block size, offset
+            fields = line.split(",")
+            if len(fields) >= 2:
+                samples.append(int(fields[1]))
+    if not samples:
+        return None
+    return statistics.mean(samples) * 1024 * 8 / 1_000_000_000
+
+
+def fio_throughput_gbps(output_path: str) -> float:
+    """Throughput in Gbps of a fio run, summed over its jobs and over reads and writes, from its JSON output."""
+    with open(output_path, "r") as f:
+        output = json.load(f)
+    bytes_per_second = sum(job[direction]["bw_bytes"] for job in output["jobs"] for direction in ("read", "write"))
+    return bytes_per_second * 8 / 1_000_000_000
+
 
 class FioBenchmark(BaseBenchmark):
     def __init__(self, cfg: DictConfig, metadata: Dict[str, Any]):
         self.cfg = cfg
         self.metadata = metadata  # Use the metadata passed from benchmark.py
-        self.mount_dir = None
+        self.mount_dirs: List[str] = []
+        self.cache_dirs: List[str] = []
         self.fio_output_filepath = None
+        self.pass_output_filepaths: List[str] = []
 
-    def _get_dev_id(self):
+    @staticmethod
+    def build_targets(cfg: DictConfig) -> List[BuildTarget]:
+        build_target = mountpoint_build_target(cfg, cfg.monitoring.with_flamegraph)
+        return [build_target] if build_target is not None else []
+
+    @property
+    def fio_directory(self) -> str:
+        """Directory argument of fio, which assigns jobs to colon-separated directories in turn."""
+        return ":".join(self.mount_dirs)
+
+    def _get_dev_id(self, mount_dir: str):
         with open('/proc/self/mountinfo', 'r') as f:
             for line in f:
                 fields = line.split()
                 # Use mounted dir to extract the dev id
-                if fields[4] == self.mount_dir:
+                if fields[4] == mount_dir:
                     dev_id = fields[2]
                     return dev_id
-        raise RuntimeError(f"Could not find device ID for mount point {self.mount_dir}")
+        raise RuntimeError(f"Could not find device ID for mount point {mount_dir}")
 
-    def _set_read_ahead(self, bytes):
-        dev_id = self._get_dev_id()
+    def _set_read_ahead(self, mount_dir: str, bytes):
+        dev_id = self._get_dev_id(mount_dir)
         read_ahead_path = f"/sys/class/bdi/{dev_id}/read_ahead_kb"
         bytes_in_kb = bytes // 1024
         cmd = f'echo {bytes_in_kb} > {read_ahead_path}'
@@ -40,26 +101,130 @@ class FioBenchmark(BaseBenchmark):
         log.info(f"Set read_ahead_kb to {bytes} for device {dev_id}")
 
     def setup(self, with_flamegraph: bool = False) -> Dict[str, Any]:
-        self.mount_dir = tempfile.mkdtemp(suffix=".mountpoint-s3")
-        mount_metadata = mount_mp(self.cfg, self.mount_dir, with_flamegraph)
-        self.metadata.update(mount_metadata)
+        mount_count = self.cfg.mountpoint.mount_count
+        if mount_count == 1:
+            mount_dir = tempfile.mkdtemp(suffix=".mountpoint-s3")
+            self.mount_dirs.append(mount_dir)
+            mount_metadata = mount_mp(self.cfg, mount_dir, with_flamegraph)
+            self.metadata.update(mount_metadata)
+            self._add_cache_dir(mount_metadata)
+        else:
+            self._mount_all(mount_count, with_flamegraph)
+
+        self.metadata["max_memory_target_mib"] = self.cfg.mountpoint.max_memory_target
+
+        layout = self.cfg.benchmarks.fio.layout
+        if layout or (layout is None and self.cfg.benchmarks.fio.fio_benchmark in LAYOUT_BY_DEFAULT):
+            self._lay_out_files()
+
         return self.metadata
 
-    def get_command(self) -> Command:
-        FIO_BINARY = "fio"
+    def _mount_all(self, mount_count: int, with_flamegraph: bool) -> None:
+        """
+        Start several mounts, each of its own prefix, which fio jobs are spread across.
+
+        Details of each mount are recorded in the `mounts` metadata, and those of the first one at the top level,
+        so that tools which only follow a single Mountpoint process follow the first mount.
+        """
+        if mount_count > self.cfg.application_workers:
+            raise ValueError(
+                f"mount_count ({mount_count}) must not exceed application_workers ({self.cfg.application_workers})"
+            )
+
+        mounts = []
+        try:
+            for mount_index in range(mount_count):
+                mount_dir = tempfile.mkdtemp(suffix=f".mountpoint-s3-{mount_index}")
+                self.mount_dirs.append(mount_dir)
+                mount_metadata = mount_mp(self.cfg, mount_dir, with_flamegraph, mount_index=mount_index)
+                self._add_cache_dir(mount_metadata)
+                if mount_index == 0:
+                    self.metadata.update(mount_metadata)
+                mounts.append(
+                    {
+                        "mount_dir": mount_dir,
+                        "prefix": mount_metadata["prefix"],
+                        "target_pid": mount_metadata["target_pid"],
+                        "output_dir": mount_output_dir(mount_index),
+                    }
+                )
+        except Exception:
+            # The directory of a failed mount is left behind, only unmount those which succeeded
+            cleanup_mounts(self.mount_dirs[: len(mounts)])
+            self.mount_dirs = []
+            self._remove_cache_dirs()
+            raise
+
+        self.metadata["mounts"] = mounts
+        log.info(f"Started {mount_count} mounts with pids {[mount['target_pid'] for mount in mounts]}")
+
+    def _add_cache_dir(self, mount_metadata: Dict[str, Any]) -> None:
+        if mount_metadata.get("cache_dir") is not None:
+            self.cache_dirs.append(mount_metadata["cache_dir"])
+
+    def _remove_cache_dirs(self) -> None:
+        """Remove the disk caches of the mounts, which may be large, once they are unmounted."""
+        for cache_dir in self.cache_dirs:
+            log.info(f"Removing cache directory {cache_dir}")
+            shutil.rmtree(cache_dir, ignore_errors=True)
+        self.cache_dirs = []
+
+    def _mount_throughputs_gbps(self) -> List[Optional[float]]:
+        """Throughput of each mount, summed over the fio jobs assigned to it, from their bandwidth logs."""
+        mount_count = len(self.mount_dirs)
+        throughputs: List[Optional[float]] = [None] * mount_count
+        for log_path in glob.glob(f"{FIO_LOG_PREFIX}_bw.*.log"):
+            # Logs are numbered from 1 in job order, and fio assigns job N to directory N modulo their count
+            job_number = int(os.path.basename(log_path).split(".")[1]) - 1
+            throughput = job_throughput_gbps(log_path)
+            if throughput is not None:
+                mount_index = job_number % mount_count
+                throughputs[mount_index] = (throughputs[mount_index] or 0.0) + throughput
+        return throughputs
+
+    def _parse_log_metrics(self) -> None:
+        """
+        Parse the metrics each mount logged with `--log-metrics` into a time series in its output directory,
+        and summarize the reservations of its memory limiter in the metadata.
+        """
+        monitoring = self.cfg.monitoring
+        if not (monitoring.log_metrics or monitoring.with_memory):
+            return
+
+        mounts = [(mount, mount["output_dir"]) for mount in self.metadata.get("mounts", [])]
+        for mount_metadata, output_dir in mounts or [(self.metadata, ".")]:
+            log_paths = sorted(glob.glob(os.path.join(output_dir, MP_LOGS_DIRECTORY, "*")))
+            series = LogMetricsSeries().add_lines(read_log_lines(log_paths))
+            if monitoring.log_metrics:
+                series.write(output_dir)
+            if monitoring.with_memory:
+                mount_metadata["memory_reservations"] = memory_reservations(series)
+
+    def _lay_out_files(self) -> None:
+        """
+        Create the files read by the job, if they do not exist yet, before it runs.
+
+        This only runs fio's setup phase, so that creating files is neither measured nor monitored.
+        Files are kept in the bucket, and reused by later runs.
+        """
         fio_job_name = self.cfg.benchmarks.fio.fio_benchmark
-        fio_job_filepath = hydra.utils.to_absolute_path(f"fio/{fio_job_name}.fio")
-        self.fio_output_filepath = f"fio.{fio_job_name}.json"
+        layout_job_name = LAYOUT_JOBS.get(fio_job_name, fio_job_name)
+        if layout_job_name is None:
+            return
 
+        log.info(f"Laying out files for {fio_job_name} with job {layout_job_name}")
         subprocess_args = [
             FIO_BINARY,
             "--eta=never",
-            "--output-format=json",
-            f"--output={self.fio_output_filepath}",
-            f"--directory={self.mount_dir}",
-            fio_job_filepath,
+            "--create_only=1",
+            f"--directory={self.fio_directory}",
+            hydra.utils.to_absolute_path(f"fio/{layout_job_name}.fio"),
         ]
+        # Like the job itself, with the environment of the harness, so that fio is found on its PATH
+        command = Command(args=subprocess_args, env=self._fio_env())
+        subprocess.run(command.args, env=command.env, check=True, capture_output=True)
 
+    def _fio_env(self) -> Dict[str, str]:
         fio_env = {}
         fio_env["APP_WORKERS"] = str(self.cfg.application_workers)
         fio_env["SIZE_GIB"] = str(self.cfg.object_size_in_gib)
@@ -68,21 +233,103 @@ class FioBenchmark(BaseBenchmark):
         fio_env["IO_ENGINE"] = self.cfg.benchmarks.fio.fio_io_engine
         fio_env["RUN_TIME"] = str(self.cfg.run_time)
         fio_env["BLOCK_SIZE"] = str(self.cfg.read_size)
+        fio_env["PERCENTAGE_RANDOM"] = str(self.cfg.benchmarks.fio.percentage_random)
+
+        # The small file tree is split evenly between jobs, each reading its files in blocks of at most the file size
+        small_file_count = self.cfg.benchmarks.fio.small_file_count
+        small_file_size = self.cfg.benchmarks.fio.small_file_size
+        files_per_job = math.ceil(small_file_count / self.cfg.application_workers)
+        fio_env["SMALL_FILE_COUNT"] = str(small_file_count)
+        fio_env["SMALL_FILE_SIZE"] = str(small_file_size)
+        fio_env["FILES_PER_JOB"] = str(files_per_job)
+        fio_env["SMALL_FILE_JOB_BYTES"] = str(files_per_job * small_file_size)
+        fio_env["SMALL_FILE_BLOCK_SIZE"] = str(min(self.cfg.read_size, small_file_size))
+        return fio_env
 
-        # Increase the read_ahead_kb limit to allow reads higher than 256K.
+    def get_command(self) -> Command:
+        # Increase the read_ahead_kb limit to allow reads higher than 256K, unless it is configured explicitly.
         # The script needs sudo permissions to overwrite this limit
-        if not self.cfg.benchmarks.fio.direct_io and self.cfg.read_size > 256 * 1024:
-            self._set_read_ahead(self.cfg.read_size)
+        if (read_ahead_kb := self.cfg.mountpoint.read_ahead_kb) is not None:
+            for mount_dir in self.mount_dirs:
+                self._set_read_ahead(mount_dir, read_ahead_kb * 1024)
+        elif not self.cfg.benchmarks.fio.direct_io and self.cfg.read_size > 256 * 1024:
+            for mount_dir in self.mount_dirs:
+                self._set_read_ahead(mount_dir, self.cfg.read_size)
+
+        command, self.fio_output_filepath = self._fio_command(".")
+        return command
+
+    def get_pass_command(self, pass_index: int) -> Optional[Command]:
+        """Run the job again against the same mounts for each warm pass, so that it reads from their caches."""
+        cache_cfg = self.cfg.mountpoint.cache
+        if pass_index > cache_cfg.warm_passes:
+            return None
+
+        if cache_cfg.drop_page_cache:
+            self._drop_page_cache()
+        command, output_filepath = self._fio_command(pass_output_dir(pass_index))
+        self.pass_output_filepaths.append(output_filepath)
+        return command
+
+    def _drop_page_cache(self) -> None:
+        """Drop the kernel page cache, so that a warm pass reads from Mountpoint's caches rather than the kernel's."""
+        subprocess.run(
+            ["sudo", "sh", "-c", "sync && echo 3 > /proc/sys/vm/drop_caches"], check=True, capture_output=True
+        )
+        log.info("Dropped the page cache")
+
+    def _fio_command(self, output_dir: str) -> Tuple[Command, str]:
+        """The fio command of one pass of the job, writing its output and logs to the given directory."""
+        fio_job_name = self.cfg.benchmarks.fio.fio_benchmark
+        fio_job_filepath = hydra.utils.to_absolute_path(f"fio/{fio_job_name}.fio")
+        fio_output_filepath = os.path.join(output_dir, f"fio.{fio_job_name}.json")
+
+        subprocess_args = [
+            FIO_BINARY,
+            "--eta=never",
+            "--output-format=json",
+            f"--output={fio_output_filepath}",
+            f"--directory={self.fio_directory}",
+        ]
+
+        # Per-interval bandwidth and latency logs, for throughput and latency over time
+        log_avg_msec = self.cfg.benchmarks.fio.log_avg_msec
+        if log_avg_msec is None and len(self.mount_dirs) > 1:
+            log_avg_msec = MOUNT_LOG_AVG_MSEC
+        if log_avg_msec is not None:
+            log_prefix = os.path.join(output_dir, FIO_LOG_PREFIX)
+            subprocess_args += [
+                f"--write_bw_log={log_prefix}",
+                f"--write_lat_log={log_prefix}",
+                f"--log_avg_msec={log_avg_msec}",
+            ]
+
+        subprocess_args.append(fio_job_filepath)
+
+        fio_env = self._fio_env()
 
         log.info("FIO command prepared with args: %s; env: %s", subprocess_args, fio_env)
 
-        return Command(args=subprocess_args, env=fio_env)
+        return Command(args=subprocess_args, env=fio_env), os.path.normpath(fio_output_filepath)
 
     def post_process(self, result: CommandResult) -> Dict[str, Any]:
-        cleanup_mp(self.mount_dir)
+        try:
+            cleanup_mounts(self.mount_dirs)
+        finally:
+            self._remove_cache_dirs()
         if result.returncode != 0:
             log.error(f"FIO process failed with exit code {result.returncode}")
             raise subprocess.CalledProcessError(result.returncode, ["fio"])
 
         self.metadata["fio_output_file"] = self.fio_output_filepath
+        if self.pass_output_filepaths:
+            self.metadata["passes"] = [
+                {"pass": pass_index, "fio_output_file": path, "throughput_gbps": fio_throughput_gbps(path)}
+                for pass_index, path in enumerate([self.fio_output_filepath, *self.pass_output_filepaths])
+            ]
+        if "mounts" in self.metadata:
+            for mount, throughput in zip(self.metadata["mounts"], self._mount_throughputs_gbps()):
+                mount["throughput_gbps"] = throughput
+
+        self._parse_log_metrics()
         return self.metadata
@@ -0,0 +1,500 @@
+"""
+Local stand-in for S3, to run benchmarks without network access or S3 noise.
+
+It implements the subset of the S3 API used by Mountpoint and the benchmark clients:
+GetObject (with ranges), HeadObject, ListObjectsV2, PutObject, CopyObject, DeleteObject and multipart uploads.
+Object content is synthetic and deterministic, derived from the key and offset,
+so objects of any size can be served without storing them. Uploaded data is discarded, only its size is kept.
+
+Run it standalone with `python -m benchmarks.local_s3 --object key=size ...`,
+or let `benchmark.py` start it with `local_s3.enabled=true`.
+"""
+
+import argparse
+import bisect
+import hashlib
+import logging
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterator, List, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+from xml.sax.saxutils import escape
+
+log = logging.getLogger(__name__)
+
+# Size of the pseudo-random block which object content repeats, offset by a per-key shift
+PATTERN_SIZE = 1024 * 1024
+_PATTERN = random.Random(0).randbytes(PATTERN_SIZE)
+_PATTERN_TWICE = _PATTERN + _PATTERN
+
+# Objects do not change over time, so report a fixed modification time
+LAST_MODIFIED_HTTP = "Thu, 01 Jan 2026 00:00:00 GMT"
+LAST_MODIFIED_ISO = "2026-01-01T00:00:00.000Z"
+
+S3_XML_NAMESPACE = "http://s3.amazonaws.com/doc/2006-03-01/"
+
+# The stand-in does not check signatures, but clients need some credentials to sign requests with
+CREDENTIALS_ENV = {
+    "AWS_ACCESS_KEY_ID": "local-s3-access-key",
+    "AWS_SECRET_ACCESS_KEY": "local-s3-secret-key",
+}
+
+MAX_KEYS = 1000
+
+
+def _shift(key: str) -> int:
+    return int.from_bytes(hashlib.sha256(key.encode()).digest()[:8], "little") % PATTERN_SIZE
+
+
+def object_content(key: str, offset: int, length: int, chunk_size: int = PATTERN_SIZE) -> Iterator[bytes]:
+    """Content of `length` bytes of the object `key` starting at `offset`, the same for every request.
+
+    The content is generated in chunks of at most `chunk_size` bytes, so that large objects are never held in memory.
+    """
+    position = (offset + _shift(key)) % PATTERN_SIZE
+    while length > 0:
+        chunk_length = min(length, chunk_size, PATTERN_SIZE)
+        yield _PATTERN_TWICE[position : position + chunk_length]
+        position = (position + chunk_length) % PATTERN_SIZE
+        length -= chunk_length
+
+
+def object_etag(key: str, size: int) -> str:
+    return '"' + hashlib.sha256(f"{key}:{size}".encode()).hexdigest()[:32] + '"'
+
+
+def parse_range(range_header: str, size: int) -> Optional[Tuple[int, int]]:
+    """Parse a single `bytes=` range into an inclusive (first, last) byte range, or None if it is not satisfiable."""
+    unit, _, spec = range_header.partition("=")
+    if unit.strip() != "bytes" or "," in spec:
+        return None
+    first, _, last = spec.strip().partition("-")
+    if not first:
+        # Suffix range, the last bytes of the object
+        length = int(last)
+        if length == 0 or size == 0:
+            return None
+        return max(0, size - length), size - 1
+    first = int(first)
+    last = int(last) if last else size - 1
+    if first >= size or last < first:
+        return None
+    return first, min(last, size - 1)
+
+
+class Throttle:
+    """Limits the total bandwidth of all responses, like a shared network link."""
+
+    def __init__(self, bandwidth_gbps: Optional[float]):
+        self.bytes_per_second = bandwidth_gbps * 1_000_000_000 / 8 if bandwidth_gbps else None
+        self.lock = threading.Lock()
+        self.next_free = time.monotonic()
+
+    def wait(self, length: int) -> None:
+        if self.bytes_per_second is None:
+            return
+        with self.lock:
+            now = time.monotonic()
+            self.next_free = max(self.next_free, now) + length / self.bytes_per_second
+            delay = self.next_free - now
+        time.sleep(delay)
+
+
+class ObjectStore:
+    """Object sizes by key, sorted for listing when the set of keys changed since the last listing."""
+
+    def __init__(self, objects: Optional[Dict[str, int]] = None):
+        self.lock = threading.Lock()
+        self.sizes: Dict[str, int] = dict(objects or {})
+        self.sorted_keys: Optional[List[str]] = None
+
+    def put(self, key: str, size: int) -> None:
+        with self.lock:
+            if key not in self.sizes:
+                self.sorted_keys = None
+            self.sizes[key] = size
+
+    def get(self, key: str) -> Optional[int]:
+        with self.lock:
+            return self.sizes.get(key)
+
+    def delete(self, key: str) -> None:
+        with self.lock:
+            if self.sizes.pop(key, None) is not None:
+                self.sorted_keys = None
+
+    def list(
+        self, prefix: str, delimiter: str, max_keys: int, start: Optional[str], start_after: Optional[str]
+    ) -> Tuple[List[Tuple[str, int]], List[str], Optional[str]]:
+        """
+        List keys like ListObjectsV2, starting at the key `start` (from a continuation token) or after `start_after`.
+
+        Returns:
+            The objects and common prefixes of this page, and the key to continue from if the listing is truncated
+        """
+        with self.lock:
+            if self.sorted_keys is None:
+                self.sorted_keys = sorted(self.sizes)
+            keys = self.sorted_keys
+            if start is not None:
+                i = bisect.bisect_left(keys, start)
+            elif start_after is not None:
+                i = bisect.bisect_right(keys, max(start_after, prefix))
+            else:
+                i = bisect.bisect_left(keys, prefix)
+
+            contents = []
+            common_prefixes = []
+            while i < len(keys) and keys[i].startswith(prefix) and len(contents) + len(common_prefixes) < max_keys:
+                key = keys[i]
+                delimiter_index = key.find(delimiter, len(prefix)) if delimiter else -1
+                if delimiter_index >= 0:
+                    common_prefix = key[: delimiter_index + len(delimiter)]
+                    common_prefixes.append(common_prefix)
+                    # Skip all other keys with the same common prefix
+                    i = bisect.bisect_left(keys, common_prefix + "\U0010ffff")
+                else:
+                    contents.append((key, self.sizes[key]))
+                    i += 1
+
+            truncated = i < len(keys) and keys[i].startswith(prefix)
+            return contents, common_prefixes, keys[i] if truncated else None
+
+
+class MultipartUploads:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.uploads: Dict[str, Dict[int, int]] = {}
+
+    def create(self) -> str:
+        upload_id = uuid.uuid4().hex
+        with self.lock:
+            self.uploads[upload_id] = {}
+        return upload_id
+
+    def upload_part(self, upload_id: str, part_number: int, size: int) -> bool:
+        with self.lock:
+            parts = self.uploads.get(upload_id)
+            if parts is None:
+                return False
+            parts[part_number] = size
+            return True
+
+    def complete(self, upload_id: str) -> Optional[int]:
+        """Complete the upload and return the size of the object, or None if the upload does not exist."""
+        with self.lock:
+            parts = self.uploads.pop(upload_id, None)
+        return sum(parts.values()) if parts is not None else None
+
+    def abort(self, upload_id: str) -> None:
+        with self.lock:
+            self.uploads.pop(upload_id, None)
+
+
+class LocalS3Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(
+        self,
+        address: Tuple[str, int],
+        objects: Optional[Dict[str, int]] = None,
+        latency_ms: float = 0,
+        bandwidth_gbps: Optional[float] = None,
+    ):
+        """
+        address: Host and port to listen on, port 0 picks a free port
+        objects: Initial object sizes by key, in every bucket
+        latency_ms: Delay added before responding to each request
+        bandwidth_gbps: Limit of the total bandwidth of all responses, unlimited if None
+        """
+        super().__init__(address, LocalS3RequestHandler)
+        self.store = ObjectStore(objects)
+        self.uploads = MultipartUploads()
+        self.latency_secs = latency_ms / 1000
+        self.throttle = Throttle(bandwidth_gbps)
+
+    @property
+    def endpoint_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+class LocalS3RequestHandler(BaseHTTPRequestHandler):
+    # Keep connections alive, as the CRT pools and reuses them
+    protocol_version = "HTTP/1.1"
+    server: LocalS3Server
+
+    # Write responses in chunks, so that the bandwidth limit is shared fairly between connections
+    WRITE_CHUNK_SIZE = 256 * 1024
+
+    def log_message(self, format, *args):
+        log.debug(format, *args)
+
+    def _parse_request(self) -> Tuple[str, Dict[str, str]]:
+        """Return the object key, which is empty for bucket requests, and the query parameters.
+
+        Only path style requests are supported, which clients use for endpoints given by IP address.
+        The bucket name is ignored, all buckets have the same objects.
+        """
+        url = urlsplit(self.path)
+        query = {name: values[0] for name, values in parse_qs(url.query, keep_blank_values=True).items()}
+        _, _, key = unquote(url.path).lstrip("/").partition("/")
+        return key, query
+
+    def _read_body_size(self) -> int:
+        """Read and discard the request body, returning the size of the uploaded data."""
+        body_size = 0
+        if self.headers.get("Transfer-Encoding", "").lower() == "chunked":
+            while True:
+                chunk_size = int(self.rfile.readline().split(b";")[0].strip(), 16)
+                if chunk_size == 0:
+                    # Skip trailers until the empty line
+                    while self.rfile.readline().strip():
+                        pass
+                    break
+                self._discard(chunk_size)
+                self.rfile.readline()
+                body_size += chunk_size
+        else:
+            body_size = int(self.headers.get("Content-Length", 0))
+            self._discard(body_size)
+        # With aws-chunked content encoding, the body includes chunk signatures and checksum trailers
+        return int(self.headers.get("x-amz-decoded-content-length", body_size))
+
+    def _discard(self, length: int) -> None:
+        while length > 0:
+            data = self.rfile.read(min(length, self.WRITE_CHUNK_SIZE))
+            if not data:
+                break
+            length -= len(data)
+
+    def _send(self, status: int, headers: Dict[str, str], body: bytes = b"", content_length: Optional[int] = None):
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body) if content_length is None else content_length))
+        self.end_headers()
+        if body:
+            self.wfile.write(body)
+
+    def _send_object(self, status: int, headers: Dict[str, str], key: str, offset: int, length: int) -> None:
+        self._send(status, headers, content_length=length)
+        for chunk in object_content(key, offset, length, chunk_size=self.WRITE_CHUNK_SIZE):
+            self.server.throttle.wait(len(chunk))
+            self.wfile.write(chunk)
+
+    def _send_xml(self, status: int, body: str) -> None:
+        xml = '<?xml version="1.0" encoding="UTF-8"?>\n' + body
+        self._send(status, {"Content-Type": "application/xml"}, xml.encode())
+
+    def _send_error(self, status: int, code: str, message: str) -> None:
+        if self.command == "HEAD":
+            self._send(status, {})
+        else:
+            self._send_xml(status, f"<Error><Code>{code}</Code><Message>{escape(message)}</Message></Error>")
+
+    def _delay(self) -> None:
+        if self.server.latency_secs:
+            time.sleep(self.server.latency_secs)
+
+    def do_HEAD(self):
+        self._delay()
+        key, _ = self._parse_request()
+        if not key:
+            # HeadBucket
+            self._send(200, {})
+            return
+        size = self.server.store.get(key)
+        if size is None:
+            self._send_error(404, "NoSuchKey", "The specified key does not exist.")
+            return
+        self._send(200, self._object_headers(key, size), content_length=size)
+
+    def do_GET(self):
+        self._delay()
+        key, query = self._parse_request()
+        if not key:
+            self._list_objects(query)
+            return
+
+        size = self.server.store.get(key)
+        if size is None:
+            self._send_error(404, "NoSuchKey", "The specified key does not exist.")
+            return
+
+        headers = self._object_headers(key, size)
+        if (range_header := self.headers.get("Range")) is not None:
+            byte_range = parse_range(range_header, size)
+            if byte_range is None:
+                self._send_error(416, "InvalidRange", "The requested range is not satisfiable")
+                return
+            first, last = byte_range
+            headers["Content-Range"] = f"bytes {first}-{last}/{size}"
+            self._send_object(206, headers, key, first, last - first + 1)
+        else:
+            self._send_object(200, headers, key, 0, size)
+
+    def do_PUT(self):
+        self._delay()
+        key, query = self._parse_request()
+        size = self._read_body_size()
+
+        if "uploadId" in query:
+            if not self.server.uploads.upload_part(query["uploadId"], int(query["partNumber"]), size):
+                self._send_error(404, "NoSuchUpload", "The specified upload does not exist.")
+                return
+            self._send(200, {"ETag": object_etag(f"{key}#{query['partNumber']}", size)})
+            return
+
+        if (copy_source := self.headers.get("x-amz-copy-source")) is not None:
+            _, _, source_key = unquote(copy_source).lstrip("/").partition("/")
+            source_size = self.server.store.get(source_key)
+            if source_size is None:
+                self._send_error(404, "NoSuchKey", "The specified key does not exist.")
+                return
+            self.server.store.put(key, source_size)
+            self._send_xml(
+                200,
+                f'<CopyObjectResult xmlns="{S3_XML_NAMESPACE}"><LastModified>{LAST_MODIFIED_ISO}</LastModified>'
+                f"<ETag>{escape(object_etag(key, source_size))}</ETag></CopyObjectResult>",
+            )
+            return
+
+        self.server.store.put(key, size)
+        self._send(200, {"ETag": object_etag(key, size)})
+
+    def do_POST(self):
+        self._delay()
+        key, query = self._parse_request()
+        self._read_body_size()
+
+        if "uploads" in query:
+            upload_id = self.server.uploads.create()
+            self._send_xml(
+                200,
+                f'<InitiateMultipartUploadResult xmlns="{S3_XML_NAMESPACE}"><Bucket>bucket</Bucket>'
+                f"<Key>{escape(key)}</Key><UploadId>{upload_id}</UploadId></InitiateMultipartUploadResult>",
+            )
+        elif "uploadId" in query:
+            size = self.server.uploads.complete(query["uploadId"])
+            if size is None:
+                self._send_error(404, "NoSuchUpload", "The specified upload does not exist.")
+                return
+            self.server.store.put(key, size)
+            self._send_xml(
+                200,
+                f'<CompleteMultipartUploadResult xmlns="{S3_XML_NAMESPACE}"><Key>{escape(key)}</Key>'
+                f"<ETag>{escape(object_etag(key, size))}</ETag></CompleteMultipartUploadResult>",
+            )
+        else:
+            self._send_error(501, "NotImplemented", "The stand-in does not implement this operation.")
+
+    def do_DELETE(self):
+        self._delay()
+        key, query = self._parse_request()
+        if "uploadId" in query:
+            self.server.uploads.abort(query["uploadId"])
+        else:
+            self.server.store.delete(key)
+        self._send(204, {})
+
+    def _object_headers(self, key: str, size: int) -> Dict[str, str]:
+        return {
+            "Content-Type": "binary/octet-stream",
+            "ETag": object_etag(key, size),
+            "Last-Modified": LAST_MODIFIED_HTTP,
+            "Accept-Ranges": "bytes",
+        }
+
+    def _list_objects(self, query: Dict[str, str]) -> None:
+        prefix = query.get("prefix", "")
+        delimiter = query.get("delimiter", "")
+        max_keys = min(int(query.get("max-keys", MAX_KEYS)), MAX_KEYS)
+        contents, common_prefixes, next_key = self.server.store.list(
+            prefix, delimiter, max_keys, query.get("continuation-token"), query.get("start-after")
+        )
+
+        parts = [
+            f'<ListBucketResult xmlns="{S3_XML_NAMESPACE}">',
+            f"<Name>bucket</Name><Prefix>{escape(prefix)}</Prefix><Delimiter>{escape(delimiter)}</Delimiter>",
+            f"<MaxKeys>{max_keys}</MaxKeys><KeyCount>{len(contents) + len(common_prefixes)}</KeyCount>",
+            f"<IsTruncated>{'true' if next_key is not None else 'false'}</IsTruncated>",
+        ]
+        if next_key is not None:
+            parts.append(f"<NextContinuationToken>{escape(next_key)}</NextContinuationToken>")
+        for key, size in contents:
+            parts.append(
+                f"<Contents><Key>{escape(key)}</Key><LastModified>{LAST_MODIFIED_ISO}</LastModified>"
+                f"<ETag>{escape(object_etag(key, size))}</ETag><Size>{size}</Size>"
+                "<StorageClass>STANDARD</StorageClass></Contents>"
+            )
+        for common_prefix in common_prefixes:
+            parts.append(f"<CommonPrefixes><Prefix>{escape(common_prefix)}</Prefix></CommonPrefixes>")
+        parts.append("</ListBucketResult>")
+        self._send_xml(200, "".join(parts))
+
+
+class LocalS3Process:
+    """Runs the stand-in in a separate process, so that it does not compete with the harness for the GIL."""
+
+    def __init__(self, objects: Dict[str, int], latency_ms: float = 0, bandwidth_gbps: Optional[float] = None):
+        self.objects = objects
+        self.latency_ms = latency_ms
+        self.bandwidth_gbps = bandwidth_gbps
+        self.process: Optional[subprocess.Popen] = None
+        self.endpoint_url: Optional[str] = None
+
+    def start(self) -> str:
+        """Start the stand-in and return its endpoint URL."""
+        args = [sys.executable, "-m", "benchmarks.local_s3", "--latency-ms", str(self.latency_ms)]
+        if self.bandwidth_gbps is not None:
+            args.extend(["--bandwidth-gbps", str(self.bandwidth_gbps)])
+        for key, size in self.objects.items():
+            args.extend(["--object", f"{key}={size}"])
+
+        log.info(f"Starting local S3 stand-in with {len(self.objects)} objects")
+        self.process = subprocess.Popen(
+            args, stdout=subprocess.PIPE, text=True, cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        )
+        # The stand-in prints its endpoint once it is listening
+        self.endpoint_url = self.process.stdout.readline().strip()
+        if not self.endpoint_url:
+            self.stop()
+            raise RuntimeError("Local S3 stand-in failed to start")
+        log.info(f"Local S3 stand-in listening at {self.endpoint_url}")
+        return self.endpoint_url
+
+    def stop(self) -> None:
+        if self.process is not None:
+            self.process.terminate()
+            self.process.wait()
+            self.process = None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Local stand-in for S3, serving synthetic object content")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=0, help="Port to listen on, a free port by default")
+    parser.add_argument("--latency-ms", type=float, default=0, help="Delay added before responding to each request")
+    parser.add_argument("--bandwidth-gbps", type=float, help="Limit of the total bandwidth of all responses")
+    parser.add_argument("--object", action="append", default=[], help="Initial object, as key=size in bytes")
+    args = parser.parse_args()
+
+    objects = {}
+    for spec in args.object:
+        key, _, size = spec.rpartition("=")
+        objects[key] = int(size)
+
+    server = LocalS3Server((args.host, args.port), objects, args.latency_ms, args.bandwidth_gbps)
+    print(server.endpoint_url, flush=True)
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
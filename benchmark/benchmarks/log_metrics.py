@@ -0,0 +1,144 @@
+"""
+Parser of the metrics Mountpoint logs with `--log-metrics`.
+
+Every few seconds, `MetricsSink::publish` logs one line per metric which changed, for example:
+
+    2026-01-01T00:00:05.000123Z  INFO mountpoint_s3_fs::metrics: s3.requests[op=get_object,type=Default]: 42 (n=42)
+    2026-01-01T00:00:05.000125Z  INFO mountpoint_s3_fs::metrics: fuse.op_latency(us)[op=read]: n=10: min=3 ... max=95
+
+Lines of each publication are collected into one row of a columnar time series, with one column per counter or gauge
+(named after the metric and its labels) and one column per statistic of each histogram (e.g. `<name>.p99`).
+Logs are read line by line, so that large debug logs are never held in memory, only the rows of metrics are.
+"""
+
+import logging
+import os
+import re
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from monitoring.memory import summarize
+from monitoring.series import MetricsSeries
+
+log = logging.getLogger(__name__)
+
+METRICS_TARGET = "mountpoint_s3_fs::metrics"
+
+LOG_METRICS_SERIES_FILE = "log_metrics.npy"
+LOG_METRICS_SUMMARY_FILE = "log_metrics.json"
+
+# Lines logged by one publication are at most this far apart
+PUBLISH_WINDOW_SECS = 1.0
+
+METRIC_LINE_PATTERN = re.compile(
+    r"^(?P<timestamp>\S+)\s+INFO\s.*?" + re.escape(METRICS_TARGET) + r": "
+    r"(?P<name>[\w.]+)(?:\([^)]*\))?(?P<labels>\[[^\]]*\])?: (?P<value>.*)$"
+)
+COUNTER_PATTERN = re.compile(r"^(-?\d+(?:\.\d+)?)(?: \(n=(\d+)\))?$")
+HISTOGRAM_PATTERN = re.compile(r"^n=(\d+): (.*)$")
+
+# Gauge of the bytes reserved in each `BufferArea` of Mountpoint's `MemoryLimiter`
+RESERVATION_COLUMN_PREFIX = "mem.bytes_reserved[area="
+
+
+def read_log_lines(paths: Iterable[str]) -> Iterator[str]:
+    """Lines of the given log files in turn, without reading any file fully into memory."""
+    for path in paths:
+        with open(path, "r", errors="replace") as f:
+            yield from f
+
+
+def parse_metric_line(line: str) -> Optional[Tuple[float, Dict[str, float]]]:
+    """
+    Parse a metric line into its timestamp in seconds since the epoch, and its values by column name.
+
+    Returns None for other lines.
+    """
+    match = METRIC_LINE_PATTERN.match(line.rstrip("\n"))
+    if match is None:
+        return None
+
+    try:
+        timestamp = datetime.fromisoformat(match.group("timestamp")).timestamp()
+    except ValueError:
+        return None
+    key = match.group("name") + (match.group("labels") or "")
+    value = match.group("value")
+
+    if counter := COUNTER_PATTERN.match(value):
+        return timestamp, {key: float(counter.group(1))}
+    if histogram := HISTOGRAM_PATTERN.match(value):
+        values = {f"{key}.n": float(histogram.group(1))}
+        for statistic in histogram.group(2).split():
+            name, _, statistic_value = statistic.partition("=")
+            values[f"{key}.{name}"] = float(statistic_value)
+        return timestamp, values
+    return None
+
+
+class LogMetricsSeries(MetricsSeries):
+    """Columnar time series of the metrics of one Mountpoint process, built one log line at a time.
+
+    Counters are reset at each publication, so their sum is the total over the run,
+    while gauges are only logged when they change.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.start: Optional[float] = None
+        self.row_start: Optional[float] = None
+
+    def add_line(self, line: str) -> None:
+        # Cheap check first, most lines of debug logs are not metrics
+        if METRICS_TARGET not in line:
+            return
+        parsed = parse_metric_line(line)
+        if parsed is None:
+            return
+
+        timestamp, values = parsed
+        if self.start is None:
+            self.start = timestamp
+        if self.row_start is None or timestamp - self.row_start > PUBLISH_WINDOW_SECS:
+            self.row_start = timestamp
+            self.add_row(timestamp - self.start, values)
+        else:
+            self.rows[-1].update(values)
+            for column in values:
+                self.columns.setdefault(column)
+
+    def add_lines(self, lines: Iterable[str]) -> "LogMetricsSeries":
+        for line in lines:
+            self.add_line(line)
+        return self
+
+    def write(self, output_dir: str = ".") -> Dict[str, Dict[str, float]]:
+        """Write the time series to `log_metrics.npy`, and the summary to `log_metrics.json`, returning it."""
+        return super().write(
+            os.path.join(output_dir, LOG_METRICS_SERIES_FILE), os.path.join(output_dir, LOG_METRICS_SUMMARY_FILE)
+        )
+
+
+def memory_reservations(series: LogMetricsSeries) -> Dict[str, Dict[str, float]]:
+    """
+    Peak, 99th percentile and steady-state reservations of the memory limiter per buffer area, and of their total.
+
+    Gauges are only logged when they change, so the total is the sum of the last value of each area,
+    in every row where one of them was logged.
+    """
+    areas = {
+        column[len(RESERVATION_COLUMN_PREFIX) : -1]: column
+        for column in series.columns
+        if column.startswith(RESERVATION_COLUMN_PREFIX)
+    }
+    values: Dict[str, List[float]] = {area: [] for area in areas}
+    values["total"] = []
+    latest: Dict[str, float] = {}
+    for row in series.rows:
+        logged = [area for area, column in areas.items() if column in row]
+        for area in logged:
+            latest[area] = row[areas[area]]
+            values[area].append(latest[area])
+        if logged:
+            values["total"].append(sum(latest.values()))
+    return {area: summary for area, area_values in values.items() if (summary := summarize(area_values)) is not None}
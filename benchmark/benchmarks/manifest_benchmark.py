@@ -0,0 +1,92 @@
+import logging
+import os
+import shutil
+import subprocess
+import tempfile
+from typing import Dict, Any, List
+
+from benchmarks.base_benchmark import BaseBenchmark
+from benchmarks.command import Command, CommandResult
+from benchmarks.cargo_helper import BuildTarget, build_example
+from omegaconf import DictConfig
+
+log = logging.getLogger(__name__)
+
+MANIFEST_OUTPUT_FILE = "manifest-output.json"
+
+# Features of `manifest_benchmark`, qualified with its package as cargo runs in the workspace
+MANIFEST_BENCHMARK_FEATURES = ("mountpoint-s3-fs/manifest",)
+
+
+class ManifestBenchmark(BaseBenchmark):
+    """
+    Runs the `manifest_benchmark` example, which ingests synthetic CSV manifests into a metadata store.
+
+    The manifests, of `objects` objects per channel in a tree of directories `fanout` wide and `depth` deep, are
+    generated before the ingestion is timed. Neither S3 nor FUSE are involved.
+    """
+
+    def __init__(self, cfg: DictConfig, metadata: Dict[str, Any]):
+        self.cfg = cfg
+        self.metadata = metadata
+        self.work_dir = None
+
+    @staticmethod
+    def build_targets(cfg: DictConfig) -> List[BuildTarget]:
+        return [
+            BuildTarget(
+                example_name="manifest_benchmark",
+                features=MANIFEST_BENCHMARK_FEATURES,
+                with_flamegraph=cfg.monitoring.with_flamegraph,
+            )
+        ]
+
+    def setup(self, with_flamegraph: bool = False) -> Dict[str, Any]:
+        log.info("Compiling manifest_benchmark example...")
+        self.executable_path = build_example(
+            "manifest_benchmark", features=list(MANIFEST_BENCHMARK_FEATURES), with_flamegraph=with_flamegraph
+        )
+        log.info(f"Manifest benchmark executable ready at: {self.executable_path}")
+
+        # Manifests of many objects take a lot of space, so they can be written to another disk
+        work_dir = self.cfg.benchmarks.manifest.work_dir
+        if work_dir is not None:
+            os.makedirs(work_dir, exist_ok=True)
+        self.work_dir = tempfile.mkdtemp(prefix="mountpoint-manifest-", dir=work_dir)
+        return self.metadata
+
+    def get_command(self) -> Command:
+        manifest_cfg = self.cfg.benchmarks.manifest
+        subprocess_args = [
+            self.executable_path,
+            "--objects",
+            str(manifest_cfg.objects),
+            "--depth",
+            str(manifest_cfg.depth),
+            "--fanout",
+            str(manifest_cfg.fanout),
+            "--channels",
+            str(manifest_cfg.channels),
+            "--lookups",
+            str(manifest_cfg.lookups),
+            "--work-dir",
+            self.work_dir,
+            "--output-file",
+            MANIFEST_OUTPUT_FILE,
+        ]
+        log.info("Manifest benchmark command prepared with args: %s", subprocess_args)
+        return Command(args=subprocess_args)
+
+    def post_process(self, result: CommandResult) -> Dict[str, Any]:
+        if self.work_dir is not None:
+            shutil.rmtree(self.work_dir, ignore_errors=True)
+
+        if result.returncode != 0:
+            log.error(f"Manifest benchmark failed with exit code {result.returncode}")
+            if result.stderr:
+                log.error(f"Error output: {result.stderr}")
+            raise subprocess.CalledProcessError(result.returncode, ["manifest_benchmark"])
+
+        log.info("Manifest benchmark completed successfully.")
+        self.metadata["manifest_output_file"] = MANIFEST_OUTPUT_FILE
+        return self.metadata
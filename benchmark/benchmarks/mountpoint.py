@@ -1,11 +1,15 @@
 import logging
 import os
 import subprocess
-from typing import Dict, Any
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Tuple
 
 from omegaconf import DictConfig
 
-from benchmarks.cargo_helper import build_binary
+from benchmarks.cargo_helper import BuildTarget
+from benchmarks.config_utils import s3_endpoint_env
+from benchmarks.placement import placement_prefix
 
 logging.basicConfig(level=os.environ.get('LOGLEVEL', 'INFO').upper())
 log = logging.getLogger(__name__)
@@ -14,6 +18,11 @@ MOUNT_DIRECTORY = "s3"
 MP_LOGS_DIRECTORY = "mp_logs/"
 
 
+def mount_output_dir(mount_index: int) -> str:
+    """Directory of the logs and profiles of one of several mounts, relative to the job's output directory."""
+    return f"mount-{mount_index}"
+
+
 def cleanup_mp(mount_dir):
     if mount_dir is not None:
         log.info(f"Cleaning up {mount_dir}")
@@ -22,37 +31,103 @@ def cleanup_mp(mount_dir):
         os.remove(f"{mount_dir}.pid")
 
 
-def mount_mp(cfg: DictConfig, mount_dir: str, with_flamegraph: bool = False) -> Dict[str, Any]:
+def cleanup_mounts(mount_dirs: List[str]) -> None:
+    """
+    Unmount all the given mounts in parallel.
+
+    Every mount is cleaned up even if others fail, then the first failure is raised.
+    """
+    if not mount_dirs:
+        return
+
+    with ThreadPoolExecutor(max_workers=len(mount_dirs)) as executor:
+        futures = [executor.submit(cleanup_mp, mount_dir) for mount_dir in mount_dirs]
+    errors = []
+    for mount_dir, future in zip(mount_dirs, futures):
+        if (error := future.exception()) is not None:
+            log.error(f"Failed to clean up {mount_dir}: {error}")
+            errors.append(error)
+    if errors:
+        raise errors[0]
+
+
+def mountpoint_build_target(cfg: DictConfig, with_flamegraph: bool = False) -> Optional[BuildTarget]:
+    """
+    Return the Mountpoint binary to compile for the given configuration,
+    or None if a prebuilt `mountpoint_binary` is configured.
+    """
+    if cfg.mountpoint.mountpoint_binary is not None:
+        return None
+
+    stub_mode = cfg.mountpoint.stub_mode
+    features = ("mock", "mem_limiter")
+    if cfg.mountpoint.cache.block_size_kib is not None:
+        features += ("block_size",)
+    build_env = ()
+
+    if stub_mode == "s3_client":
+        binary_name = "mock-mount-s3"
+    elif stub_mode == "fs_handler":
+        binary_name = "mount-s3"
+        build_env = (("MOUNTPOINT_BUILD_STUB_FS_HANDLER", "1"),)
+    else:
+        binary_name = "mount-s3"
+
+    return BuildTarget(binary_name=binary_name, features=features, build_env=build_env, with_flamegraph=with_flamegraph)
+
+
+def mount_mp(
+    cfg: DictConfig, mount_dir: str, with_flamegraph: bool = False, mount_index: Optional[int] = None
+) -> Dict[str, Any]:
     """
     Mount an S3 bucket using Mountpoint,
     using the configuration to apply Mountpoint arguments.
+
+    With `mount_index`, this is one of several mounts: it gets its own prefix below the configured one,
+    and writes its logs to `mount-<index>/mp_logs/`.
+    """
+    subprocess_args, subprocess_env, mount_metadata = mount_mp_command(cfg, mount_dir, with_flamegraph, mount_index)
+    log.info("Mounting S3 bucket %s with args: %s", mount_metadata["bucket"], subprocess_args)
+    log.debug("Subprocess env: %s", subprocess_env)
+
+    output = subprocess.check_output(subprocess_args, env=subprocess_env)
+    mountpoint_pid = get_mount_s3_pid(subprocess_env["UNSTABLE_MOUNTPOINT_PID_FILE"])
+    log.info("Mountpoint pid: %d, output: %s", mountpoint_pid, output.decode("utf-8").strip())
+
+    return {**mount_metadata, "target_pid": mountpoint_pid}
+
+
+def mount_mp_command(
+    cfg: DictConfig, mount_dir: str, with_flamegraph: bool = False, mount_index: Optional[int] = None
+) -> Tuple[List[str], Dict[str, str], Dict[str, Any]]:
+    """
+    Return the command mounting the bucket with Mountpoint as configured, without running it:
+    its arguments, its full environment, and the metadata of the mount.
+
+    The Mountpoint binary is compiled first if needed.
     """
     bucket = cfg.s3_bucket
+    prefix = cfg.mountpoint.prefix
+    log_directory = MP_LOGS_DIRECTORY
+    if mount_index is not None:
+        prefix = f"{prefix or ''}{mount_output_dir(mount_index)}/"
+        log_directory = os.path.join(mount_output_dir(mount_index), MP_LOGS_DIRECTORY)
     stub_mode = cfg.mountpoint.stub_mode
 
-    if cfg.mountpoint.mountpoint_binary is None:
+    if (build_target := mountpoint_build_target(cfg, with_flamegraph)) is not None:
         # Compile the binary instead of using cargo run
-        features = ["mock", "mem_limiter"]
-        build_env = {}
-
         if stub_mode == "s3_client":
             # `mock-mount-s3` requires bucket to be prefixed with `sthree-` to verify we're not actually reaching S3
             logging.debug("using mock-mount-s3 due to `stub_mode`, bucket will be prefixed with \"sthree-\"")
             bucket = f"sthree-{bucket}"
-            binary_name = "mock-mount-s3"
-        elif stub_mode == "fs_handler":
-            binary_name = "mount-s3"
-            build_env["MOUNTPOINT_BUILD_STUB_FS_HANDLER"] = "1"
-        else:
-            binary_name = "mount-s3"
-
-        log.info(f"Compiling {binary_name} with features: {features}")
-        mountpoint_binary = build_binary(binary_name, features, build_env, with_flamegraph)
+
+        log.info(f"Compiling {build_target.binary_name} with features: {list(build_target.features)}")
+        mountpoint_binary = build_target.build()
         mountpoint_args = [mountpoint_binary]
     else:
         mountpoint_args = [cfg.mountpoint.mountpoint_binary]
 
-    os.makedirs(MP_LOGS_DIRECTORY, exist_ok=True)
+    os.makedirs(log_directory, exist_ok=True)
 
     mountpoint_version_output = subprocess.check_output([*mountpoint_args, "--version"]).decode("utf-8")
     log.info("Mountpoint version: %s", mountpoint_version_output.strip())
@@ -64,11 +139,14 @@ def mount_mp(cfg: DictConfig, mount_dir: str, with_flamegraph: bool = False) ->
         "--log-metrics",
         "--allow-overwrite",
         "--allow-delete",
-        f"--log-directory={MP_LOGS_DIRECTORY}",
+        f"--log-directory={log_directory}",
     ]
 
-    if cfg.mountpoint.prefix is not None:
-        subprocess_args.append(f"--prefix={cfg.mountpoint.prefix}")
+    if cfg.endpoint_url is not None:
+        subprocess_args.append(f"--endpoint-url={cfg.endpoint_url}")
+
+    if prefix is not None:
+        subprocess_args.append(f"--prefix={prefix}")
 
     if cfg.mountpoint.mountpoint_debug:
         subprocess_args.append("--debug")
@@ -104,7 +182,21 @@ def mount_mp(cfg: DictConfig, mount_dir: str, with_flamegraph: bool = False) ->
             )
         subprocess_args.append(f"--maximum-throughput-gbps={max_throughput}")
 
-    mp_env = {}
+    cache_cfg = cfg.mountpoint.cache
+    cache_dir = None
+    if cache_cfg.directory is not None:
+        # Each mount caches to a new directory, so that its first pass is cold
+        os.makedirs(cache_cfg.directory, exist_ok=True)
+        cache_dir = tempfile.mkdtemp(prefix="mountpoint-cache-", dir=cache_cfg.directory)
+        subprocess_args.append(f"--cache={cache_dir}")
+        if cache_cfg.max_size_mib is not None:
+            subprocess_args.append(f"--max-cache-size={cache_cfg.max_size_mib}")
+    if cache_cfg.xz_bucket is not None:
+        subprocess_args.append(f"--cache-xz={cache_cfg.xz_bucket}")
+    if cache_cfg.block_size_kib is not None:
+        subprocess_args.append(f"--cache-block-size={cache_cfg.block_size_kib}")
+
+    mp_env = s3_endpoint_env(cfg)
     if cfg.mountpoint.mountpoint_max_background is not None:
         mp_env["UNSTABLE_MOUNTPOINT_MAX_BACKGROUND"] = str(cfg.mountpoint.mountpoint_max_background)
 
@@ -119,7 +211,11 @@ def mount_mp(cfg: DictConfig, mount_dir: str, with_flamegraph: bool = False) ->
         mp_env["UNSTABLE_CRT_EVENTLOOP_THREADS"] = str(crt_eventloop_threads)
 
     if cfg.mountpoint.otlp_metrics and cfg.mountpoint.otlp_endpoint is not None:
-        subprocess_args.append(f"--otlp-endpoint={cfg.mountpoint.otlp_endpoint}")
+        otlp_endpoint = cfg.mountpoint.otlp_endpoint
+        if cfg.monitoring.with_otlp_receiver and mount_index is not None:
+            # The local receiver records the metrics exported to each path into the directory of the same name
+            otlp_endpoint = f"{otlp_endpoint}/{mount_output_dir(mount_index)}"
+        subprocess_args.append(f"--otlp-endpoint={otlp_endpoint}")
         if cfg.mountpoint.otlp_export_interval is not None:
             subprocess_args.append(f"--otlp-export-interval={cfg.mountpoint.otlp_export_interval}")
 
@@ -142,22 +238,23 @@ def mount_mp(cfg: DictConfig, mount_dir: str, with_flamegraph: bool = False) ->
         case _:
             raise ValueError(f"Unknown stub_mode: {stub_mode}")
 
-    log.info(f"Mounting S3 bucket {bucket} with args: %s; env: %s", subprocess_args, mp_env)
+    # Placing the mount places the threads of its FUSE workers and CRT event loops too
+    subprocess_args = [*placement_prefix(cfg, "mount"), *subprocess_args]
+
+    log.info("Mountpoint env: %s", mp_env)
     subprocess_env = os.environ.copy()
     subprocess_env.update(mp_env)
-    log.debug("Subprocess env: %s", subprocess_env)
-
-    output = subprocess.check_output(subprocess_args, env=subprocess_env)
-    mountpoint_pid = get_mount_s3_pid(subprocess_env["UNSTABLE_MOUNTPOINT_PID_FILE"])
-    log.info("Mountpoint pid: %d, output: %s", mountpoint_pid, output.decode("utf-8").strip())
 
-    return {
+    mount_metadata = {
+        "bucket": bucket,
         "mount_dir": mount_dir,
+        "prefix": prefix,
         "mount_s3_command": " ".join(subprocess_args),
         "mount_s3_env": subprocess_env,
         "mp_version": mountpoint_version_output.strip(),
-        "target_pid": mountpoint_pid,
+        "cache_dir": cache_dir,
     }
+    return subprocess_args, subprocess_env, mount_metadata
 
 
 def get_mount_s3_pid(pid_file: str) -> int:
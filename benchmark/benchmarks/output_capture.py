@@ -0,0 +1,208 @@
+"""
+Streaming capture of the output of benchmark processes.
+
+Output is written to compressed log segments on disk as it is produced, instead of being buffered in memory,
+and only a bounded tail is kept for post-processing. Progress lines printed by the benchmarks are parsed as they
+arrive into `live_metrics.jsonl`, so that throughput can be followed during long runs,
+and partial results survive if the harness or the benchmark crashes.
+"""
+
+import collections
+import glob
+import gzip
+import json
+import logging
+import os
+import re
+import threading
+import time
+import zlib
+from typing import IO, Any, Callable, Dict, Iterator, List, Optional
+
+from benchmarks.command import CommandResult
+
+log = logging.getLogger(__name__)
+
+LIVE_METRICS_FILE = "live_metrics.jsonl"
+
+# Longest line read at once, longer lines are split
+MAX_LINE_BYTES = 64 * 1024
+
+# How often compressed output is flushed to disk, so that it can be read up to that point after a crash
+FLUSH_INTERVAL_SECS = 1.0
+
+GIBIBITS_IN_GIGABITS = 1024**3 / 1000**3
+
+CRT_RUN_PATTERN = re.compile(r"Run:(\d+)\s+Secs:(\d+\.\d+)\s+Gb/s:(\d+\.\d+)")
+# Printed by the client (Gb/s), prefetch and upload (Gib/s) benchmarks after each iteration
+ITERATION_PATTERN = re.compile(r"^(\d+): (?:received|uploaded) (\d+) bytes in (\d+\.\d+)s: (\d+\.\d+) (Gb|Gib)/s")
+
+
+def parse_progress_line(line: str) -> Optional[Dict[str, Any]]:
+    """Parse a progress line printed by a benchmark, or return None for other lines."""
+    if match := CRT_RUN_PATTERN.search(line):
+        return {
+            "run": int(match.group(1)),
+            "elapsed_seconds": float(match.group(2)),
+            "throughput_gbps": float(match.group(3)),
+        }
+    if match := ITERATION_PATTERN.match(line):
+        throughput = float(match.group(4))
+        if match.group(5) == "Gib":
+            throughput *= GIBIBITS_IN_GIGABITS
+        return {
+            "iteration": int(match.group(1)),
+            "bytes": int(match.group(2)),
+            "elapsed_seconds": float(match.group(3)),
+            "throughput_gbps": throughput,
+        }
+    return None
+
+
+class RotatingGzipWriter:
+    """
+    Writes a stream to numbered gzip segments, `<prefix>.000.log.gz`, `<prefix>.001.log.gz`, ...,
+    starting a new segment once the current one holds `segment_bytes` of uncompressed data.
+
+    Segments are never renamed, so that each one is complete once the next one starts.
+    With `max_segments`, the oldest segments are deleted to bound disk usage.
+    """
+
+    def __init__(self, prefix: str, segment_bytes: int, max_segments: Optional[int] = None):
+        self.prefix = prefix
+        self.segment_bytes = segment_bytes
+        self.max_segments = max_segments
+        self.segment_index = -1
+        self.segment_size = 0
+        self.file: Optional[gzip.GzipFile] = None
+        self.last_flush = time.monotonic()
+
+    def segment_path(self, index: int) -> str:
+        return f"{self.prefix}.{index:03d}.log.gz"
+
+    def write(self, data: bytes) -> None:
+        if self.file is None or self.segment_size >= self.segment_bytes:
+            self._next_segment()
+        self.file.write(data)
+        self.segment_size += len(data)
+
+        if time.monotonic() - self.last_flush >= FLUSH_INTERVAL_SECS:
+            self.flush()
+
+    def flush(self) -> None:
+        if self.file is not None:
+            self.file.flush(zlib.Z_SYNC_FLUSH)
+        self.last_flush = time.monotonic()
+
+    def close(self) -> None:
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def _next_segment(self) -> None:
+        self.close()
+        self.segment_index += 1
+        self.segment_size = 0
+        self.file = gzip.open(self.segment_path(self.segment_index), "wb")
+
+        if self.max_segments is not None and self.segment_index >= self.max_segments:
+            os.remove(self.segment_path(self.segment_index - self.max_segments))
+
+
+def read_segments(prefix: str) -> bytes:
+    """Read back all segments written by `RotatingGzipWriter` with the given prefix."""
+    return b"".join(gzip.open(path).read() for path in sorted(glob.glob(f"{prefix}.*.log.gz")))
+
+
+def iter_segment_lines(prefix: str) -> Iterator[str]:
+    """Lines of all segments written by `RotatingGzipWriter` with the given prefix, without reading them into memory."""
+    for path in sorted(glob.glob(f"{prefix}.*.log.gz")):
+        with gzip.open(path, "rt", errors="replace") as f:
+            yield from f
+
+
+class OutputCapture:
+    """
+    Consumes the stdout and stderr pipes of a process on background threads.
+
+    Each stream is written to rotating compressed segments, and only its last `tail_bytes` are kept in memory.
+    Lines of either stream which `parse_line` recognizes are appended to `live_metrics.jsonl` and logged.
+    """
+
+    def __init__(
+        self,
+        output_dir: str = ".",
+        segment_bytes: int = 64 * 1024 * 1024,
+        max_segments: Optional[int] = None,
+        tail_bytes: int = 1024 * 1024,
+        parse_line: Callable[[str], Optional[Dict[str, Any]]] = parse_progress_line,
+    ):
+        self.output_dir = output_dir
+        self.segment_bytes = segment_bytes
+        self.max_segments = max_segments
+        self.tail_bytes = tail_bytes
+        self.parse_line = parse_line
+        self.progress: List[Dict[str, Any]] = []
+        self.progress_lock = threading.Lock()
+        self.tails: Dict[str, collections.deque] = {}
+        self.threads: List[threading.Thread] = []
+        self.live_metrics_file: Optional[IO[str]] = None
+        self.start_time = time.monotonic()
+
+    def start(self, stdout: IO[bytes], stderr: IO[bytes]) -> None:
+        self.start_time = time.monotonic()
+        self.live_metrics_file = open(os.path.join(self.output_dir, LIVE_METRICS_FILE), "a")
+        for name, stream in [("stdout", stdout), ("stderr", stderr)]:
+            self.tails[name] = collections.deque()
+            thread = threading.Thread(target=self._consume, args=(name, stream), name=f"capture-{name}", daemon=True)
+            thread.start()
+            self.threads.append(thread)
+
+    def join(self) -> None:
+        """Wait until both streams are closed, which happens when the process exits."""
+        for thread in self.threads:
+            thread.join()
+        if self.live_metrics_file is not None:
+            self.live_metrics_file.close()
+            self.live_metrics_file = None
+
+    def result(self, returncode: int) -> CommandResult:
+        return CommandResult(
+            returncode=returncode,
+            stdout=self.tail("stdout"),
+            stderr=self.tail("stderr"),
+            progress=list(self.progress),
+        )
+
+    def tail(self, name: str) -> str:
+        return b"".join(self.tails.get(name, ())).decode("utf-8", errors="replace")
+
+    def _consume(self, name: str, stream: IO[bytes]) -> None:
+        writer = RotatingGzipWriter(os.path.join(self.output_dir, name), self.segment_bytes, self.max_segments)
+        tail = self.tails[name]
+        tail_size = 0
+        try:
+            while line := stream.readline(MAX_LINE_BYTES):
+                writer.write(line)
+
+                tail.append(line)
+                tail_size += len(line)
+                while tail_size > self.tail_bytes and len(tail) > 1:
+                    tail_size -= len(tail.popleft())
+
+                record = self.parse_line(line.decode("utf-8", errors="replace"))
+                if record is not None:
+                    self._record_progress(record)
+                    writer.flush()
+        finally:
+            writer.close()
+            stream.close()
+
+    def _record_progress(self, record: Dict[str, Any]) -> None:
+        record = {"time": round(time.monotonic() - self.start_time, 3), **record}
+        with self.progress_lock:
+            self.progress.append(record)
+            self.live_metrics_file.write(json.dumps(record) + "\n")
+            self.live_metrics_file.flush()
+        if "throughput_gbps" in record:
+            log.info(f"Progress at {record['time']:.0f}s: {record['throughput_gbps']:.2f} Gbps")
@@ -0,0 +1,161 @@
+"""CPU and NUMA placement of the processes of a benchmark run.
+
+Each role, the Mountpoint mount (`mount`), the benchmark process (`benchmark`) and the harness with its monitoring
+tools (`monitoring`), is placed on an explicit CPU list or on a NUMA node, as configured under `placement`.
+The node `nic` is the NUMA node of the configured `network.interface_names`.
+
+Commands are placed with `numactl`, which also binds their memory to the node, or with `taskset`.
+Threads inherit the placement of their process, so those of Mountpoint's FUSE workers and CRT event loops run
+where the mount is placed.
+"""
+
+import logging
+import os
+import shutil
+from typing import Any, Dict, List, Optional, Sequence
+
+from omegaconf import DictConfig
+
+log = logging.getLogger(__name__)
+
+ROLES = ["mount", "benchmark", "monitoring"]
+
+# Value of `numa_node` selecting the node of the network interfaces
+NIC_NUMA_NODE = "nic"
+
+
+def parse_cpu_list(cpu_list: str) -> List[int]:
+    """Parse a CPU list in the format of the kernel and `taskset -c`, e.g. `0-3,8,10-11`."""
+    cpus = set()
+    for part in str(cpu_list).split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if "-" in part:
+            first, last = part.split("-", 1)
+            cpus.update(range(int(first), int(last) + 1))
+        else:
+            cpus.add(int(part))
+    if not cpus:
+        raise ValueError(f"CPU list {cpu_list!r} is empty")
+    return sorted(cpus)
+
+
+def format_cpu_list(cpus: Sequence[int]) -> str:
+    """Format CPUs as a CPU list, merging consecutive CPUs into ranges."""
+    ranges = []
+    for cpu in sorted(cpus):
+        if ranges and cpu == ranges[-1][1] + 1:
+            ranges[-1][1] = cpu
+        else:
+            ranges.append([cpu, cpu])
+    return ",".join(f"{first}-{last}" if first != last else str(first) for first, last in ranges)
+
+
+def numa_node_cpus(node: int) -> List[int]:
+    with open(f"/sys/devices/system/node/node{node}/cpulist", "r") as f:
+        return parse_cpu_list(f.read().strip())
+
+
+def nic_numa_node(interface_names: Sequence[str]) -> Optional[int]:
+    """NUMA node of the given network interfaces, or None if it is unknown or they are on different nodes."""
+    nodes = set()
+    for interface_name in interface_names:
+        try:
+            with open(f"/sys/class/net/{interface_name}/device/numa_node", "r") as f:
+                node = int(f.read().strip())
+        except (OSError, ValueError):
+            log.warning(f"Could not read the NUMA node of {interface_name}")
+            return None
+        if node < 0:
+            log.warning(f"NUMA node of {interface_name} is unknown")
+            return None
+        nodes.add(node)
+    if len(nodes) != 1:
+        if nodes:
+            log.warning(f"Interfaces {list(interface_names)} are on different NUMA nodes: {sorted(nodes)}")
+        return None
+    return nodes.pop()
+
+
+def _role_numa_node(cfg: DictConfig, role: str) -> Optional[int]:
+    numa_node = cfg.placement[role].numa_node
+    if numa_node is None:
+        return None
+    if str(numa_node) == NIC_NUMA_NODE:
+        if not cfg.network.interface_names:
+            raise ValueError(f"placement.{role}.numa_node={NIC_NUMA_NODE} requires network.interface_names")
+        node = nic_numa_node(cfg.network.interface_names)
+        if node is None:
+            raise ValueError(f"Could not detect the NUMA node of {list(cfg.network.interface_names)}")
+        return node
+    return int(numa_node)
+
+
+def role_cpus(cfg: DictConfig, role: str) -> Optional[List[int]]:
+    """CPUs the role is placed on, or None if it is not placed."""
+    role_cfg = cfg.placement[role]
+    if role_cfg.cpus is not None and role_cfg.numa_node is not None:
+        raise ValueError(f"placement.{role} can have either `cpus` or `numa_node`, not both")
+    if role_cfg.cpus is not None:
+        return parse_cpu_list(role_cfg.cpus)
+    if (node := _role_numa_node(cfg, role)) is not None:
+        return numa_node_cpus(node)
+    return None
+
+
+def placement_prefix(cfg: DictConfig, role: str) -> List[str]:
+    """Arguments to prefix to a command to place it as configured for the role, empty if it is not placed."""
+    if cfg.placement[role].cpus is not None:
+        return ["taskset", "-c", format_cpu_list(role_cpus(cfg, role))]
+    node = _role_numa_node(cfg, role)
+    if node is None:
+        return []
+    if shutil.which("numactl") is not None:
+        return ["numactl", f"--cpunodebind={node}", f"--membind={node}"]
+    log.warning("numactl not found, placing on the CPUs of the NUMA node without binding memory")
+    return ["taskset", "-c", format_cpu_list(numa_node_cpus(node))]
+
+
+def benchmark_prefix(cfg: DictConfig, harness_cpus: Sequence[int]) -> List[str]:
+    """Arguments to prefix to a benchmark command to place it.
+
+    Without a placement of its own, a benchmark command started after the harness is placed keeps the CPUs
+    the harness had before, `harness_cpus`, rather than inheriting those of the monitoring tools.
+    """
+    prefix = placement_prefix(cfg, "benchmark")
+    if not prefix and role_cpus(cfg, "monitoring") is not None:
+        prefix = ["taskset", "-c", format_cpu_list(harness_cpus)]
+    return prefix
+
+
+def place_harness(cfg: DictConfig) -> None:
+    """Pin the harness process, its monitoring threads and the monitoring tools it starts afterwards.
+
+    Called once the mount and the benchmark process are started, as they would otherwise inherit its placement.
+    The affinity of a thread only applies to itself and the threads and processes it starts later, so every thread
+    already running, e.g. those capturing output or serving the local S3 stand-in, is pinned.
+    """
+    if (cpus := role_cpus(cfg, "monitoring")) is not None:
+        log.info(f"Placing the harness and monitoring tools on CPUs {format_cpu_list(cpus)}")
+        for tid in os.listdir("/proc/self/task"):
+            try:
+                os.sched_setaffinity(int(tid), cpus)
+            except ProcessLookupError:
+                # The thread exited in the meantime
+                pass
+
+
+def placement_metadata(cfg: DictConfig) -> Dict[str, Any]:
+    """Resolved placement of each role and the NUMA node of the network interfaces, to record in the metadata."""
+    metadata: Dict[str, Any] = {
+        "nic_numa_node": nic_numa_node(cfg.network.interface_names) if cfg.network.interface_names else None,
+    }
+    for role in ROLES:
+        cpus = role_cpus(cfg, role)
+        metadata[role] = {
+            "cpus": format_cpu_list(cpus) if cpus is not None else None,
+            "numa_node": _role_numa_node(cfg, role),
+            "command_prefix": placement_prefix(cfg, role) if role != "monitoring" else [],
+        }
+    return metadata
@@ -0,0 +1,45 @@
+"""Compile the Rust targets needed by a sweep once, before any of its jobs are launched."""
+
+import logging
+from typing import Dict, Iterable, Type
+
+from omegaconf import DictConfig
+
+from benchmarks.base_benchmark import BaseBenchmark
+from benchmarks.cargo_helper import prebuild
+from benchmarks.client_benchmark import ClientBenchmark
+from benchmarks.crt_benchmark import CrtBenchmark
+from benchmarks.fio_benchmark import FioBenchmark
+from benchmarks.manifest_benchmark import ManifestBenchmark
+from benchmarks.prefetch_benchmark import PrefetchBenchmark
+from benchmarks.s3io_benchmark import S3ioBenchmark
+from benchmarks.startup_benchmark import StartupBenchmark
+from benchmarks.upload_benchmark import UploadBenchmark
+
+log = logging.getLogger(__name__)
+
+BENCHMARK_CLASSES: Dict[str, Type[BaseBenchmark]] = {
+    "fio": FioBenchmark,
+    "prefetch": PrefetchBenchmark,
+    "crt": CrtBenchmark,
+    "client": ClientBenchmark,
+    "client_bp": ClientBenchmark,
+    "s3io": S3ioBenchmark,
+    "upload": UploadBenchmark,
+    "startup": StartupBenchmark,
+    "manifest": ManifestBenchmark,
+}
+
+
+def prebuild_for_configs(configs: Iterable[DictConfig]) -> None:
+    """Compile each distinct build target required by the given job configurations."""
+    targets = []
+    for cfg in configs:
+        benchmark_class = BENCHMARK_CLASSES.get(cfg.benchmark_type)
+        if benchmark_class is None:
+            log.warning(f"Unknown benchmark type {cfg.benchmark_type}, not prebuilding")
+            continue
+        targets.extend(benchmark_class.build_targets(cfg))
+
+    executables = prebuild(targets)
+    log.info(f"Prebuilt {len(executables)} executables")
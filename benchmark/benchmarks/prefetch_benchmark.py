@@ -1,11 +1,14 @@
 import logging
+import os
 import subprocess
-from typing import Dict, Any
+from typing import Dict, Any, List
 
 from benchmarks.base_benchmark import BaseBenchmark
 from benchmarks.command import Command, CommandResult
-from benchmarks.cargo_helper import build_example
-from benchmarks.config_utils import get_s3_keys
+from benchmarks.cargo_helper import BuildTarget, build_example
+from benchmarks.config_utils import get_s3_keys, s3_endpoint_env
+from benchmarks.log_metrics import LogMetricsSeries, memory_reservations
+from benchmarks.output_capture import iter_segment_lines
 from omegaconf import DictConfig
 
 log = logging.getLogger(__name__)
@@ -16,10 +19,15 @@ class PrefetchBenchmark(BaseBenchmark):
         self.cfg = cfg
         self.metadata = metadata
 
+    @staticmethod
+    def build_targets(cfg: DictConfig) -> List[BuildTarget]:
+        return [BuildTarget(example_name="prefetch_benchmark", with_flamegraph=cfg.monitoring.with_flamegraph)]
+
     def setup(self, with_flamegraph: bool = False) -> Dict[str, Any]:
         log.info("Compiling prefetch_benchmark example...")
         self.executable_path = build_example("prefetch_benchmark", with_flamegraph=with_flamegraph)
         log.info(f"Prefetch benchmark executable ready at: {self.executable_path}")
+        self.metadata["max_memory_target_mib"] = self.cfg.benchmarks.prefetch.max_memory_target
 
         return self.metadata
 
@@ -66,13 +74,18 @@ class PrefetchBenchmark(BaseBenchmark):
 
         subprocess_args.extend(["--output-file", "prefetch-output.json"])
 
-        prefetch_env = {}
+        prefetch_env = s3_endpoint_env(self.cfg)
         if not self.cfg.download_checksums:
             prefetch_env["EXPERIMENTAL_MOUNTPOINT_NO_DOWNLOAD_INTEGRITY_VALIDATION"] = "ON"
 
         if (crt_eventloop_threads := self.cfg.crt_eventloop_threads) is not None:
             prefetch_env["UNSTABLE_CRT_EVENTLOOP_THREADS"] = str(crt_eventloop_threads)
 
+        if self.cfg.monitoring.log_metrics or self.cfg.monitoring.with_memory:
+            # Log metrics to stderr, keeping the default level of other logs
+            rust_log = os.environ.get("RUST_LOG", "error")
+            prefetch_env["RUST_LOG"] = f"{rust_log},mountpoint_s3_fs::metrics=info"
+
         log.info("Prefetch benchmark command prepared with args: %s", subprocess_args)
 
         return Command(args=subprocess_args, env=prefetch_env)
@@ -86,4 +99,10 @@ class PrefetchBenchmark(BaseBenchmark):
 
         log.info("Prefetch benchmark completed successfully.")
         self.metadata["prefetch_output_file"] = "prefetch-output.json"
+        if self.cfg.monitoring.log_metrics or self.cfg.monitoring.with_memory:
+            series = LogMetricsSeries().add_lines(iter_segment_lines("stderr"))
+            if self.cfg.monitoring.log_metrics:
+                series.write()
+            if self.cfg.monitoring.with_memory:
+                self.metadata["memory_reservations"] = memory_reservations(series)
         return self.metadata
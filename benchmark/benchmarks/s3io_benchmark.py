@@ -0,0 +1,158 @@
+import json
+import logging
+import subprocess
+from typing import Dict, Any, List, Optional
+
+from benchmarks.base_benchmark import BaseBenchmark
+from benchmarks.command import Command, CommandResult
+from benchmarks.cargo_helper import BuildTarget, build_example
+from benchmarks.config_utils import get_s3_keys, s3_endpoint_env
+from omegaconf import DictConfig
+
+log = logging.getLogger(__name__)
+
+S3IO_CONFIG_FILE = "s3io-config.toml"
+S3IO_OUTPUT_FILE = "s3io-output.json"
+
+# Job parameters passed through from `benchmarks.s3io` to the job file when set
+JOB_PARAMS = [
+    "access_pattern",
+    "write_size",
+    "randseed",
+    "incremental_upload",
+    "generate_object",
+    "iterations",
+    "iteration_duration",
+]
+
+
+def toml_value(value: Any) -> str:
+    """Render a value as TOML. JSON strings with ASCII escapes are valid TOML basic strings."""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, (int, float)):
+        return str(value)
+    if isinstance(value, str):
+        return json.dumps(value)
+    if isinstance(value, (list, tuple)):
+        return "[" + ", ".join(toml_value(item) for item in value) + "]"
+    raise TypeError(f"Cannot render {type(value).__name__} as TOML: {value!r}")
+
+
+def render_toml(sections: Dict[str, Dict[str, Any]]) -> str:
+    """Render tables of key/values as TOML, skipping keys whose value is None."""
+    lines = []
+    for section, values in sections.items():
+        if lines:
+            lines.append("")
+        lines.append(f"[{section}]")
+        for key, value in values.items():
+            if value is not None:
+                lines.append(f"{key} = {toml_value(value)}")
+    return "\n".join(lines) + "\n"
+
+
+class S3ioBenchmark(BaseBenchmark):
+    """
+    Runs the `s3io_benchmark` example, which drives Mountpoint's prefetcher and uploader without FUSE.
+
+    The Hydra configuration is rendered into the TOML job file the example reads.
+    Each application worker is a separate job, reading one of the benchmark objects or writing its own object.
+    """
+
+    def __init__(self, cfg: DictConfig, metadata: Dict[str, Any]):
+        self.cfg = cfg
+        self.metadata = metadata
+
+    @staticmethod
+    def build_targets(cfg: DictConfig) -> List[BuildTarget]:
+        return [BuildTarget(example_name="s3io_benchmark", with_flamegraph=cfg.monitoring.with_flamegraph)]
+
+    def setup(self, with_flamegraph: bool = False) -> Dict[str, Any]:
+        log.info("Compiling s3io_benchmark example...")
+        self.executable_path = build_example("s3io_benchmark", with_flamegraph=with_flamegraph)
+        log.info(f"s3io benchmark executable ready at: {self.executable_path}")
+
+        return self.metadata
+
+    def job_config(self) -> Dict[str, Dict[str, Any]]:
+        """The s3io job file for this configuration, as TOML tables."""
+        s3io_cfg = self.cfg.benchmarks.s3io
+        app_workers = self.cfg.application_workers
+
+        global_config = {
+            "bucket": self.cfg.s3_bucket,
+            "region": self.cfg.region,
+            "endpoint_url": self.cfg.endpoint_url,
+            "throughput_target_gbps": _optional_float(self.cfg.network.maximum_throughput_gbps),
+            "max_memory_target": s3io_cfg.max_memory_target,
+            "bind": list(self.cfg.network.interface_names) or None,
+            "output_file": S3IO_OUTPUT_FILE,
+            "read_part_size": _optional_int(self.cfg.read_part_size),
+            "write_part_size": _optional_int(self.cfg.write_part_size),
+            "object_size": self.cfg.object_size_in_gib * 1024 * 1024 * 1024,
+            "read_size": self.cfg.read_size,
+            "max_duration": f"{self.cfg.run_time}s" if self.cfg.run_time is not None else None,
+        }
+        for param in JOB_PARAMS:
+            global_config[param] = s3io_cfg[param]
+
+        workload_type = s3io_cfg.workload_type
+        if workload_type not in ("read", "write", "mixed"):
+            raise ValueError(f"Unsupported s3io workload type: {workload_type}")
+
+        sections = {"global": global_config}
+        if workload_type == "mixed":
+            # Split the workers between readers and writers, with any odd worker reading
+            readers = app_workers - app_workers // 2
+        elif workload_type == "read":
+            readers = app_workers
+        else:
+            readers = 0
+
+        if readers > 0:
+            objects = get_s3_keys(self.cfg.s3_keys, readers, self.cfg.object_size_in_gib)
+            if len(objects) < readers:
+                raise ValueError("Seeing fewer objects than app workers. So cannot proceed with the run.")
+            for i in range(readers):
+                sections[f"jobs.read_{i}"] = {"workload_type": "read", "object_key": objects[i]}
+        for i in range(app_workers - readers):
+            # Object keys of writers default to their job name
+            sections[f"jobs.write_{i}"] = {"workload_type": "write"}
+
+        return sections
+
+    def get_command(self) -> Command:
+        with open(S3IO_CONFIG_FILE, "w") as f:
+            f.write(render_toml(self.job_config()))
+
+        subprocess_args = [self.executable_path, S3IO_CONFIG_FILE]
+        log.info("s3io benchmark command prepared with args: %s", subprocess_args)
+
+        s3io_env = s3_endpoint_env(self.cfg)
+        if not self.cfg.download_checksums:
+            s3io_env["EXPERIMENTAL_MOUNTPOINT_NO_DOWNLOAD_INTEGRITY_VALIDATION"] = "ON"
+        if (crt_eventloop_threads := self.cfg.crt_eventloop_threads) is not None:
+            s3io_env["UNSTABLE_CRT_EVENTLOOP_THREADS"] = str(crt_eventloop_threads)
+
+        return Command(args=subprocess_args, env=s3io_env)
+
+    def post_process(self, result: CommandResult) -> Dict[str, Any]:
+        if result.returncode != 0:
+            log.error(f"s3io benchmark failed with exit code {result.returncode}")
+            if result.stderr:
+                log.error(f"Error output: {result.stderr}")
+            raise subprocess.CalledProcessError(result.returncode, ["s3io_benchmark"])
+
+        log.info("s3io benchmark completed successfully.")
+        self.metadata["s3io_config_file"] = S3IO_CONFIG_FILE
+        self.metadata["s3io_output_file"] = S3IO_OUTPUT_FILE
+        return self.metadata
+
+
+def _optional_int(value: Any) -> Optional[int]:
+    return int(value) if value is not None else None
+
+
+def _optional_float(value: Any) -> Optional[float]:
+    return float(value) if value is not None else None
@@ -0,0 +1,178 @@
+import json
+import logging
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from typing import Dict, Any, List, Tuple
+
+from benchmarks.base_benchmark import BaseBenchmark
+from benchmarks.command import Command, CommandResult
+from benchmarks.cargo_helper import BuildTarget, build_example
+from benchmarks.config_utils import s3_endpoint_env
+from benchmarks.mountpoint import mount_mp_command, mountpoint_build_target
+from benchmarks.placement import placement_prefix
+from omegaconf import DictConfig
+
+log = logging.getLogger(__name__)
+
+STARTUP_CONFIG_FILE = "startup-config.json"
+STARTUP_OUTPUT_FILE = "startup-output.json"
+MOUNT_CONFIG_FILE = "mount-config.json"
+EVENT_LOG_DIRECTORY = "event_log"
+STARTUP_PROBE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "startup_probe.py")
+
+# Features of `mount_from_config`, qualified with its package as cargo runs in the workspace
+MOUNT_FROM_CONFIG_FEATURES = ("mountpoint-s3-fs/manifest", "mountpoint-s3-fs/event_log")
+
+
+class StartupBenchmark(BaseBenchmark):
+    """
+    Mounts the bucket again and again, timing how long it takes until it is mounted,
+    until the first lookup of `lookup_key` succeeds, and until its first bytes are read.
+
+    Mountpoint is mounted with `mount-s3` as configured under `mountpoint`, or with a manifest: the `mount_from_config`
+    example ingests the manifest into its metadata store on each mount, and serves lookups from it rather than S3.
+    The repetitions are run by `startup_probe.py`, which records the distribution of the time of each phase.
+    """
+
+    def __init__(self, cfg: DictConfig, metadata: Dict[str, Any]):
+        self.cfg = cfg
+        self.metadata = metadata
+        self.mount_dir = None
+        self.metadata_store_dir = None
+
+    @staticmethod
+    def build_targets(cfg: DictConfig) -> List[BuildTarget]:
+        if cfg.benchmarks.startup.manifest_path is not None:
+            return [
+                BuildTarget(
+                    example_name="mount_from_config",
+                    features=MOUNT_FROM_CONFIG_FEATURES,
+                    with_flamegraph=cfg.monitoring.with_flamegraph,
+                )
+            ]
+        build_target = mountpoint_build_target(cfg, cfg.monitoring.with_flamegraph)
+        return [build_target] if build_target is not None else []
+
+    def setup(self, with_flamegraph: bool = False) -> Dict[str, Any]:
+        startup_cfg = self.cfg.benchmarks.startup
+        self.mount_dir = tempfile.mkdtemp(suffix=".mountpoint-s3")
+
+        if startup_cfg.manifest_path is not None:
+            args, env = self._manifest_mount_command(with_flamegraph)
+            lookup_path = os.path.join(startup_cfg.manifest_directory, startup_cfg.lookup_key)
+            foreground = True
+        else:
+            if self.cfg.mountpoint.cache.xz_bucket is not None:
+                raise ValueError(
+                    "The startup benchmark cannot use mountpoint.cache.xz_bucket, "
+                    "as the S3 Express One Zone cache persists across repetitions, which would not all be cold"
+                )
+            args, env, mount_metadata = mount_mp_command(self.cfg, self.mount_dir, with_flamegraph)
+            self.metadata.update(mount_metadata)
+            lookup_path = startup_cfg.lookup_key
+            foreground = False
+
+        probe_config = {
+            "args": args,
+            "env": env,
+            "mount_dir": self.mount_dir,
+            "foreground": foreground,
+            "lookup_path": lookup_path,
+            # Replaced by a new directory for each repetition, see `startup_probe.py`
+            "cache_dir": self.metadata.get("cache_dir"),
+            "read_bytes": startup_cfg.read_bytes,
+            "repetitions": startup_cfg.repetitions,
+            "timeout_secs": startup_cfg.timeout_secs,
+            "output_file": STARTUP_OUTPUT_FILE,
+        }
+        with open(STARTUP_CONFIG_FILE, "w") as f:
+            json.dump(probe_config, f, indent=2)
+
+        self.metadata["startup_repetitions"] = startup_cfg.repetitions
+        return self.metadata
+
+    def _manifest_mount_command(self, with_flamegraph: bool) -> Tuple[List[str], Dict[str, str]]:
+        """Build `mount_from_config`, and write its configuration mounting the manifest as a single channel."""
+        startup_cfg = self.cfg.benchmarks.startup
+        log.info("Compiling mount_from_config example...")
+        executable_path = build_example(
+            "mount_from_config", features=list(MOUNT_FROM_CONFIG_FEATURES), with_flamegraph=with_flamegraph
+        )
+
+        # The metadata store is created anew in a temporary directory below this one on each mount
+        self.metadata_store_dir = tempfile.mkdtemp(prefix="mountpoint-metadata-")
+        os.makedirs(EVENT_LOG_DIRECTORY, exist_ok=True)
+        max_throughput = self.cfg.network.maximum_throughput_gbps
+        mount_config = {
+            "config_version": "0.0.1",
+            "mountpoint": self.mount_dir,
+            "region": self.cfg.region,
+            "metadata_store_dir": self.metadata_store_dir,
+            "event_log_dir": os.path.abspath(EVENT_LOG_DIRECTORY),
+            "channels": [
+                {
+                    "directory_name": startup_cfg.manifest_directory,
+                    "bucket_name": self.cfg.s3_bucket,
+                    "prefix": self.cfg.mountpoint.prefix or "",
+                    "manifest_path": os.path.abspath(startup_cfg.manifest_path),
+                    "manifest_checksum": startup_cfg.manifest_checksum,
+                }
+            ],
+            "loglevel": "debug,awscrt=debug" if self.cfg.mountpoint.mountpoint_debug_crt else "info,awscrt=off",
+            "throughput_config": (
+                {"type": "Explicit", "throughput": float(max_throughput)}
+                if max_throughput is not None
+                else {"type": "IMDSAutoConfigure"}
+            ),
+            "part_size": self.cfg.read_part_size or self.cfg.write_part_size,
+        }
+        if self.cfg.endpoint_url is not None:
+            mount_config["endpoint_url"] = self.cfg.endpoint_url
+        if (fuse_threads := self.cfg.mountpoint.fuse_threads) is not None:
+            mount_config["max_threads"] = fuse_threads
+        if (max_memory_target := self.cfg.mountpoint.max_memory_target) is not None:
+            mount_config["memory_limit_bytes"] = max_memory_target * 1024 * 1024
+        with open(MOUNT_CONFIG_FILE, "w") as f:
+            json.dump(mount_config, f, indent=2)
+
+        mount_env = os.environ.copy()
+        mount_env.update(s3_endpoint_env(self.cfg))
+        if (crt_eventloop_threads := self.cfg.crt_eventloop_threads) is not None:
+            mount_env["UNSTABLE_CRT_EVENTLOOP_THREADS"] = str(crt_eventloop_threads)
+
+        self.metadata["mount_config_file"] = MOUNT_CONFIG_FILE
+        mount_args = [
+            *placement_prefix(self.cfg, "mount"),
+            executable_path,
+            "--config",
+            os.path.abspath(MOUNT_CONFIG_FILE),
+        ]
+        return mount_args, mount_env
+
+    def get_command(self) -> Command:
+        subprocess_args = [sys.executable, STARTUP_PROBE, STARTUP_CONFIG_FILE]
+        log.info("Startup benchmark command prepared with args: %s", subprocess_args)
+        return Command(args=subprocess_args)
+
+    def post_process(self, result: CommandResult) -> Dict[str, Any]:
+        # The probe unmounts after each repetition, only the directories and the pid file of `mount-s3` are left
+        os.rmdir(self.mount_dir)
+        if os.path.exists(pid_file := f"{self.mount_dir}.pid"):
+            os.remove(pid_file)
+        if self.metadata_store_dir is not None:
+            shutil.rmtree(self.metadata_store_dir, ignore_errors=True)
+        if self.metadata.get("cache_dir") is not None:
+            shutil.rmtree(self.metadata["cache_dir"], ignore_errors=True)
+
+        if result.returncode != 0:
+            log.error(f"Startup benchmark failed with exit code {result.returncode}")
+            if result.stderr:
+                log.error(f"Error output: {result.stderr}")
+            raise subprocess.CalledProcessError(result.returncode, ["startup_probe"])
+
+        log.info("Startup benchmark completed successfully.")
+        self.metadata["startup_output_file"] = STARTUP_OUTPUT_FILE
+        return self.metadata
@@ -0,0 +1,145 @@
+"""
+Repeatedly mount a bucket, and time how long it takes from executing Mountpoint until the file system is mounted,
+until the first lookup of a file succeeds, and until the first byte of the file is read.
+
+This runs as the benchmark process of `StartupBenchmark`, which writes its configuration to `startup-config.json`:
+
+    python startup_probe.py startup-config.json
+
+Times are measured with `time.perf_counter_ns` from just before Mountpoint is executed, and each phase includes the
+previous ones. With a local disk cache, each repetition caches to a new directory, so that all are cold.
+The time of each repetition and their distribution are written to `startup-output.json`. Only a few bytes are read,
+so unlike the other benchmarks' output, its summary has no total bytes and time to derive a throughput from.
+"""
+
+import json
+import os
+import shutil
+import signal
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List
+
+PHASES = ["mount_seconds", "lookup_seconds", "first_byte_seconds"]
+
+# Interval at which a foreground Mountpoint process is polled until it is mounted
+POLL_INTERVAL_SECS = 0.001
+
+
+def percentile(values: List[float], quantile: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(quantile * len(ordered)) - 1))]
+
+
+def summarize(values: List[float]) -> Dict[str, float]:
+    return {
+        "min": min(values),
+        "p50": statistics.median(values),
+        "p90": percentile(values, 0.9),
+        "p99": percentile(values, 0.99),
+        "max": max(values),
+        "mean": statistics.mean(values),
+    }
+
+
+def wait_until_mounted(process: subprocess.Popen, mount_dir: str, timeout_secs: float) -> None:
+    """Wait for a Mountpoint process running in the foreground to mount the file system."""
+    deadline = time.monotonic() + timeout_secs
+    while not os.path.ismount(mount_dir):
+        if process.poll() is not None:
+            raise RuntimeError(f"Mountpoint exited with code {process.returncode} before mounting")
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"{mount_dir} was not mounted within {timeout_secs}s")
+        time.sleep(POLL_INTERVAL_SECS)
+
+
+def cache_args(args: List[str], cache_dir: str, repetition_cache_dir: str) -> List[str]:
+    """Arguments of Mountpoint, caching to the directory of a repetition instead of `cache_dir`."""
+    return [f"--cache={repetition_cache_dir}" if arg == f"--cache={cache_dir}" else arg for arg in args]
+
+
+def run_repetition(config: Dict[str, Any]) -> Dict[str, float]:
+    mount_dir = config["mount_dir"]
+    lookup_path = os.path.join(mount_dir, config["lookup_path"])
+    args = config["args"]
+    repetition_cache_dir = None
+    if (cache_dir := config.get("cache_dir")) is not None:
+        repetition_cache_dir = tempfile.mkdtemp(prefix="mountpoint-cache-", dir=os.path.dirname(cache_dir))
+        args = cache_args(args, cache_dir, repetition_cache_dir)
+
+    start = time.perf_counter_ns()
+    process = subprocess.Popen(args, env=config["env"], stdout=subprocess.DEVNULL)
+    try:
+        if config["foreground"]:
+            wait_until_mounted(process, mount_dir, config["timeout_secs"])
+        else:
+            # Mountpoint only exits once the file system is mounted, or failed to mount
+            if process.wait(timeout=config["timeout_secs"]) != 0:
+                raise RuntimeError(f"Mountpoint exited with code {process.returncode}")
+        mounted = time.perf_counter_ns()
+
+        os.stat(lookup_path)
+        looked_up = time.perf_counter_ns()
+
+        with open(lookup_path, "rb", buffering=0) as f:
+            read_bytes = len(f.read(config["read_bytes"]))
+            first_byte = time.perf_counter_ns()
+        if not read_bytes:
+            raise RuntimeError(f"Read no bytes from {lookup_path}")
+    finally:
+        unmount(process, mount_dir, config["foreground"])
+        if repetition_cache_dir is not None:
+            shutil.rmtree(repetition_cache_dir, ignore_errors=True)
+
+    return {
+        "bytes": read_bytes,
+        "mount_seconds": (mounted - start) / 1e9,
+        "lookup_seconds": (looked_up - start) / 1e9,
+        "first_byte_seconds": (first_byte - start) / 1e9,
+    }
+
+
+def unmount(process: subprocess.Popen, mount_dir: str, foreground: bool) -> None:
+    if foreground:
+        # Mountpoint unmounts on SIGINT when running in the foreground
+        if process.poll() is None:
+            process.send_signal(signal.SIGINT)
+        process.wait()
+    else:
+        # Mountpoint only exits once mounted, so it is hung if still running, e.g. after timing out, and would keep
+        # the next repetitions from mounting cold
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+        if os.path.ismount(mount_dir):
+            subprocess.run(["umount", mount_dir], check=True)
+
+
+def main(config_path: str) -> None:
+    with open(config_path, "r") as f:
+        config = json.load(f)
+
+    repetitions = []
+    for repetition in range(config["repetitions"]):
+        timings = run_repetition(config)
+        repetitions.append(timings)
+        print(
+            f"{repetition}: mounted in {timings['mount_seconds'] * 1000:.1f}ms, "
+            f"first lookup in {timings['lookup_seconds'] * 1000:.1f}ms, "
+            f"first byte in {timings['first_byte_seconds'] * 1000:.1f}ms",
+            flush=True,
+        )
+
+    output = {
+        "summary": {phase: summarize([timings[phase] for timings in repetitions]) for phase in PHASES},
+        "repetitions": repetitions,
+    }
+    with open(config["output_file"], "w") as f:
+        json.dump(output, f, indent=2)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1])
@@ -0,0 +1,95 @@
+import logging
+import subprocess
+from typing import Dict, Any, List
+
+from benchmarks.base_benchmark import BaseBenchmark
+from benchmarks.command import Command, CommandResult
+from benchmarks.cargo_helper import BuildTarget, build_example
+from benchmarks.config_utils import s3_endpoint_env
+from omegaconf import DictConfig
+
+log = logging.getLogger(__name__)
+
+UPLOAD_OUTPUT_FILE = "upload-output.json"
+
+
+class UploadBenchmark(BaseBenchmark):
+    """
+    Runs the `upload_benchmark` example, which drives Mountpoint's uploader without FUSE.
+
+    Each application worker uploads its own object of `object_size_in_gib` concurrently, in each iteration.
+    Besides the throughput, the example records the time from completing each upload until it is durable in S3.
+    """
+
+    def __init__(self, cfg: DictConfig, metadata: Dict[str, Any]):
+        self.cfg = cfg
+        self.metadata = metadata
+
+    @staticmethod
+    def build_targets(cfg: DictConfig) -> List[BuildTarget]:
+        return [BuildTarget(example_name="upload_benchmark", with_flamegraph=cfg.monitoring.with_flamegraph)]
+
+    def setup(self, with_flamegraph: bool = False) -> Dict[str, Any]:
+        log.info("Compiling upload_benchmark example...")
+        self.executable_path = build_example("upload_benchmark", with_flamegraph=with_flamegraph)
+        log.info(f"Upload benchmark executable ready at: {self.executable_path}")
+        self.metadata["max_memory_target_mib"] = self.cfg.benchmarks.upload.max_memory_target
+
+        return self.metadata
+
+    def get_command(self) -> Command:
+        upload_cfg = self.cfg.benchmarks.upload
+        subprocess_args = [
+            self.executable_path,
+            self.cfg.s3_bucket,
+            upload_cfg.object_key,
+            "--object-size",
+            str(self.cfg.object_size_in_gib * 1024 * 1024 * 1024),
+            "--concurrency",
+            str(self.cfg.application_workers),
+            "--iterations",
+            str(upload_cfg.iterations),
+            "--region",
+            self.cfg.region,
+            "--write-size",
+            str(upload_cfg.write_size),
+            "--write-part-size",
+            str(self.cfg.write_part_size),
+            "--output-file",
+            UPLOAD_OUTPUT_FILE,
+        ]
+
+        if self.cfg.endpoint_url is not None:
+            subprocess_args.extend(["--endpoint-url", self.cfg.endpoint_url])
+
+        if upload_cfg.incremental_upload:
+            subprocess_args.append("--incremental-upload")
+
+        # Use the same checksums as Mountpoint, which defaults to CRC32C
+        if (upload_checksums := self.cfg.mountpoint.upload_checksums) is not None:
+            subprocess_args.extend(["--checksum-algorithm", str(upload_checksums)])
+
+        if (max_throughput := self.cfg.network.maximum_throughput_gbps) is not None:
+            subprocess_args.extend(["--throughput-target-gbps", str(int(max_throughput))])
+
+        if (max_memory_target := upload_cfg.max_memory_target) is not None:
+            subprocess_args.extend(["--max-memory-target", str(max_memory_target)])
+
+        log.info("Upload benchmark command prepared with args: %s", subprocess_args)
+
+        upload_env = s3_endpoint_env(self.cfg)
+        if (crt_eventloop_threads := self.cfg.crt_eventloop_threads) is not None:
+            upload_env["UNSTABLE_CRT_EVENTLOOP_THREADS"] = str(crt_eventloop_threads)
+
+        return Command(args=subprocess_args, env=upload_env)
+
+    def post_process(self, result: CommandResult) -> Dict[str, Any]:
+        if result.returncode != 0:
+            log.error(f"Upload benchmark failed with exit code {result.returncode}")
+            if result.stderr:
+                log.error(f"Error output: {result.stderr}")
+            raise subprocess.CalledProcessError(result.returncode, ["upload_benchmark"])
+
+        log.info("Upload benchmark completed successfully.")
+        self.metadata["upload_output_file"] = UPLOAD_OUTPUT_FILE
+        return self.metadata
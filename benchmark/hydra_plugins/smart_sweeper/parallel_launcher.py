@@ -0,0 +1,287 @@
+from collections import deque
+from dataclasses import dataclass
+import logging
+import multiprocessing
+from multiprocessing.connection import Connection, wait
+import os
+from pathlib import Path
+from typing import Deque, Dict, List, Optional, Sequence, Tuple
+
+from hydra.core.utils import JobReturn, JobStatus, configure_log, filter_overrides, run_job, setup_globals
+from hydra.plugins.launcher import Launcher
+from hydra.types import HydraContext, TaskFunction
+from omegaconf import DictConfig, open_dict
+
+log = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class JobSlot:
+    """Resources reserved for a single job while it runs: a CPU set and, optionally, a network interface.
+
+    `capacity_gbps` is the link speed of the interface, if known.
+    """
+
+    cpus: Tuple[int, ...]
+    interface_name: Optional[str] = None
+    capacity_gbps: Optional[float] = None
+
+
+def partition_cpus(cpus: Sequence[int], slot_count: int, cpus_per_job: Optional[int] = None) -> List[Tuple[int, ...]]:
+    """Split the given CPUs into `slot_count` disjoint, contiguous CPU sets.
+
+    If `cpus_per_job` is not given, the CPUs are shared out evenly and any remainder is left unused.
+    """
+    if slot_count < 1:
+        raise ValueError(f"slot_count must be at least 1, got {slot_count}")
+
+    cpus = sorted(cpus)
+    if cpus_per_job is None:
+        cpus_per_job = len(cpus) // slot_count
+    if cpus_per_job < 1 or cpus_per_job * slot_count > len(cpus):
+        raise ValueError(
+            f"cannot fit {slot_count} jobs with {cpus_per_job} CPUs each onto the {len(cpus)} available CPUs"
+        )
+
+    return [tuple(cpus[i * cpus_per_job : (i + 1) * cpus_per_job]) for i in range(slot_count)]
+
+
+def detect_nic_capacity_gbps(interface_names: Sequence[str]) -> Optional[float]:
+    """Sum the link speed of the given interfaces, or return None if any speed is unknown."""
+    if not interface_names:
+        return None
+
+    total_gbps = 0.0
+    for interface_name in interface_names:
+        try:
+            with open(f"/sys/class/net/{interface_name}/speed", "r") as f:
+                speed_mbps = int(f.read().strip())
+        except (OSError, ValueError):
+            log.warning(f"Could not read link speed of {interface_name}")
+            return None
+        if speed_mbps <= 0:
+            log.warning(f"Link speed of {interface_name} is unknown")
+            return None
+        total_gbps += speed_mbps / 1000
+    return total_gbps
+
+
+def check_parallel_job(job_config: DictConfig, idx: int) -> None:
+    """Reject a job which measures or changes state of the whole host, as concurrent jobs would disturb it."""
+    if job_config.mountpoint.cache.drop_page_cache:
+        raise ValueError(f"Job #{idx} drops the page cache of the host, which cannot be run in parallel")
+    if not job_config.monitoring.with_procfs:
+        raise ValueError(
+            f"Job #{idx} monitors CPU usage with mpstat, which is host-wide and cannot be run in parallel, "
+            "set `monitoring.with_procfs=true`"
+        )
+    if job_config.monitoring.with_bwm:
+        raise ValueError(f"Job #{idx} monitors the host's network with bwm-ng, which cannot be run in parallel")
+
+
+def next_schedulable_job(
+    pending: Deque[Tuple[int, Optional[float]]], used_gbps: float, running_jobs: int, capacity_gbps: Optional[float]
+) -> Optional[Tuple[int, Optional[float]]]:
+    """Pop the first pending job that fits in the remaining NIC capacity, if any.
+
+    Jobs without a configured `maximum_throughput_gbps` could use the whole NIC,
+    so when a capacity is known they are only ever run on their own.
+    """
+    for position, (job_idx, gbps) in enumerate(pending):
+        if capacity_gbps is None:
+            fits = True
+        elif gbps is None:
+            fits = running_jobs == 0
+        else:
+            fits = used_gbps + gbps <= capacity_gbps
+        if fits:
+            del pending[position]
+            return job_idx, gbps
+    return None
+
+
+class ParallelBenchmarkLauncher(Launcher):
+    """Launches jobs concurrently, each in its own process pinned to a disjoint CPU set.
+
+    Each running job holds a `JobSlot` for its lifetime. When interfaces are given,
+    each slot also owns one interface and the job's `network.interface_names` is overridden with it,
+    so that concurrent jobs do not share CPUs or NICs and do not contaminate each other's results.
+    A job's `network.maximum_throughput_gbps` must then fit the interface of its slot.
+    Without interfaces, jobs share the host's NIC capacity, which is given or detected from the link speed of the
+    base config's `network.interface_names`, and the launcher refuses to start if it is unknown.
+
+    Jobs which measure or change state of the whole host, and so would disturb concurrent jobs, are rejected.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int,
+        cpus_per_job: Optional[int] = None,
+        interface_names: Optional[Sequence[str]] = None,
+        nic_capacity_gbps: Optional[float] = None,
+    ):
+        super().__init__()
+        interface_names = list(interface_names or [])
+        slot_count = max_concurrency
+        if interface_names and len(interface_names) < slot_count:
+            log.warning(
+                f"Only {len(interface_names)} interfaces available, limiting concurrency from {slot_count} to "
+                f"{len(interface_names)}"
+            )
+            slot_count = len(interface_names)
+
+        cpu_sets = partition_cpus(sorted(os.sched_getaffinity(0)), slot_count, cpus_per_job)
+        self.slots = []
+        for i, cpus in enumerate(cpu_sets):
+            if interface_names:
+                capacity_gbps = nic_capacity_gbps or detect_nic_capacity_gbps([interface_names[i]])
+                self.slots.append(JobSlot(cpus=cpus, interface_name=interface_names[i], capacity_gbps=capacity_gbps))
+            else:
+                self.slots.append(JobSlot(cpus=cpus))
+
+        # Concurrent jobs only share a NIC when slots do not own one
+        self.nic_capacity_gbps = None if interface_names else nic_capacity_gbps
+
+        self.config: Optional[DictConfig] = None
+        self.task_function: Optional[TaskFunction] = None
+        self.hydra_context: Optional[HydraContext] = None
+
+    def setup(self, *, hydra_context: HydraContext, task_function: TaskFunction, config: DictConfig) -> None:
+        self.config = config
+        self.hydra_context = hydra_context
+        self.task_function = task_function
+
+        # Co-scheduled jobs would compete for the NIC they share unless its capacity is known to fit them
+        if self.slots[0].interface_name is None and self.nic_capacity_gbps is None:
+            self.nic_capacity_gbps = detect_nic_capacity_gbps(list(config.network.interface_names))
+            if self.nic_capacity_gbps is None:
+                raise ValueError(
+                    "Cannot determine the NIC capacity shared by parallel jobs from `network.interface_names`, "
+                    "set `hydra.sweeper.parallel.nic_capacity_gbps` or `hydra.sweeper.parallel.interface_names`"
+                )
+
+    def launch(
+        self,
+        job_overrides: Sequence[Sequence[str]],
+        initial_job_idx: int,
+        job_indices: Optional[Sequence[int]] = None,
+    ) -> Sequence[JobReturn]:
+        """Launch the jobs, numbered from `initial_job_idx`, or with the given `job_indices` when resuming a sweep."""
+        setup_globals()
+        assert self.hydra_context is not None
+        assert self.config is not None
+        assert self.task_function is not None
+
+        configure_log(self.config.hydra.hydra_logging, self.config.hydra.verbose)
+        sweep_dir = self.config.hydra.sweep.dir
+        Path(str(sweep_dir)).mkdir(parents=True, exist_ok=True)
+        log.info(
+            f"Launching {len(job_overrides)} jobs on {len(self.slots)} parallel slots "
+            f"(shared NIC capacity: {self.nic_capacity_gbps if self.nic_capacity_gbps is not None else 'none'} Gbps)"
+        )
+
+        if job_indices is None:
+            job_indices = [initial_job_idx + offset for offset in range(len(job_overrides))]
+
+        pending: Deque[Tuple[int, Optional[float]]] = deque()
+        for offset, overrides in enumerate(job_overrides):
+            pending.append((offset, self._check_job(overrides, job_indices[offset])))
+
+        ctx = multiprocessing.get_context("fork")
+        free_slots = list(self.slots)
+        running: Dict[Connection, Tuple[multiprocessing.Process, JobSlot, int, Optional[float]]] = {}
+        runs: Dict[int, JobReturn] = {}
+
+        while pending or running:
+            while free_slots and pending:
+                used_gbps = sum(gbps or 0.0 for _, _, _, gbps in running.values())
+                job = next_schedulable_job(pending, used_gbps, len(running), self.nic_capacity_gbps)
+                if job is None:
+                    break
+                offset, gbps = job
+                slot = free_slots.pop(0)
+                idx = job_indices[offset]
+                sweep_config = self._load_job_config(job_overrides[offset], idx, slot)
+                log.info(
+                    f"\t#{idx} on CPUs {slot.cpus[0]}-{slot.cpus[-1]}"
+                    + (f" and {slot.interface_name}" if slot.interface_name else "")
+                    + f" : {' '.join(filter_overrides(job_overrides[offset]))}"
+                )
+
+                parent_conn, child_conn = ctx.Pipe(duplex=False)
+                process = ctx.Process(target=self._run_in_slot, args=(sweep_config, slot, child_conn))
+                process.start()
+                child_conn.close()
+                running[parent_conn] = (process, slot, offset, gbps)
+
+            for conn in wait(list(running.keys())):
+                process, slot, offset, _ = running.pop(conn)
+                try:
+                    ret = conn.recv()
+                except EOFError:
+                    ret = JobReturn(
+                        overrides=list(job_overrides[offset]),
+                        status=JobStatus.FAILED,
+                        _return_value=RuntimeError(f"Job #{job_indices[offset]} exited without a result"),
+                    )
+                conn.close()
+                process.join()
+                runs[offset] = ret
+                free_slots.append(slot)
+
+        configure_log(self.config.hydra.hydra_logging, self.config.hydra.verbose)
+        return [runs[offset] for offset in range(len(job_overrides))]
+
+    def _check_job(self, overrides: Sequence[str], idx: int) -> Optional[float]:
+        """Reject jobs which cannot run alongside others, and return the throughput the job targets."""
+        assert self.hydra_context is not None
+        job_config = self.hydra_context.config_loader.load_sweep_config(self.config, list(overrides))
+        check_parallel_job(job_config, idx)
+        gbps = job_config.network.maximum_throughput_gbps
+        gbps = float(gbps) if gbps is not None else None
+        if gbps is None:
+            return None
+
+        slot_capacities = [slot.capacity_gbps for slot in self.slots if slot.capacity_gbps is not None]
+        capacity_gbps = min(slot_capacities) if slot_capacities else self.nic_capacity_gbps
+        if capacity_gbps is not None and gbps > capacity_gbps:
+            where = "the interface of a job slot" if slot_capacities else "the shared host NIC capacity"
+            raise ValueError(
+                f"Job #{idx} targets {gbps} Gbps, more than the {capacity_gbps} Gbps of {where}. "
+                "Set `network.maximum_throughput_gbps` to fit, the sweeper's default of 400 Gbps "
+                "(conf/hydra/sweeper/base.yaml) assumes the job has the whole host to itself"
+            )
+        return gbps
+
+    def _load_job_config(self, overrides: Sequence[str], idx: int, slot: JobSlot) -> DictConfig:
+        assert self.hydra_context is not None
+        overrides = list(overrides)
+        if slot.interface_name is not None:
+            overrides.append(f"network.interface_names=[{slot.interface_name}]")
+        sweep_config = self.hydra_context.config_loader.load_sweep_config(self.config, overrides)
+        with open_dict(sweep_config):
+            sweep_config.hydra.job.id = idx
+            sweep_config.hydra.job.num = idx
+        return sweep_config
+
+    def _run_in_slot(self, sweep_config: DictConfig, slot: JobSlot, conn: Connection) -> None:
+        """Runs in the forked child. Pinning the child pins everything it spawns, including mount-s3 and fio."""
+        assert self.hydra_context is not None
+        assert self.task_function is not None
+        os.sched_setaffinity(0, slot.cpus)
+        ret = run_job(
+            hydra_context=self.hydra_context,
+            task_function=self.task_function,
+            config=sweep_config,
+            job_dir_key="hydra.sweep.dir",
+            job_subdir_key="hydra.sweep.subdir",
+        )
+        try:
+            conn.send(ret)
+        except Exception as e:
+            # The job's return value or exception may not be picklable, so report the failure as a string
+            ret.return_value = RuntimeError(f"Job result could not be sent to the launcher: {e}")
+            ret.status = JobStatus.FAILED
+            conn.send(ret)
+        finally:
+            conn.close()
@@ -0,0 +1,74 @@
+"""Read back results of finished benchmark jobs, for sweeps which adapt to earlier results."""
+
+import importlib.util
+import json
+import os
+import random
+import statistics
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+
+# Benchmark output is parsed like `autogroup.py` does, by the module it shares with the other analysis scripts.
+# These are standalone scripts rather than a package, so the module is loaded from its file.
+_spec = importlib.util.spec_from_file_location(
+    'benchmark_output', Path(__file__).resolve().parents[2] / 'analysis-scripts' / 'benchmark_output.py'
+)
+benchmark_output = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(benchmark_output)
+
+
+def read_throughput_gbps(job_dir: str) -> Optional[float]:
+    """Return the throughput of a finished job, or None if it did not produce a valid result."""
+    throughput, _ = benchmark_output.parse_output(job_dir)
+    return throughput
+
+
+def has_job_output(job_dir: str) -> bool:
+    """Return whether a finished job wrote a complete output file, which has no throughput for startup jobs."""
+    return benchmark_output.has_output(job_dir)
+
+
+def read_cpu_cores(job_dir: str) -> Optional[float]:
+    """Return the CPU cores used by the target process of a finished job, as recorded by the harness, if known."""
+    try:
+        with open(os.path.join(job_dir, 'metadata.json'), 'r') as f:
+            return json.load(f).get('target_cpu_cores')
+    except (OSError, ValueError):
+        return None
+
+
+def pareto_ranks(points: Sequence[Tuple[float, float]]) -> List[int]:
+    """Rank of each (throughput, cpu) point by non-dominated sorting, 0 for the Pareto frontier.
+
+    A point dominates another if it has at least its throughput with at most its CPU, and is better in one of them.
+    Points of rank 1 are only dominated by the frontier, and so on.
+    """
+
+    def dominates(a: Tuple[float, float], b: Tuple[float, float]) -> bool:
+        return a[0] >= b[0] and a[1] <= b[1] and a != b
+
+    ranks = [0] * len(points)
+    remaining = set(range(len(points)))
+    rank = 0
+    while remaining:
+        front = {i for i in remaining if not any(dominates(points[j], points[i]) for j in remaining)}
+        for i in front:
+            ranks[i] = rank
+        remaining -= front
+        rank += 1
+    return ranks
+
+
+def bootstrap_median_ci(
+    samples: Sequence[float], confidence: float = 0.95, resamples: int = 1000, seed: int = 0
+) -> Tuple[float, float]:
+    """Percentile bootstrap confidence interval of the median of `samples`."""
+    if not samples:
+        raise ValueError("cannot compute a confidence interval without samples")
+
+    rng = random.Random(seed)
+    medians = sorted(statistics.median(rng.choices(samples, k=len(samples))) for _ in range(resamples))
+    tail = (1 - confidence) / 2
+    low = medians[int(tail * (resamples - 1))]
+    high = medians[int(round((1 - tail) * (resamples - 1)))]
+    return low, high
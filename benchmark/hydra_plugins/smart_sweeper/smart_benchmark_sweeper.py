@@ -1,44 +1,151 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 import itertools
+import json
 import logging
+import math
+import os
+import shutil
+import statistics
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 from hydra.types import HydraContext
 from hydra.core.config_store import ConfigStore
 from hydra.core.override_parser.overrides_parser import OverridesParser
 from hydra.core.override_parser.types import Override
 from hydra.core.plugins import Plugins
+from hydra.core.utils import JobReturn
 from hydra.plugins.launcher import Launcher
 from hydra.plugins.sweeper import Sweeper
 from hydra.types import TaskFunction
-from omegaconf import DictConfig, OmegaConf
+from omegaconf import DictConfig, OmegaConf, open_dict
+
+from .parallel_launcher import ParallelBenchmarkLauncher
+from .results import bootstrap_median_ci, pareto_ranks, read_cpu_cores, read_throughput_gbps
+from .sweep_manifest import MANIFEST_FILE_NAME, SUCCEEDED, ManifestJob, SweepManifest, job_state
 
 log = logging.getLogger(__name__)
 
 
+@dataclass
+class ParallelLaunchConf:
+    enabled: bool = False
+    # CPUs reserved for each job, by default the available CPUs are shared out evenly
+    cpus_per_job: Optional[int] = None
+    # Each concurrent job is given one of these interfaces exclusively
+    interface_names: List[str] = field(default_factory=list)
+    # With `interface_names`, the capacity of each of them, by default its link speed.
+    # Without, the upper bound for the sum of `network.maximum_throughput_gbps` across concurrent jobs
+    nic_capacity_gbps: Optional[float] = None
+
+
+@dataclass
+class AdaptiveIterationsConf:
+    enabled: bool = False
+    min_iterations: int = 3
+    max_iterations: int = 20
+    # Number of further iterations scheduled per round for configurations which have not converged yet
+    round_size: int = 2
+    # A configuration has converged once the width of the confidence interval of its median throughput,
+    # relative to the median, is at most this
+    relative_ci_width: float = 0.05
+    confidence: float = 0.95
+    bootstrap_resamples: int = 1000
+
+
+@dataclass
+class TuneConf:
+    enabled: bool = False
+    # Iterations of each configuration in the first rung, multiplied by `eta` in each further rung
+    min_iterations: int = 1
+    max_iterations: int = 9
+    # Only the best `1 / eta` of the configurations of a rung are run in the next one
+    eta: int = 3
+
+
+# Mount options among the tuned parameters, as `mount_mp_command` passes them to mount-s3
+TUNED_MOUNT_ARGS = {"mountpoint.fuse_threads": "--max-threads"}
+TUNED_MOUNT_ENV = {
+    "mountpoint.mountpoint_max_background": "UNSTABLE_MOUNTPOINT_MAX_BACKGROUND",
+    "mountpoint.mountpoint_congestion_threshold": "UNSTABLE_MOUNTPOINT_CONGESTION_THRESHOLD",
+}
+
+
+def mount_configuration(overrides: Sequence[str]) -> Dict[str, Any]:
+    """The mount-s3 arguments, environment and kernel read-ahead which the mount options among `overrides` set."""
+    values = dict(override.split("=", 1) for override in overrides)
+    values = {key: value for key, value in values.items() if value != "null"}
+    read_ahead_kb = values.get("mountpoint.read_ahead_kb")
+    return {
+        "args": [f"{arg}={values[key]}" for key, arg in TUNED_MOUNT_ARGS.items() if key in values],
+        "env": {name: values[key] for key, name in TUNED_MOUNT_ENV.items() if key in values},
+        "read_ahead_kb": int(read_ahead_kb) if read_ahead_kb is not None else None,
+    }
+
+
 @dataclass
 class SmartBenchmarkSweeperConf:
     _target_: str = "hydra_plugins.smart_sweeper.smart_benchmark_sweeper.SmartBenchmarkSweeper"
     max_batch_size: Optional[int] = None
     params: Optional[Dict[str, str]] = None
+    # Compile the Rust targets needed by all jobs before launching them
+    prebuild: bool = True
+    # Only launch the jobs of `hydra.sweep.dir` which did not succeed yet, keeping their job numbers
+    resume: bool = False
+    parallel: ParallelLaunchConf = field(default_factory=ParallelLaunchConf)
+    adaptive: AdaptiveIterationsConf = field(default_factory=AdaptiveIterationsConf)
+    tune: TuneConf = field(default_factory=TuneConf)
 
 
 ConfigStore.instance().store(group="hydra/sweeper", name="smart_benchmark", node=SmartBenchmarkSweeperConf)
 
 
 class SmartBenchmarkSweeper(Sweeper):
-    def __init__(self, max_batch_size: Optional[int] = None, params: Optional[Dict[str, str]] = None):
+    def __init__(
+        self,
+        max_batch_size: Optional[int] = None,
+        params: Optional[Dict[str, str]] = None,
+        prebuild: bool = True,
+        resume: bool = False,
+        parallel: Optional[Dict[str, Any]] = None,
+        adaptive: Optional[Dict[str, Any]] = None,
+        tune: Optional[Dict[str, Any]] = None,
+    ):
         self.max_batch_size = max_batch_size
         self.params = params or {}
+        self.prebuild = prebuild
+        self.resume = resume
+        self.parallel = ParallelLaunchConf(**(parallel or {}))
+        self.adaptive = AdaptiveIterationsConf(**(adaptive or {}))
+        self.tune = TuneConf(**(tune or {}))
+        if self.adaptive.enabled and not 1 <= self.adaptive.min_iterations <= self.adaptive.max_iterations:
+            raise ValueError("Adaptive iterations require 1 <= min_iterations <= max_iterations")
+        if self.adaptive.enabled and self.resume:
+            raise ValueError("Adaptive iterations cannot be resumed, as they are scheduled from earlier results")
+        if self.tune.enabled:
+            if not 1 <= self.tune.min_iterations <= self.tune.max_iterations or self.tune.eta < 2:
+                raise ValueError("Tuning requires 1 <= min_iterations <= max_iterations and eta >= 2")
+            if self.adaptive.enabled or self.resume:
+                raise ValueError("Tuning cannot be combined with adaptive iterations or resumed")
         self.config: Optional[DictConfig] = None
         self.launcher: Optional[Launcher] = None
         self.hydra_context: Optional[HydraContext] = None
 
     def setup(self, *, hydra_context: HydraContext, task_function: TaskFunction, config: DictConfig) -> None:
         self.config = config
-        self.launcher = Plugins.instance().instantiate_launcher(
-            hydra_context=hydra_context, task_function=task_function, config=config
-        )
+        if self.parallel.enabled:
+            if self.max_batch_size is None:
+                raise ValueError("Parallel launch requires `max_batch_size` to limit the number of concurrent jobs")
+            self.launcher = ParallelBenchmarkLauncher(
+                max_concurrency=self.max_batch_size,
+                cpus_per_job=self.parallel.cpus_per_job,
+                interface_names=self.parallel.interface_names,
+                nic_capacity_gbps=self.parallel.nic_capacity_gbps,
+            )
+            self.launcher.setup(hydra_context=hydra_context, task_function=task_function, config=config)
+        else:
+            self.launcher = Plugins.instance().instantiate_launcher(
+                hydra_context=hydra_context, task_function=task_function, config=config
+            )
         self.hydra_context = hydra_context
 
     def _load_benchmark_params(self, benchmark_type: str) -> List[str]:
@@ -83,14 +190,287 @@ class SmartBenchmarkSweeper(Sweeper):
         log.info(f"Generated {len(all_combinations)} total combinations")
 
         returns = []
-        initial_job_idx = 0
         if all_combinations:
             self.validate_batch_is_legal(all_combinations)
-            results = self.launcher.launch(all_combinations, initial_job_idx=initial_job_idx)
+            if self.adaptive.enabled or self.tune.enabled:
+                if self.prebuild:
+                    self._prebuild(all_combinations)
+                if self.adaptive.enabled:
+                    returns.extend(self._sweep_adaptive(all_combinations, sweep_dir))
+                else:
+                    returns.extend(self._sweep_tune(all_combinations, sweep_dir))
+            else:
+                returns.extend(self._sweep_recorded(all_combinations, sweep_dir))
+
+        return returns
+
+    def _sweep_recorded(self, all_combinations: List[List[str]], sweep_dir: Path) -> List[Sequence[JobReturn]]:
+        """Launch the combinations, recording the state of each job in the sweep manifest.
+
+        When resuming, the jobs which already succeeded are skipped, and the others are launched again
+        with the same job numbers, into the same job directories.
+        """
+        manifest = SweepManifest.load(sweep_dir) if self.resume else SweepManifest(sweep_dir / MANIFEST_FILE_NAME)
+        jobs = manifest.assign_job_nums(all_combinations)
+        if self.resume:
+            for job in jobs:
+                job.state = job_state(self._job_dir(job))
+            succeeded = sum(job.state == SUCCEEDED for job in jobs)
+            log.info(f"Resuming sweep in {sweep_dir}: {succeeded} of {len(jobs)} jobs already succeeded")
+        manifest.save()
+
+        pending = [job for job in jobs if job.state != SUCCEEDED]
+        if not pending:
+            return []
+        if self.prebuild:
+            self._prebuild([job.overrides for job in pending])
+        if self.resume:
+            for job in pending:
+                job_dir = self._job_dir(job)
+                if os.path.isdir(job_dir):
+                    # Output of the earlier attempt would be mistaken for that of the new one
+                    log.info(f"Removing the output of failed job #{job.job_num} in {job_dir}")
+                    shutil.rmtree(job_dir)
+
+        returns = self._launch_jobs(pending)
+        for job in pending:
+            job.state = job_state(self._job_dir(job))
+        manifest.save()
+        return returns
+
+    def _launch_jobs(self, jobs: List[ManifestJob]) -> List[Sequence[JobReturn]]:
+        """Launch jobs with the given job numbers.
+
+        Launchers number jobs consecutively from `initial_job_idx`, so jobs are launched in runs of consecutive
+        numbers, except by the parallel launcher which takes the number of each job.
+        """
+        if isinstance(self.launcher, ParallelBenchmarkLauncher):
+            overrides = [job.overrides for job in jobs]
+            return [self.launcher.launch(overrides, initial_job_idx=0, job_indices=[job.job_num for job in jobs])]
+
+        returns = []
+        run: List[ManifestJob] = []
+        for job in sorted(jobs, key=lambda job: job.job_num):
+            if run and job.job_num != run[-1].job_num + 1:
+                returns.append(self.launcher.launch([job.overrides for job in run], initial_job_idx=run[0].job_num))
+                run = []
+            run.append(job)
+        returns.append(self.launcher.launch([job.overrides for job in run], initial_job_idx=run[0].job_num))
+        return returns
+
+    def _job_dir(self, job: ManifestJob) -> str:
+        """Output directory of a job, as `hydra.sweep.subdir` resolves for its overrides and number."""
+        job_config = self.hydra_context.config_loader.load_sweep_config(self.config, list(job.overrides))
+        with open_dict(job_config):
+            job_config.hydra.job.id = job.job_num
+            job_config.hydra.job.num = job.job_num
+        return os.path.join(str(job_config.hydra.sweep.dir), str(job_config.hydra.sweep.subdir))
+
+    def _prebuild(self, all_combinations: List[List[str]]) -> None:
+        """Compile each distinct build variant once, so jobs pick up the executables from the build cache."""
+        # Imported here, as the harness modules are only importable when running from the benchmark directory
+        from benchmarks.prebuild import prebuild_for_configs
+
+        configs = (
+            self.hydra_context.config_loader.load_sweep_config(self.config, combination)
+            for combination in all_combinations
+        )
+        prebuild_for_configs(configs)
+
+    def _sweep_adaptive(self, all_combinations: List[List[str]], sweep_dir: Path) -> List[Sequence[JobReturn]]:
+        """Run iterations of each configuration in rounds, until its median throughput is known precisely enough.
+
+        The `iteration` parameter of the combinations is ignored, iterations are instead numbered as they are scheduled.
+        """
+        configurations = self._configurations(all_combinations)
+        log.info(
+            f"Running {len(configurations)} configurations for {self.adaptive.min_iterations} to "
+            f"{self.adaptive.max_iterations} iterations each"
+        )
+
+        throughputs: List[List[float]] = [[] for _ in configurations]
+        launched = [0] * len(configurations)
+        active = list(range(len(configurations)))
+        returns = []
+        next_job_idx = 0
+        while active:
+            batch = []
+            batch_configurations = []
+            for i in active:
+                count = self.adaptive.min_iterations if launched[i] == 0 else self.adaptive.round_size
+                for _ in range(min(count, self.adaptive.max_iterations - launched[i])):
+                    batch.append(configurations[i] + [f"iteration={launched[i]}"])
+                    batch_configurations.append(i)
+                    launched[i] += 1
+
+            results = self.launcher.launch(batch, initial_job_idx=next_job_idx)
+            next_job_idx += len(batch)
             returns.append(results)
 
+            for i, result in zip(batch_configurations, results):
+                throughput = self._read_job_throughput(result)
+                if throughput is not None:
+                    throughputs[i].append(throughput)
+
+            still_active = []
+            for i in active:
+                if self._has_converged(throughputs[i]):
+                    log.info(f"Converged after {launched[i]} iterations: {' '.join(configurations[i])}")
+                elif launched[i] >= self.adaptive.max_iterations:
+                    log.warning(f"Did not converge within {launched[i]} iterations: {' '.join(configurations[i])}")
+                else:
+                    still_active.append(i)
+            active = still_active
+
+        summary = []
+        for configuration, samples, iterations in zip(configurations, throughputs, launched):
+            ci = (
+                bootstrap_median_ci(samples, self.adaptive.confidence, self.adaptive.bootstrap_resamples)
+                if samples
+                else None
+            )
+            summary.append(
+                {
+                    "overrides": configuration,
+                    "iterations": iterations,
+                    "throughputs_gbps": samples,
+                    "median_ci_gbps": ci,
+                    "converged": self._has_converged(samples),
+                }
+            )
+        with open(sweep_dir / "adaptive_iterations.json", "w") as f:
+            json.dump(summary, f, indent=2)
+
         return returns
 
+    def _sweep_tune(self, all_combinations: List[List[str]], sweep_dir: Path) -> List[Sequence[JobReturn]]:
+        """Search the configurations for the best trade-offs of throughput and CPU by successive halving.
+
+        All configurations are run for `min_iterations` in the first rung. Configurations are ranked by the Pareto
+        frontier of their median throughput and the median CPU cores used by the mount, then by throughput,
+        and only the best `1 / eta` are run for `eta` times as many iterations in the next rung.
+        Like adaptive iterations, the `iteration` parameter of the combinations is ignored.
+        """
+        configurations = self._configurations(all_combinations)
+        log.info(f"Tuning {len(configurations)} configurations by successive halving, eta={self.tune.eta}")
+
+        throughputs: List[List[float]] = [[] for _ in configurations]
+        cpu_cores: List[List[float]] = [[] for _ in configurations]
+        launched = [0] * len(configurations)
+        rungs = [0] * len(configurations)
+        active = list(range(len(configurations)))
+        returns = []
+        next_job_idx = 0
+        rung = 0
+        iterations = self.tune.min_iterations
+        while True:
+            batch = []
+            batch_configurations = []
+            for i in active:
+                # Iterations of earlier rungs are kept, only the further ones are run
+                for iteration in range(launched[i], iterations):
+                    batch.append(configurations[i] + [f"iteration={iteration}"])
+                    batch_configurations.append(i)
+                launched[i] = iterations
+                rungs[i] = rung
+
+            results = self.launcher.launch(batch, initial_job_idx=next_job_idx)
+            next_job_idx += len(batch)
+            returns.append(results)
+            for i, result in zip(batch_configurations, results):
+                job_dir = self._job_output_dir(result)
+                if job_dir is None:
+                    continue
+                if (throughput := read_throughput_gbps(job_dir)) is not None:
+                    throughputs[i].append(throughput)
+                if (cores := read_cpu_cores(job_dir)) is not None:
+                    cpu_cores[i].append(cores)
+
+            if len(active) <= 1 or iterations >= self.tune.max_iterations:
+                break
+            ranked = self._rank_configurations(active, throughputs, cpu_cores)
+            active = ranked[: max(1, math.ceil(len(active) / self.tune.eta))]
+            iterations = min(iterations * self.tune.eta, self.tune.max_iterations)
+            rung += 1
+            log.info(f"Rung {rung}: running {len(active)} configurations for {iterations} iterations")
+
+        medians = [self._tune_point(throughputs[i], cpu_cores[i]) for i in range(len(configurations))]
+        ranks = pareto_ranks(medians)
+        recommended = self._rank_configurations(active, throughputs, cpu_cores)[0]
+        log.info(f"Recommended configuration: {' '.join(configurations[recommended])}")
+        summary = {
+            "configurations": [
+                {
+                    "overrides": configuration,
+                    "rung": rungs[i],
+                    "iterations": launched[i],
+                    "throughputs_gbps": throughputs[i],
+                    "cpu_cores": cpu_cores[i],
+                    "median_throughput_gbps": statistics.median(throughputs[i]) if throughputs[i] else None,
+                    "median_cpu_cores": statistics.median(cpu_cores[i]) if cpu_cores[i] else None,
+                    "pareto": ranks[i] == 0 and bool(throughputs[i]),
+                }
+                for i, configuration in enumerate(configurations)
+            ],
+            "recommended": {
+                "overrides": configurations[recommended],
+                "mount": mount_configuration(configurations[recommended]),
+            },
+        }
+        with open(sweep_dir / "tune.json", "w") as f:
+            json.dump(summary, f, indent=2)
+
+        return returns
+
+    @staticmethod
+    def _tune_point(throughputs: List[float], cpu_cores: List[float]) -> Tuple[float, float]:
+        """Median throughput and CPU cores, the worst of each if unknown, so that failed configurations rank last."""
+        throughput = statistics.median(throughputs) if throughputs else 0.0
+        cores = statistics.median(cpu_cores) if cpu_cores else math.inf
+        return throughput, cores
+
+    def _rank_configurations(
+        self, indices: List[int], throughputs: List[List[float]], cpu_cores: List[List[float]]
+    ) -> List[int]:
+        """Configurations from best to worst, by their Pareto rank of throughput and CPU, then by throughput."""
+        points = [self._tune_point(throughputs[i], cpu_cores[i]) for i in indices]
+        ranks = pareto_ranks(points)
+        order = sorted(range(len(indices)), key=lambda k: (ranks[k], -points[k][0]))
+        return [indices[k] for k in order]
+
+    @staticmethod
+    def _configurations(all_combinations: List[List[str]]) -> List[List[str]]:
+        """Distinct configurations of the combinations, without their `iteration` parameter."""
+        configurations: List[List[str]] = []
+        for combination in all_combinations:
+            configuration = [override for override in combination if not override.startswith("iteration=")]
+            if configuration not in configurations:
+                configurations.append(configuration)
+        return configurations
+
+    def _has_converged(self, throughputs: List[float]) -> bool:
+        if len(throughputs) < self.adaptive.min_iterations:
+            return False
+        median = statistics.median(throughputs)
+        if median <= 0:
+            return False
+        low, high = bootstrap_median_ci(throughputs, self.adaptive.confidence, self.adaptive.bootstrap_resamples)
+        return (high - low) / median <= self.adaptive.relative_ci_width
+
+    def _read_job_throughput(self, result: JobReturn) -> Optional[float]:
+        job_dir = self._job_output_dir(result)
+        if job_dir is None:
+            return None
+        return read_throughput_gbps(job_dir)
+
+    @staticmethod
+    def _job_output_dir(result: JobReturn) -> Optional[str]:
+        if result.hydra_cfg is not None:
+            job_dir = result.hydra_cfg.hydra.runtime.output_dir
+        else:
+            job_dir = result.working_dir
+        return str(job_dir) if job_dir is not None else None
+
     def _extract_benchmark_types(self, arguments: List[str]) -> List[str]:
         for arg in arguments:
             if arg.startswith("benchmark_type="):
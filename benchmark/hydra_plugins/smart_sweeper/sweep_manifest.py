@@ -0,0 +1,98 @@
+"""Record of the jobs of a sweep and how they ended, so that an interrupted sweep can be resumed."""
+
+import hashlib
+import json
+import logging
+import os
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, List, Sequence
+
+from .results import has_job_output
+
+log = logging.getLogger(__name__)
+
+MANIFEST_FILE_NAME = "sweep_manifest.json"
+
+# States of a job, only succeeded jobs are skipped when resuming
+PENDING = "pending"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+MISSING = "missing"
+
+
+def overrides_hash(overrides: Sequence[str]) -> str:
+    """Identify a combination by its overrides, whatever their order."""
+    return hashlib.sha256(json.dumps(sorted(overrides)).encode()).hexdigest()[:16]
+
+
+def job_state(job_dir: str) -> str:
+    """State of a job from its output directory.
+
+    A job succeeded if the harness recorded it in `metadata.json` and the benchmark wrote a complete output file.
+    A job which started but did not get that far, for example as the sweep was killed, failed.
+    """
+    if not os.path.isdir(job_dir):
+        return MISSING
+    try:
+        with open(os.path.join(job_dir, "metadata.json"), "r") as f:
+            success = json.load(f).get("success", False)
+    except (OSError, ValueError):
+        success = False
+    return SUCCEEDED if success and has_job_output(job_dir) else FAILED
+
+
+@dataclass
+class ManifestJob:
+    job_num: int
+    hash: str
+    overrides: List[str]
+    state: str = PENDING
+
+
+class SweepManifest:
+    """Jobs of a sweep, by job number, written to `sweep_manifest.json` in the sweep directory.
+
+    Job numbers are assigned once, so the same combination keeps its number and job directory across resumed runs.
+    """
+
+    def __init__(self, path: Path, jobs: Sequence[ManifestJob] = ()):
+        self.path = path
+        self.jobs: Dict[int, ManifestJob] = {job.job_num: job for job in jobs}
+
+    @classmethod
+    def load(cls, sweep_dir: Path) -> "SweepManifest":
+        """Load the manifest of a sweep, or start an empty one if it has none."""
+        path = sweep_dir / MANIFEST_FILE_NAME
+        if not path.exists():
+            log.warning(f"No {MANIFEST_FILE_NAME} in {sweep_dir}, all jobs will be launched")
+            return cls(path)
+        with open(path, "r") as f:
+            data = json.load(f)
+        return cls(path, [ManifestJob(**job) for job in data["jobs"]])
+
+    def save(self) -> None:
+        # Written to a temporary file first, so an interrupted sweep never leaves a truncated manifest
+        tmp_path = self.path.with_suffix(".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump({"jobs": [asdict(job) for job in sorted(self.jobs.values(), key=lambda job: job.job_num)]}, f)
+        os.replace(tmp_path, self.path)
+
+    def assign_job_nums(self, combinations: Sequence[Sequence[str]]) -> List[ManifestJob]:
+        """The job of each combination, reusing recorded jobs and numbering new combinations after them."""
+        recorded: Dict[str, List[ManifestJob]] = {}
+        for job in sorted(self.jobs.values(), key=lambda job: job.job_num):
+            recorded.setdefault(job.hash, []).append(job)
+
+        next_job_num = max(self.jobs, default=-1) + 1
+        assigned = []
+        for overrides in combinations:
+            combination_hash = overrides_hash(overrides)
+            if recorded.get(combination_hash):
+                job = recorded[combination_hash].pop(0)
+            else:
+                job = ManifestJob(job_num=next_job_num, hash=combination_hash, overrides=list(overrides))
+                self.jobs[job.job_num] = job
+                next_job_num += 1
+            assigned.append(job)
+        return assigned
@@ -0,0 +1,132 @@
+from array import array
+import json
+import logging
+import math
+import os
+import statistics
+import threading
+import time
+from typing import Dict, Optional, Sequence
+
+from .base import MonitoringTool
+from .npy import write_npy_columns
+
+log = logging.getLogger(__name__)
+
+# Fields of /proc/<pid>/smaps_rollup, in kB, and their columns in bytes
+SMAPS_ROLLUP_FIELDS = {
+    "Rss": "rss_bytes",
+    "Pss": "pss_bytes",
+    "Pss_Anon": "pss_anon_bytes",
+    "Swap": "swap_bytes",
+}
+
+COLUMNS = ["time"] + list(SMAPS_ROLLUP_FIELDS.values())
+
+
+def parse_smaps_rollup(content: str) -> Dict[str, float]:
+    """Parse the memory of a process in bytes from /proc/<pid>/smaps_rollup."""
+    values = {}
+    for line in content.splitlines():
+        key, _, value = line.partition(":")
+        if key in SMAPS_ROLLUP_FIELDS:
+            values[SMAPS_ROLLUP_FIELDS[key]] = float(value.split()[0]) * 1024
+    return values
+
+
+def summarize(values: Sequence[float]) -> Optional[Dict[str, float]]:
+    """Peak, 99th percentile and steady-state level of a memory time series.
+
+    The steady-state level is the median of the second half of the series, which is assumed to be past the ramp.
+    """
+    values = [value for value in values if not math.isnan(value)]
+    if not values:
+        return None
+    ordered = sorted(values)
+    return {
+        "peak": ordered[-1],
+        "p99": ordered[min(len(ordered) - 1, math.ceil(0.99 * len(ordered)) - 1)],
+        "steady": statistics.median(values[len(values) // 2 :]),
+    }
+
+
+class MemorySamplerTool(MonitoringTool):
+    """Samples the resident (RSS) and proportional (PSS) memory of the target process at a high frequency.
+
+    The time series is written to `memory.npy`, and its peak, 99th percentile and steady-state level to `memory.json`,
+    along with whether the peak RSS exceeded the memory target the process was given, if any.
+    """
+
+    def __init__(
+        self,
+        target_pid: int,
+        interval_secs: float = 0.02,
+        memory_target_bytes: Optional[int] = None,
+        output_dir: str = ".",
+    ):
+        self.target_pid = target_pid
+        self.interval_secs = interval_secs
+        self.memory_target_bytes = memory_target_bytes
+        self.output_dir = output_dir
+        self.columns: Dict[str, array] = {column: array("d") for column in COLUMNS}
+        self.thread: Optional[threading.Thread] = None
+        self.stop_event = threading.Event()
+        self.fd: Optional[int] = None
+
+    def start(self) -> None:
+        path = f"/proc/{self.target_pid}/smaps_rollup"
+        try:
+            self.fd = os.open(path, os.O_RDONLY)
+        except OSError as e:
+            log.warning(f"Cannot sample memory from {path}: {e}")
+            return
+
+        log.info(f"Starting memory sampling of pid {self.target_pid} every {self.interval_secs * 1000:.0f}ms")
+        self.thread = threading.Thread(target=self._run, name="memory-sampler", daemon=True)
+        self.thread.start()
+
+    def stop(self) -> None:
+        if self.thread:
+            self.stop_event.set()
+            self.thread.join()
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+        try:
+            write_npy_columns(os.path.join(self.output_dir, "memory.npy"), self.columns)
+            with open(os.path.join(self.output_dir, "memory.json"), "w") as f:
+                json.dump(self.summary(), f, indent=2)
+            log.info(f"Wrote {len(self.columns['time'])} memory samples to {self.output_dir}")
+        except Exception:
+            log.error("Error writing memory samples:", exc_info=True)
+
+    def summary(self) -> Dict[str, Optional[object]]:
+        summary: Dict[str, Optional[object]] = {
+            "samples": len(self.columns["time"]),
+            "interval_secs": self.interval_secs,
+            "memory_target_bytes": self.memory_target_bytes,
+        }
+        for column in COLUMNS[1:]:
+            summary[column] = summarize(self.columns[column])
+        rss = summary["rss_bytes"]
+        if self.memory_target_bytes is not None and rss is not None:
+            summary["exceeded_target"] = rss["peak"] > self.memory_target_bytes
+        return summary
+
+    def _run(self) -> None:
+        start = time.monotonic()
+        next_sample = start
+        while not self.stop_event.is_set():
+            try:
+                content = os.pread(self.fd, 1 << 12, 0).decode()
+            except OSError:
+                # The target process has exited
+                break
+            values = parse_smaps_rollup(content)
+            values["time"] = time.monotonic() - start
+            for column, samples in self.columns.items():
+                samples.append(values.get(column, math.nan))
+            # Schedule against the start time, so that slow samples do not make the series drift
+            next_sample += self.interval_secs
+            self.stop_event.wait(max(0.0, next_sample - time.monotonic()))
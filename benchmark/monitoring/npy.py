@@ -0,0 +1,44 @@
+"""Minimal writer for NumPy's `.npy` format, so that monitoring output can be loaded with `numpy.load`
+without the harness depending on NumPy."""
+
+from array import array
+import struct
+import sys
+from typing import Dict, List
+
+NPY_MAGIC = b"\x93NUMPY\x01\x00"
+NPY_ALIGNMENT = 64
+
+
+def write_npy_columns(path: str, columns: Dict[str, array]) -> None:
+    """Write equally long float64 columns as a 1-D structured array with one named field per column.
+
+    The result loads with `numpy.load(path)`, and each column is then accessible by name, e.g. `data["time"]`.
+    """
+    names: List[str] = list(columns)
+    lengths = {len(column) for column in columns.values()}
+    if len(lengths) > 1:
+        raise ValueError(f"columns must have the same length, got lengths {sorted(lengths)}")
+    length = lengths.pop() if lengths else 0
+
+    descr = ", ".join(f"('{name}', '<f8')" for name in names)
+    header = f"{{'descr': [{descr}], 'fortran_order': False, 'shape': ({length},), }}"
+    # The header is padded with spaces and terminated by a newline, such that the data is aligned
+    padding = -(len(NPY_MAGIC) + 2 + len(header) + 1) % NPY_ALIGNMENT
+    header_bytes = (header + " " * padding + "\n").encode("latin1")
+
+    # Interleave columns into rows, as the structured array is stored row by row
+    rows = array("d", bytes(8 * length * len(names)))
+    for i, name in enumerate(names):
+        column = columns[name]
+        if column.typecode != "d":
+            column = array("d", column)
+        rows[i :: len(names)] = column
+    if sys.byteorder != "little":
+        rows.byteswap()
+
+    with open(path, "wb") as f:
+        f.write(NPY_MAGIC)
+        f.write(struct.pack("<H", len(header_bytes)))
+        f.write(header_bytes)
+        rows.tofile(f)
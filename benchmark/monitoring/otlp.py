@@ -0,0 +1,415 @@
+"""
+Local stand-in for an OpenTelemetry collector, recording the metrics Mountpoint exports with `--otlp-endpoint`.
+
+Mountpoint exports metrics over OTLP/HTTP as binary protobuf `ExportMetricsServiceRequest` messages,
+POSTed to `<endpoint>/v1/metrics`. The few messages of the metrics data model used here are decoded directly
+from the protobuf wire format, so that no OpenTelemetry or protobuf packages are needed.
+
+Each export becomes one row of a columnar time series, with one column per counter or gauge and its attributes,
+and one column per statistic of each histogram (e.g. `<name>[<attributes>].p99`), written to `otlp_metrics.npy`,
+with a summary of each column in `otlp_metrics.json`. Exports are grouped by the path they were sent to,
+so that several mounts given endpoints under different paths are recorded separately.
+"""
+
+import gzip
+import logging
+import math
+import os
+import struct
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from .base import MonitoringTool
+from .series import MetricsSeries
+
+log = logging.getLogger(__name__)
+
+OTLP_METRICS_PATH = "/v1/metrics"
+
+OTLP_SERIES_FILE = "otlp_metrics.npy"
+OTLP_SUMMARY_FILE = "otlp_metrics.json"
+
+# Percentiles estimated from the buckets of each histogram data point
+HISTOGRAM_PERCENTILES = {"p50": 0.5, "p90": 0.9, "p99": 0.99}
+
+# Protobuf wire types
+VARINT = 0
+FIXED64 = 1
+LENGTH_DELIMITED = 2
+FIXED32 = 5
+
+
+def read_varint(buf: bytes, pos: int) -> Tuple[int, int]:
+    """Decode the varint at `pos`, returning it and the position after it."""
+    result = 0
+    shift = 0
+    while True:
+        if pos >= len(buf):
+            raise ValueError("Truncated varint")
+        byte = buf[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return result, pos
+        shift += 7
+
+
+def iter_fields(buf: bytes) -> Iterator[Tuple[int, int, Any]]:
+    """
+    Fields of a protobuf message as (field number, wire type, value).
+
+    Values are ints for varints, and raw bytes for the other wire types, as their type depends on the schema.
+    """
+    pos = 0
+    while pos < len(buf):
+        key, pos = read_varint(buf, pos)
+        number, wire_type = key >> 3, key & 0x7
+        if wire_type == VARINT:
+            value, pos = read_varint(buf, pos)
+        elif wire_type == FIXED64:
+            value, pos = buf[pos : pos + 8], pos + 8
+        elif wire_type == LENGTH_DELIMITED:
+            length, pos = read_varint(buf, pos)
+            value, pos = buf[pos : pos + length], pos + length
+        elif wire_type == FIXED32:
+            value, pos = buf[pos : pos + 4], pos + 4
+        else:
+            raise ValueError(f"Unsupported wire type {wire_type} of field {number}")
+        if pos > len(buf):
+            raise ValueError(f"Truncated field {number}")
+        yield number, wire_type, value
+
+
+def _double(value: bytes) -> float:
+    return struct.unpack("<d", value)[0]
+
+
+def _fixed64(value: bytes) -> int:
+    return struct.unpack("<Q", value)[0]
+
+
+def _sint(value: int) -> int:
+    """Decode a zigzag-encoded sint32/sint64."""
+    return (value >> 1) ^ -(value & 1)
+
+
+def _repeated_fixed64(wire_type: int, value: bytes, unpack: str) -> List[Any]:
+    """Values of a repeated 64-bit field, which is packed into one length-delimited field by default."""
+    if wire_type == LENGTH_DELIMITED:
+        return list(struct.unpack(f"<{len(value) // 8}{unpack}", value))
+    return [struct.unpack(f"<{unpack}", value)[0]]
+
+
+def _repeated_varint(wire_type: int, value: Any) -> List[int]:
+    if wire_type != LENGTH_DELIMITED:
+        return [value]
+    values = []
+    pos = 0
+    while pos < len(value):
+        item, pos = read_varint(value, pos)
+        values.append(item)
+    return values
+
+
+def decode_any_value(buf: bytes) -> Any:
+    for number, wire_type, value in iter_fields(buf):
+        if number == 1:  # string_value
+            return value.decode("utf-8", errors="replace")
+        if number == 2:  # bool_value
+            return bool(value)
+        if number == 3:  # int_value
+            return value - (1 << 64) if value >= 1 << 63 else value
+        if number == 4:  # double_value
+            return _double(value)
+        if number == 7:  # bytes_value
+            return value.hex()
+    # Arrays and key/value lists are not used by Mountpoint
+    return None
+
+
+def decode_attributes(fields: List[bytes]) -> Dict[str, Any]:
+    """Decode repeated `KeyValue` attributes."""
+    attributes = {}
+    for buf in fields:
+        key = None
+        value = None
+        for number, _, field in iter_fields(buf):
+            if number == 1:
+                key = field.decode("utf-8", errors="replace")
+            elif number == 2:
+                value = decode_any_value(field)
+        if key is not None:
+            attributes[key] = value
+    return attributes
+
+
+def decode_number_data_point(buf: bytes) -> Dict[str, Any]:
+    point: Dict[str, Any] = {"attributes": []}
+    for number, wire_type, value in iter_fields(buf):
+        if number == 7:
+            point["attributes"].append(value)
+        elif number == 3:
+            point["time_unix_nano"] = _fixed64(value)
+        elif number == 4:  # as_double
+            point["value"] = _double(value)
+        elif number == 6:  # as_int, an sfixed64
+            point["value"] = float(struct.unpack("<q", value)[0])
+    point["attributes"] = decode_attributes(point["attributes"])
+    return point
+
+
+def decode_histogram_data_point(buf: bytes) -> Dict[str, Any]:
+    point: Dict[str, Any] = {"attributes": [], "bucket_counts": [], "explicit_bounds": []}
+    for number, wire_type, value in iter_fields(buf):
+        if number == 9:
+            point["attributes"].append(value)
+        elif number == 3:
+            point["time_unix_nano"] = _fixed64(value)
+        elif number == 4:
+            point["count"] = _fixed64(value)
+        elif number == 5:
+            point["sum"] = _double(value)
+        elif number == 6:
+            point["bucket_counts"] += _repeated_fixed64(wire_type, value, "Q")
+        elif number == 7:
+            point["explicit_bounds"] += _repeated_fixed64(wire_type, value, "d")
+        elif number == 11:
+            point["min"] = _double(value)
+        elif number == 12:
+            point["max"] = _double(value)
+    point["attributes"] = decode_attributes(point["attributes"])
+    return point
+
+
+def decode_buckets(buf: bytes) -> Tuple[int, List[int]]:
+    """Decode exponential histogram `Buckets` into their offset and counts."""
+    offset = 0
+    counts: List[int] = []
+    for number, wire_type, value in iter_fields(buf):
+        if number == 1:
+            offset = _sint(value)
+        elif number == 2:
+            counts += _repeated_varint(wire_type, value)
+    return offset, counts
+
+
+def decode_exponential_histogram_data_point(buf: bytes) -> Dict[str, Any]:
+    point: Dict[str, Any] = {"attributes": [], "scale": 0, "zero_count": 0, "positive": (0, []), "negative": (0, [])}
+    for number, wire_type, value in iter_fields(buf):
+        if number == 1:
+            point["attributes"].append(value)
+        elif number == 3:
+            point["time_unix_nano"] = _fixed64(value)
+        elif number == 4:
+            point["count"] = _fixed64(value)
+        elif number == 5:
+            point["sum"] = _double(value)
+        elif number == 6:
+            point["scale"] = _sint(value)
+        elif number == 7:
+            point["zero_count"] = _fixed64(value)
+        elif number == 8:
+            point["positive"] = decode_buckets(value)
+        elif number == 9:
+            point["negative"] = decode_buckets(value)
+        elif number == 12:
+            point["min"] = _double(value)
+        elif number == 13:
+            point["max"] = _double(value)
+    point["attributes"] = decode_attributes(point["attributes"])
+    return point
+
+
+# Data fields of `Metric`, and the decoder of the data points they hold in their field 1
+METRIC_DATA = {
+    5: ("gauge", decode_number_data_point),
+    7: ("sum", decode_number_data_point),
+    9: ("histogram", decode_histogram_data_point),
+    10: ("exponential_histogram", decode_exponential_histogram_data_point),
+}
+
+
+def decode_metric(buf: bytes) -> Dict[str, Any]:
+    metric: Dict[str, Any] = {"name": "", "unit": "", "type": None, "data_points": []}
+    for number, _, value in iter_fields(buf):
+        if number == 1:
+            metric["name"] = value.decode("utf-8", errors="replace")
+        elif number == 3:
+            metric["unit"] = value.decode("utf-8", errors="replace")
+        elif number in METRIC_DATA:
+            metric["type"], decode_point = METRIC_DATA[number]
+            for data_number, _, data_value in iter_fields(value):
+                if data_number == 1:
+                    metric["data_points"].append(decode_point(data_value))
+    return metric
+
+
+def decode_export_request(buf: bytes) -> List[Dict[str, Any]]:
+    """Decode the metrics of an `ExportMetricsServiceRequest`, across all its resources and scopes."""
+    metrics = []
+    for number, _, resource_metrics in iter_fields(buf):
+        if number != 1:
+            continue
+        for resource_number, _, scope_metrics in iter_fields(resource_metrics):
+            if resource_number != 2:
+                continue
+            for scope_number, _, metric in iter_fields(scope_metrics):
+                if scope_number == 2:
+                    metrics.append(decode_metric(metric))
+    return metrics
+
+
+def explicit_percentile(point: Dict[str, Any], quantile: float) -> float:
+    """Estimate a percentile of an explicit bucket histogram as the upper bound of the bucket it falls in."""
+    rank = quantile * point.get("count", 0)
+    cumulative = 0
+    bounds = point["explicit_bounds"]
+    for i, count in enumerate(point["bucket_counts"]):
+        cumulative += count
+        if count and cumulative >= rank:
+            upper = bounds[i] if i < len(bounds) else math.inf
+            return min(upper, point.get("max", math.inf))
+    return math.nan
+
+
+def exponential_percentile(point: Dict[str, Any], quantile: float) -> float:
+    """
+    Estimate a percentile of an exponential histogram as the upper bound of the bucket it falls in.
+
+    Bucket `index` of the positive range holds values in (base^index, base^(index + 1)], with base 2^(2^-scale).
+    """
+    rank = quantile * point.get("count", 0)
+    base = 2 ** (2 ** -point["scale"])
+    # Mountpoint does not record negative values, so only zero and positive buckets are expected
+    cumulative = sum(point["negative"][1]) + point["zero_count"]
+    if point["zero_count"] and cumulative >= rank:
+        return 0.0
+    offset, counts = point["positive"]
+    for i, count in enumerate(counts):
+        cumulative += count
+        if count and cumulative >= rank:
+            return min(base ** (offset + i + 1), point.get("max", math.inf))
+    return math.nan
+
+
+def format_attributes(attributes: Dict[str, Any]) -> str:
+    """Attributes as `[key=value,...]`, like the labels of the metrics Mountpoint logs."""
+    if not attributes:
+        return ""
+    return "[" + ",".join(f"{key}={value}" for key, value in sorted(attributes.items())) + "]"
+
+
+def metric_values(metrics: List[Dict[str, Any]]) -> Dict[str, float]:
+    """Values of decoded metrics by column name."""
+    values = {}
+    for metric in metrics:
+        for point in metric["data_points"]:
+            key = metric["name"] + format_attributes(point["attributes"])
+            if metric["type"] in ("gauge", "sum"):
+                if "value" in point:
+                    values[key] = point["value"]
+                continue
+
+            values[f"{key}.count"] = float(point.get("count", 0))
+            for statistic in ("sum", "min", "max"):
+                if statistic in point:
+                    values[f"{key}.{statistic}"] = point[statistic]
+            percentile = explicit_percentile if metric["type"] == "histogram" else exponential_percentile
+            if point.get("count"):
+                for name, quantile in HISTOGRAM_PERCENTILES.items():
+                    values[f"{key}.{name}"] = percentile(point, quantile)
+    return values
+
+
+class OtlpReceiverServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], receiver: "OtlpReceiverTool"):
+        super().__init__(address, OtlpRequestHandler)
+        self.receiver = receiver
+
+
+class OtlpRequestHandler(BaseHTTPRequestHandler):
+    server: OtlpReceiverServer
+
+    def do_POST(self) -> None:
+        path = self.path.split("?", 1)[0]
+        if not path.endswith(OTLP_METRICS_PATH):
+            self.send_error(404)
+            return
+
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        try:
+            if self.headers.get("Content-Encoding") == "gzip":
+                body = gzip.decompress(body)
+            metrics = decode_export_request(body)
+        except (ValueError, OSError, struct.error) as e:
+            log.warning(f"Invalid OTLP metrics export to {path}: {e}")
+            self.send_error(400)
+            return
+
+        self.server.receiver.record(path[: -len(OTLP_METRICS_PATH)].strip("/"), metrics)
+        # An empty `ExportMetricsServiceResponse` means that all data points were accepted
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-protobuf")
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, format: str, *args: Any) -> None:
+        log.debug(format, *args)
+
+
+class OtlpReceiverTool(MonitoringTool):
+    """Receives the OTLP metrics exported by Mountpoint on a local HTTP server, for the duration of a run.
+
+    Exports sent to `<endpoint>/<path>/v1/metrics` are written to `<output_dir>/<path>/otlp_metrics.npy`
+    and `otlp_metrics.json`.
+    """
+
+    def __init__(self, output_dir: str = ".", host: str = "127.0.0.1", port: int = 0):
+        self.output_dir = output_dir
+        self.host = host
+        self.port = port
+        self.series: Dict[str, MetricsSeries] = {}
+        self.lock = threading.Lock()
+        self.server: Optional[OtlpReceiverServer] = None
+        self.thread: Optional[threading.Thread] = None
+        self.start_time = time.monotonic()
+
+    @property
+    def endpoint(self) -> str:
+        """Endpoint to export metrics to, to which Mountpoint appends `/v1/metrics`."""
+        return f"http://{self.host}:{self.server.server_address[1]}"
+
+    def start(self) -> None:
+        self.start_time = time.monotonic()
+        self.server = OtlpReceiverServer((self.host, self.port), self)
+        self.thread = threading.Thread(target=self.server.serve_forever, name="otlp-receiver", daemon=True)
+        self.thread.start()
+        log.info(f"OTLP metrics receiver listening on {self.endpoint}")
+
+    def record(self, path: str, metrics: List[Dict[str, Any]]) -> None:
+        values = metric_values(metrics)
+        with self.lock:
+            series = self.series.setdefault(path, MetricsSeries())
+            series.add_row(time.monotonic() - self.start_time, values)
+
+    def stop(self) -> None:
+        if self.server is None:
+            return
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+        self.server = None
+
+        for path, series in self.series.items():
+            output_dir = os.path.join(self.output_dir, path)
+            try:
+                os.makedirs(output_dir, exist_ok=True)
+                series.write(os.path.join(output_dir, OTLP_SERIES_FILE), os.path.join(output_dir, OTLP_SUMMARY_FILE))
+            except Exception:
+                log.error(f"Error writing OTLP metrics to {output_dir}:", exc_info=True)
+        if not self.series:
+            log.warning("No OTLP metrics were received")
@@ -0,0 +1,236 @@
+from array import array
+import logging
+import math
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+from .base import MonitoringTool
+from .npy import write_npy_columns
+
+log = logging.getLogger(__name__)
+
+MIN_INTERVAL_SECS = 0.01
+
+# Fields of the aggregate `cpu` line in /proc/stat, in clock ticks
+CPU_FIELDS = ["user", "nice", "system", "idle", "iowait", "irq", "softirq", "steal"]
+# Fields of /proc/<pid>/status, values in kB are converted to bytes
+STATUS_FIELDS = {
+    "VmRSS": "rss_bytes",
+    "Threads": "threads",
+    "voluntary_ctxt_switches": "voluntary_ctxt_switches",
+    "nonvoluntary_ctxt_switches": "nonvoluntary_ctxt_switches",
+}
+IO_FIELDS = ["rchar", "wchar", "read_bytes", "write_bytes"]
+
+COLUMNS = (
+    ["time"]
+    + [f"cpu_{field}" for field in CPU_FIELDS]
+    + ["ctxt", "net_rx_bytes", "net_tx_bytes"]
+    + ["target_utime", "target_stime"]
+    + [f"target_{column}" for column in STATUS_FIELDS.values()]
+    + [f"target_{field}" for field in IO_FIELDS]
+    + ["fuse_waiting"]
+)
+
+
+def parse_proc_stat(content: str) -> Dict[str, float]:
+    """Parse system-wide CPU time (in clock ticks) and context switches from /proc/stat."""
+    values = {}
+    for line in content.splitlines():
+        fields = line.split()
+        if not fields:
+            continue
+        if fields[0] == "cpu":
+            for name, value in zip(CPU_FIELDS, fields[1:]):
+                values[f"cpu_{name}"] = float(value)
+        elif fields[0] == "ctxt":
+            values["ctxt"] = float(fields[1])
+    return values
+
+
+def parse_net_dev(content: str, interface_names: Optional[List[str]] = None) -> Dict[str, float]:
+    """Sum received and transmitted bytes from /proc/net/dev, over the given interfaces or all but loopback."""
+    rx_bytes = 0.0
+    tx_bytes = 0.0
+    for line in content.splitlines()[2:]:
+        interface, _, counters = line.partition(":")
+        interface = interface.strip()
+        if interface_names and interface not in interface_names:
+            continue
+        if not interface_names and interface == "lo":
+            continue
+        fields = counters.split()
+        rx_bytes += float(fields[0])
+        tx_bytes += float(fields[8])
+    return {"net_rx_bytes": rx_bytes, "net_tx_bytes": tx_bytes}
+
+
+def parse_pid_stat(content: str) -> Dict[str, float]:
+    """Parse CPU time (in clock ticks) of all threads of a process from /proc/<pid>/stat."""
+    # The command name may contain spaces, so split after its closing parenthesis
+    fields = content.rpartition(")")[2].split()
+    # utime and stime are fields 14 and 15, the remainder starts at field 3
+    return {"target_utime": float(fields[11]), "target_stime": float(fields[12])}
+
+
+def read_cpu_seconds(pid: int) -> float:
+    """CPU time of all threads of a process so far, in seconds."""
+    with open(f"/proc/{pid}/stat", "r") as f:
+        values = parse_pid_stat(f.read())
+    return (values["target_utime"] + values["target_stime"]) / os.sysconf("SC_CLK_TCK")
+
+
+def parse_pid_status(content: str) -> Dict[str, float]:
+    values = {}
+    for line in content.splitlines():
+        key, _, value = line.partition(":")
+        if key in STATUS_FIELDS:
+            fields = value.split()
+            multiplier = 1024 if len(fields) > 1 and fields[1] == "kB" else 1
+            values[f"target_{STATUS_FIELDS[key]}"] = float(fields[0]) * multiplier
+    return values
+
+
+def parse_pid_io(content: str) -> Dict[str, float]:
+    values = {}
+    for line in content.splitlines():
+        key, _, value = line.partition(":")
+        if key in IO_FIELDS:
+            values[f"target_{key}"] = float(value)
+    return values
+
+
+def parse_fuse_connection(mountinfo: str, mount_dir: str) -> Optional[str]:
+    """Name of the FUSE connection of a mount in `/sys/fs/fuse/connections`, the minor number of its device."""
+    for line in mountinfo.splitlines():
+        fields = line.split()
+        if len(fields) > 4 and fields[4] == mount_dir:
+            return fields[2].partition(":")[2]
+    return None
+
+
+class ProcfsSamplerTool(MonitoringTool):
+    """Samples system and target process counters from procfs on a background thread.
+
+    Replaces separate mpstat and bwm-ng processes with a single in-process sampler,
+    and additionally records memory, threads, context switches and I/O of the target process,
+    and the number of requests waiting in the FUSE queue of the target mount, `mount_dir`.
+    Counters are recorded as-is (mostly cumulative), rates can be derived by differencing consecutive samples.
+    The time series is written as columns of a structured NumPy array to `procfs.npy`.
+    """
+
+    def __init__(
+        self,
+        target_pid: Optional[int],
+        interval_secs: float = 0.1,
+        interface_names: Optional[List[str]] = None,
+        output_file: str = "procfs.npy",
+        mount_dir: Optional[str] = None,
+    ):
+        if interval_secs < MIN_INTERVAL_SECS:
+            raise ValueError(f"sampling interval must be at least {MIN_INTERVAL_SECS}s, got {interval_secs}s")
+        self.target_pid = target_pid
+        self.interval_secs = interval_secs
+        self.interface_names = interface_names
+        self.output_file = output_file
+        self.mount_dir = mount_dir
+        self.columns: Dict[str, array] = {column: array("d") for column in COLUMNS}
+        self.thread: Optional[threading.Thread] = None
+        self.stop_event = threading.Event()
+        self.fds: Dict[str, Optional[int]] = {}
+
+    def start(self) -> None:
+        paths = {"stat": "/proc/stat", "net_dev": "/proc/net/dev"}
+        if self.target_pid is not None:
+            paths.update(
+                {
+                    "pid_stat": f"/proc/{self.target_pid}/stat",
+                    "pid_status": f"/proc/{self.target_pid}/status",
+                    "pid_io": f"/proc/{self.target_pid}/io",
+                }
+            )
+        if self.mount_dir is not None:
+            # Only the connection of the target mount, as other FUSE mounts of the host, e.g. of concurrent jobs,
+            # have their own queues
+            with open("/proc/self/mountinfo", "r") as f:
+                connection = parse_fuse_connection(f.read(), self.mount_dir)
+            if connection is not None:
+                paths["fuse_waiting"] = f"/sys/fs/fuse/connections/{connection}/waiting"
+            else:
+                log.warning(f"Cannot find the FUSE connection of {self.mount_dir}")
+        for name, path in paths.items():
+            self.fds[name] = self._open(path)
+
+        log.info(f"Starting procfs sampling every {self.interval_secs * 1000:.0f}ms")
+        self.thread = threading.Thread(target=self._run, name="procfs-sampler", daemon=True)
+        self.thread.start()
+
+    def stop(self) -> None:
+        if self.thread:
+            self.stop_event.set()
+            self.thread.join()
+        for fd in self.fds.values():
+            if fd is not None:
+                os.close(fd)
+        self.fds = {}
+
+        try:
+            write_npy_columns(self.output_file, self.columns)
+            log.info(f"Wrote {len(self.columns['time'])} procfs samples to {self.output_file}")
+        except Exception:
+            log.error("Error writing procfs samples:", exc_info=True)
+
+    def _open(self, path: str) -> Optional[int]:
+        try:
+            return os.open(path, os.O_RDONLY)
+        except OSError as e:
+            log.warning(f"Cannot sample {path}: {e}")
+            return None
+
+    def _read(self, name: str) -> Optional[str]:
+        fd = self.fds.get(name)
+        if fd is None:
+            return None
+        chunks = []
+        offset = 0
+        try:
+            # Read until the end, as /proc/stat can be larger than a single read on hosts with many CPUs and interrupts
+            while chunk := os.pread(fd, 1 << 16, offset):
+                chunks.append(chunk)
+                offset += len(chunk)
+        except OSError:
+            # The target process has exited
+            return None
+        return b"".join(chunks).decode()
+
+    def _run(self) -> None:
+        start = time.monotonic()
+        next_sample = start
+        while not self.stop_event.is_set():
+            self._sample(time.monotonic() - start)
+            # Schedule against the start time, so that slow samples do not make the series drift
+            next_sample += self.interval_secs
+            self.stop_event.wait(max(0.0, next_sample - time.monotonic()))
+
+    def _sample(self, elapsed_secs: float) -> None:
+        values = {"time": elapsed_secs}
+        parsers = {
+            "stat": parse_proc_stat,
+            "net_dev": lambda content: parse_net_dev(content, self.interface_names),
+            "pid_stat": parse_pid_stat,
+            "pid_status": parse_pid_status,
+            "pid_io": parse_pid_io,
+            "fuse_waiting": lambda content: {"fuse_waiting": float(content)},
+        }
+        for name, parse in parsers.items():
+            content = self._read(name)
+            if content:
+                try:
+                    values.update(parse(content))
+                except (IndexError, ValueError):
+                    log.debug(f"Could not parse {name} sample", exc_info=True)
+
+        for column, samples in self.columns.items():
+            samples.append(values.get(column, math.nan))
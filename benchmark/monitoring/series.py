@@ -0,0 +1,57 @@
+from array import array
+import json
+import logging
+import math
+import os
+from typing import Dict, List
+
+from .npy import write_npy_columns
+
+log = logging.getLogger(__name__)
+
+
+class MetricsSeries:
+    """Columnar time series of metrics reported by a process, one row per report, with a column per metric.
+
+    Rows are kept as dicts, as not every metric is reported every time, and are only turned into columns when written.
+    """
+
+    def __init__(self):
+        self.rows: List[Dict[str, float]] = []
+        self.columns: Dict[str, None] = {}
+
+    def add_row(self, time: float, values: Dict[str, float]) -> None:
+        self.rows.append({"time": time, **values})
+        for column in values:
+            self.columns.setdefault(column)
+
+    def column(self, name: str) -> List[float]:
+        """Values of a column in each row, NaN where the metric was not reported."""
+        return [row.get(name, math.nan) for row in self.rows]
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Number of samples, sum, mean, maximum and last value of each column, over the rows where it was reported."""
+        summary = {}
+        for name in sorted(self.columns):
+            values = [row[name] for row in self.rows if name in row]
+            summary[name] = {
+                "samples": len(values),
+                "sum": sum(values),
+                "mean": sum(values) / len(values),
+                "max": max(values),
+                "last": values[-1],
+            }
+        return summary
+
+    def write(self, series_path: str, summary_path: str) -> Dict[str, Dict[str, float]]:
+        """Write the time series as a `.npy` file, and the summary as JSON, returning it."""
+        columns = {"time": array("d", (row["time"] for row in self.rows))}
+        for name in sorted(self.columns):
+            columns[name] = array("d", self.column(name))
+        write_npy_columns(series_path, columns)
+
+        summary = self.summary()
+        with open(summary_path, "w") as f:
+            json.dump(summary, f, indent=2)
+        log.info(f"Wrote {len(self.rows)} rows of {len(self.columns)} metrics to {os.path.dirname(series_path) or '.'}")
+        return summary
@@ -1,8 +1,9 @@
+import gzip
 import logging
 import os
 import signal
 import subprocess
-from typing import Optional
+from typing import Optional, Sequence
 
 import psutil
 
@@ -10,6 +11,9 @@ from .base import MonitoringTool
 
 log = logging.getLogger(__name__)
 
+# Collapsed stacks of a profile, one line per distinct stack with its number of samples
+STACKS_FILE = "stacks.txt.gz"
+
 
 class MpstatTool(MonitoringTool):
     def __init__(self):
@@ -71,12 +75,22 @@ class BwmNgTool(MonitoringTool):
 
 
 class PerfStatTool(MonitoringTool):
-    def __init__(self, target_pid: int):
+    """
+    Counts CPU events of a process with `perf stat`, writing the counts of every interval to `perfstat.json`.
+
+    `extra_events` are counted in addition to cycles, instructions and cache references and misses,
+    e.g. `context-switches`, `page-faults` or `syscalls:sys_enter_read`.
+    Can be stopped before the other tools, stopping it again does nothing.
+    """
+
+    def __init__(self, target_pid: int, output_dir: str = ".", extra_events: Sequence[str] = ()):
         self.target_pid = target_pid
+        self.output_dir = output_dir
+        self.extra_events = list(extra_events)
         self.process = None
 
     def start(self) -> None:
-        perf_events = ["cycles", "instructions", "cache-references", "cache-misses", "bus-cycles"]
+        perf_events = ["cycles", "instructions", "cache-references", "cache-misses", "bus-cycles", *self.extra_events]
         # fmt: off
         perf_args = [
             "perf", "stat",
@@ -84,7 +98,7 @@ class PerfStatTool(MonitoringTool):
             "-e", ",".join(perf_events),
             "-j",
             "-p", str(self.target_pid),
-            "-o", "perfstat.json"
+            "-o", os.path.join(self.output_dir, "perfstat.json")
         ]
         # fmt: on
         log.info("Starting perf stat with args: %s", " ".join(perf_args))
@@ -97,19 +111,34 @@ class PerfStatTool(MonitoringTool):
                 self.process.wait()
             except Exception:
                 log.error("Error shutting down perf stat:", exc_info=True)
+            self.process = None
 
 
 class FlamegraphTool(MonitoringTool):
-    def __init__(self, target_pid: int, flamegraph_scripts_path: Optional[str] = None):
+    """
+    Profiles a process with `flamegraph`, writing `flamegraph.svg` to `output_dir`.
+
+    With the FlameGraph scripts, the profile's stacks are also collapsed into `stacks.txt.gz`, which is kept to compare
+    profiles across runs with `analysis-scripts/flamediff.py`, and rendered as `inverted-flamegraph.svg`.
+
+    flamegraph records to `perf.data` in its working directory, so tools profiling different processes at the same
+    time need different output directories.
+    """
+
+    def __init__(self, target_pid: int, flamegraph_scripts_path: Optional[str] = None, output_dir: str = "."):
         self.target_pid = target_pid
         self.flamegraph_scripts_path = flamegraph_scripts_path
+        self.output_dir = output_dir
         self.process = None
 
+    def _path(self, file_name: str) -> str:
+        return os.path.join(self.output_dir, file_name)
+
     def start(self) -> None:
         self._check_kernel_settings()
         flamegraph_args = ["flamegraph", "--pid", str(self.target_pid), "-o", "flamegraph.svg"]
-        log.info("Starting flamegraph with args %s", " ".join(flamegraph_args))
-        self.process = subprocess.Popen(flamegraph_args)
+        log.info("Starting flamegraph in %s with args %s", self.output_dir, " ".join(flamegraph_args))
+        self.process = subprocess.Popen(flamegraph_args, cwd=self.output_dir)
 
     def stop(self) -> None:
         if self.process:
@@ -127,12 +156,14 @@ class FlamegraphTool(MonitoringTool):
             except Exception:
                 log.error("Error shutting down flamegraph:", exc_info=True)
 
-            if self.flamegraph_scripts_path and os.path.exists("perf.data"):
-                self._generate_inverted_flamegraph()
+            if self.flamegraph_scripts_path and os.path.exists(self._path("perf.data")):
+                stacks = self._collapse_stacks()
+                if stacks is not None:
+                    self._generate_inverted_flamegraph(stacks)
 
             try:
-                if os.path.exists("perf.data"):
-                    os.remove("perf.data")
+                if os.path.exists(self._path("perf.data")):
+                    os.remove(self._path("perf.data"))
                     log.debug("Cleaned up perf.data file")
             except Exception:
                 log.warning("Failed to clean up perf.data file", exc_info=True)
@@ -164,38 +195,60 @@ class FlamegraphTool(MonitoringTool):
         except (OSError, IOError) as e:
             log.warning(f"Could not check kernel.perf_event_paranoid: {e}")
 
-    def _generate_inverted_flamegraph(self):
+    def _script_path(self, script_name: str) -> Optional[str]:
+        assert self.flamegraph_scripts_path
+        script_path = os.path.join(self.flamegraph_scripts_path, script_name)
+        if not os.path.exists(script_path):
+            log.warning(f"{script_name} not found in {self.flamegraph_scripts_path}")
+            return None
+        return script_path
+
+    def _collapse_stacks(self) -> Optional[str]:
+        """Collapse the stacks of `perf.data`, writing them to `stacks.txt.gz`, and return them."""
         try:
-            assert self.flamegraph_scripts_path
-            stackcollapse_script = os.path.join(self.flamegraph_scripts_path, "stackcollapse-perf.pl")
-            flamegraph_script = os.path.join(self.flamegraph_scripts_path, "flamegraph.pl")
+            stackcollapse_script = self._script_path("stackcollapse-perf.pl")
+            if stackcollapse_script is None:
+                return None
+
+            log.info("Collapsing profiled stacks...")
+            # perf's output is much larger than the collapsed stacks, so it is streamed rather than written to disk
+            perf_script = subprocess.Popen(["perf", "script", "-i", self._path("perf.data")], stdout=subprocess.PIPE)
+            result = subprocess.run(
+                [stackcollapse_script],
+                stdin=perf_script.stdout,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True,
+            )
+            perf_script.stdout.close()
+            if perf_script.wait() != 0:
+                log.warning(f"perf script failed with exit code {perf_script.returncode}")
+                return None
+            if result.returncode != 0:
+                log.warning(f"stackcollapse-perf.pl failed: {result.stderr}")
+                return None
+
+            with gzip.open(self._path(STACKS_FILE), "wt") as stacks_file:
+                stacks_file.write(result.stdout)
+            log.info(f"Collapsed stacks written to {self._path(STACKS_FILE)}")
+            return result.stdout
 
-            if not os.path.exists(stackcollapse_script) or not os.path.exists(flamegraph_script):
-                log.warning(f"Flamegraph scripts not found in {self.flamegraph_scripts_path}")
+        except Exception:
+            log.error("Error collapsing profiled stacks:", exc_info=True)
+            return None
+
+    def _generate_inverted_flamegraph(self, stacks: str):
+        try:
+            flamegraph_script = self._script_path("flamegraph.pl")
+            if flamegraph_script is None:
                 return
 
             log.info("Generating inverted flamegraph...")
 
-            with open("perf.txt", "w") as perf_txt:
-                result = subprocess.run(
-                    ["perf", "script", "-i", "perf.data"], stdout=perf_txt, stderr=subprocess.PIPE, text=True
-                )
-                if result.returncode != 0:
-                    log.warning(f"perf script failed: {result.stderr}")
-                    return
-
-            with open("perf.txt", "r") as perf_txt, open("stacks.txt", "w") as stacks_txt:
-                result = subprocess.run(
-                    [stackcollapse_script], stdin=perf_txt, stdout=stacks_txt, stderr=subprocess.PIPE, text=True
-                )
-                if result.returncode != 0:
-                    log.warning(f"stackcollapse-perf.pl failed: {result.stderr}")
-                    return
-
-            with open("stacks.txt", "r") as stacks_txt, open("inverted-flamegraph.svg", "w") as flamegraph_svg:
+            with open(self._path("inverted-flamegraph.svg"), "w") as flamegraph_svg:
                 result = subprocess.run(
                     [flamegraph_script, "--inverted", "--reverse", "--colors", "blue"],
-                    stdin=stacks_txt,
+                    input=stacks,
                     stdout=flamegraph_svg,
                     stderr=subprocess.PIPE,
                     text=True,
@@ -204,14 +257,7 @@ class FlamegraphTool(MonitoringTool):
                     log.warning(f"flamegraph.pl failed: {result.stderr}")
                     return
 
-            log.info("Successfully generated inverted flamegraph: inverted-flamegraph.svg")
-
-            for temp_file in ["perf.txt", "stacks.txt"]:
-                try:
-                    if os.path.exists(temp_file):
-                        os.remove(temp_file)
-                except Exception as e:
-                    log.debug(f"Failed to remove temporary file {temp_file}: {e}")
+            log.info(f"Successfully generated inverted flamegraph: {self._path('inverted-flamegraph.svg')}")
 
         except Exception:
             log.error("Error generating inverted flamegraph:", exc_info=True)
@@ -1,7 +1,14 @@
+import ast
+import os
+import struct
+import time
 from unittest.mock import Mock, patch, MagicMock
 
+import pytest
+
 from monitoring import ResourceMonitoring
 from monitoring.base import MonitoringTool
+from monitoring.sampler import COLUMNS, ProcfsSamplerTool, parse_fuse_connection, parse_pid_stat
 from monitoring.tools import MpstatTool, BwmNgTool, PerfStatTool, FlamegraphTool
 
 
@@ -169,3 +176,67 @@ class TestResourceMonitoring:
         # Then: All tools are stopped
         tool1.stop.assert_called_once()
         tool2.stop.assert_called_once()
+
+
+class TestProcfsSamplerTool:
+    """Test cases for ProcfsSamplerTool in-process sampling functionality."""
+
+    def test_procfs_sampler_lifecycle(self, tmp_path):
+        """
+        Test that ProcfsSamplerTool samples the target process and writes a structured .npy file.
+
+        Verifies that samples are taken on a background thread at the configured interval,
+        and that the output header describes every column.
+        """
+        # Given: A sampler targeting the current process
+        output_file = tmp_path / "procfs.npy"
+        tool = ProcfsSamplerTool(os.getpid(), interval_secs=0.01, output_file=str(output_file))
+
+        # When: Sampling for a short time
+        tool.start()
+        time.sleep(0.1)
+        tool.stop()
+
+        # Then: Multiple samples are recorded for the target process
+        samples = len(tool.columns["time"])
+        assert samples > 1
+        assert all(rss > 0 for rss in tool.columns["target_rss_bytes"])
+
+        # And: The output file contains all columns and samples
+        content = output_file.read_bytes()
+        header_len = struct.unpack("<H", content[8:10])[0]
+        header = ast.literal_eval(content[10 : 10 + header_len].decode("latin1"))
+        assert [name for name, _ in header["descr"]] == COLUMNS
+        assert header["shape"] == (samples,)
+        assert (10 + header_len) % 64 == 0
+        assert len(content) == 10 + header_len + samples * len(COLUMNS) * 8
+
+    def test_procfs_sampler_rejects_short_interval(self):
+        """Test that sampling intervals below 10ms are rejected."""
+        with pytest.raises(ValueError):
+            ProcfsSamplerTool(1, interval_secs=0.001)
+
+    def test_parse_pid_stat_with_spaces_in_name(self):
+        """Test that CPU times are parsed correctly when the command name contains spaces."""
+        content = "42 (tokio runtime) S 1 42 42 0 -1 4194560 100 0 0 0 250 120 0 0 20 0 8 0 100 0 0"
+        assert parse_pid_stat(content) == {"target_utime": 250.0, "target_stime": 120.0}
+
+    def test_parse_fuse_connection_of_mount(self):
+        """Test that only the FUSE connection of the target mount is selected, by its device minor number."""
+        mountinfo = (
+            "36 25 0:53 / /tmp/other.mountpoint-s3 rw,nosuid,nodev - fuse mountpoint-s3 rw\n"
+            "37 25 0:54 / /tmp/a.mountpoint-s3 rw,nosuid,nodev - fuse mountpoint-s3 rw\n"
+        )
+        assert parse_fuse_connection(mountinfo, "/tmp/a.mountpoint-s3") == "54"
+        assert parse_fuse_connection(mountinfo, "/tmp/missing") is None
+
+    def test_read_files_larger_than_a_single_read(self, tmp_path):
+        """Test that files larger than 64 KiB, like /proc/stat on large hosts, are read entirely."""
+        large_file = tmp_path / "stat"
+        large_file.write_text("intr " + "1 " * 100_000 + "\nctxt 42\n")
+        tool = ProcfsSamplerTool(None)
+        tool.fds["stat"] = os.open(large_file, os.O_RDONLY)
+        try:
+            assert tool._read("stat").endswith("ctxt 42\n")
+        finally:
+            os.close(tool.fds["stat"])
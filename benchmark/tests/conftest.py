@@ -0,0 +1,13 @@
+import os
+
+import pytest
+from hydra import compose, initialize_config_dir
+
+CONFIG_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'conf')
+
+
+@pytest.fixture
+def compose_config():
+    """Compose `conf/config.yaml` with the given Hydra overrides, like the benchmark runner does."""
+    with initialize_config_dir(config_dir=CONFIG_DIR, version_base=None):
+        yield lambda *overrides: compose(config_name='config', overrides=list(overrides))
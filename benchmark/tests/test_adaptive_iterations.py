@@ -0,0 +1,33 @@
+import json
+
+from hydra_plugins.smart_sweeper.results import bootstrap_median_ci, read_throughput_gbps
+from hydra_plugins.smart_sweeper.smart_benchmark_sweeper import SmartBenchmarkSweeper
+
+
+class TestAdaptiveIterations:
+    def setup_method(self):
+        self.sweeper = SmartBenchmarkSweeper(
+            adaptive={"enabled": True, "min_iterations": 3, "max_iterations": 10, "relative_ci_width": 0.05}
+        )
+
+    def test_bootstrap_ci_contains_median(self):
+        low, high = bootstrap_median_ci([9.0, 10.0, 11.0, 10.5, 9.5])
+        assert 9.0 <= low <= 10.0 <= high <= 11.0
+
+    def test_stable_throughput_converges(self):
+        assert self.sweeper._has_converged([10.0, 10.1, 9.9])
+
+    def test_noisy_throughput_does_not_converge(self):
+        assert not self.sweeper._has_converged([5.0, 10.0, 15.0, 7.0])
+
+    def test_too_few_iterations_do_not_converge(self):
+        assert not self.sweeper._has_converged([10.0, 10.0])
+
+    def test_read_fio_throughput(self, tmp_path):
+        fio_output = {"jobs": [{"read": {"io_bytes": 10_000_000_000, "runtime": 8000}}]}
+        (tmp_path / "fio.sequential_read.json").write_text(json.dumps(fio_output))
+
+        assert read_throughput_gbps(str(tmp_path)) == 10.0
+
+    def test_read_missing_output(self, tmp_path):
+        assert read_throughput_gbps(str(tmp_path)) is None
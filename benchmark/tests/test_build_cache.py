@@ -0,0 +1,72 @@
+from unittest.mock import patch
+
+from benchmarks import cargo_helper
+from benchmarks.cargo_helper import BuildTarget
+
+
+class TestBuildCache:
+    def setup_method(self):
+        self.builds = []
+
+    def _fake_cargo_build(self, tmp_path):
+        def cargo_build(cargo_args, env):
+            self.builds.append(cargo_args)
+            executable = tmp_path / "target" / "mount-s3"
+            executable.parent.mkdir(exist_ok=True)
+            executable.write_text(str(len(self.builds)))
+            return str(executable)
+
+        return cargo_build
+
+    def test_cache_hit_skips_cargo(self, tmp_path, monkeypatch):
+        monkeypatch.setenv(cargo_helper.BUILD_CACHE_ENV_VAR, str(tmp_path / "cache"))
+        target = BuildTarget(binary_name="mount-s3", features=("mock",))
+
+        with (
+            patch.object(cargo_helper, "_cargo_build", self._fake_cargo_build(tmp_path)),
+            patch.object(cargo_helper, "_source_tree_hash", return_value="tree"),
+        ):
+            first = target.build()
+            second = target.build()
+
+        assert first == second
+        assert str(tmp_path / "cache") in first
+        assert len(self.builds) == 1
+
+    def test_variants_are_cached_separately(self, tmp_path, monkeypatch):
+        monkeypatch.setenv(cargo_helper.BUILD_CACHE_ENV_VAR, str(tmp_path / "cache"))
+
+        with (
+            patch.object(cargo_helper, "_cargo_build", self._fake_cargo_build(tmp_path)),
+            patch.object(cargo_helper, "_source_tree_hash", return_value="tree"),
+        ):
+            cargo_helper.prebuild(
+                [
+                    BuildTarget(binary_name="mount-s3"),
+                    BuildTarget(binary_name="mount-s3", with_flamegraph=True),
+                    BuildTarget(binary_name="mount-s3"),
+                ]
+            )
+
+        assert len(self.builds) == 2
+
+    def test_source_change_invalidates_cache(self, tmp_path, monkeypatch):
+        monkeypatch.setenv(cargo_helper.BUILD_CACHE_ENV_VAR, str(tmp_path / "cache"))
+        target = BuildTarget(binary_name="mount-s3")
+
+        with patch.object(cargo_helper, "_cargo_build", self._fake_cargo_build(tmp_path)):
+            with patch.object(cargo_helper, "_source_tree_hash", return_value="tree1"):
+                target.build()
+            with patch.object(cargo_helper, "_source_tree_hash", return_value="tree2"):
+                target.build()
+
+        assert len(self.builds) == 2
+
+    def test_cache_disabled(self, tmp_path, monkeypatch):
+        monkeypatch.setenv(cargo_helper.BUILD_CACHE_ENV_VAR, "off")
+
+        with patch.object(cargo_helper, "_cargo_build", self._fake_cargo_build(tmp_path)):
+            BuildTarget(binary_name="mount-s3").build()
+            BuildTarget(binary_name="mount-s3").build()
+
+        assert len(self.builds) == 2
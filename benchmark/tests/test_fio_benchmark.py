@@ -0,0 +1,113 @@
+import json
+from unittest.mock import patch
+
+import pytest
+
+from benchmarks import fio_benchmark, mountpoint
+from benchmarks.fio_benchmark import FioBenchmark, fio_throughput_gbps
+
+
+@pytest.fixture
+def make_config(compose_config):
+    return lambda *overrides: compose_config(
+        'application_workers=3',
+        'object_size_in_gib=1',
+        'mountpoint.cache.warm_passes=2',
+        'benchmarks.fio.fio_benchmark=small_file_read',
+        *overrides,
+    )
+
+
+class TestFioEnvironment:
+    def test_small_file_tree_is_split_between_jobs(self, make_config):
+        env = FioBenchmark(make_config(), {})._fio_env()
+        assert env['FILES_PER_JOB'] == '3334'
+        assert env['SMALL_FILE_JOB_BYTES'] == str(3334 * 65536)
+
+    def test_small_file_blocks_do_not_exceed_file_size(self, make_config):
+        env = FioBenchmark(make_config(), {})._fio_env()
+        assert env['SMALL_FILE_BLOCK_SIZE'] == '65536'
+        assert env['BLOCK_SIZE'] == '262144'
+
+
+class TestLayout:
+    def test_fio_is_run_with_the_harness_environment(self, make_config, monkeypatch):
+        runs = []
+        monkeypatch.setenv('PATH', '/opt/fio/bin')
+        monkeypatch.setattr(fio_benchmark.subprocess, 'run', lambda args, **kwargs: runs.append((args, kwargs)))
+        benchmark = FioBenchmark(make_config(), {})
+        benchmark.mount_dirs = ['/tmp/a']
+        with patch('hydra.utils.to_absolute_path', lambda path: path):
+            benchmark._lay_out_files()
+        args, kwargs = runs[0]
+        assert '--create_only=1' in args
+        assert kwargs['env']['PATH'] == '/opt/fio/bin'
+        assert kwargs['env']['SMALL_FILE_COUNT'] == '10000'
+
+    def test_only_small_file_tree_is_laid_out_by_default(self, make_config, monkeypatch):
+        laid_out = []
+        for job_name in ['small_file_read', 'metadata', 'sequential_read', 'random_read']:
+            cfg = make_config('mountpoint.mount_count=2', f'benchmarks.fio.fio_benchmark={job_name}')
+            benchmark = FioBenchmark(cfg, {})
+            monkeypatch.setattr(benchmark, '_mount_all', lambda mount_count, with_flamegraph: None)
+            monkeypatch.setattr(benchmark, '_lay_out_files', lambda: laid_out.append(job_name))
+            benchmark.setup(with_flamegraph=False)
+        assert laid_out == ['small_file_read', 'metadata']
+
+
+class TestMultipleMounts:
+    def test_jobs_are_spread_across_mounts(self, make_config):
+        benchmark = FioBenchmark(make_config(), {})
+        benchmark.mount_dirs = ['/tmp/a', '/tmp/b']
+        assert benchmark.fio_directory == '/tmp/a:/tmp/b'
+
+    def test_mount_throughput_sums_its_jobs(self, make_config, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        # Jobs 1 and 3 use the first mount, job 2 the second
+        for job, kib_per_second in [(1, 1000), (2, 2000), (3, 3000)]:
+            (tmp_path / f'fio_bw.{job}.log').write_text(f'1000, {kib_per_second}, 0, 0, 0\n')
+        benchmark = FioBenchmark(make_config(), {})
+        benchmark.mount_dirs = ['/tmp/a', '/tmp/b']
+        throughputs = benchmark._mount_throughputs_gbps()
+        assert throughputs == pytest.approx([4000 * 1024 * 8 / 1e9, 2000 * 1024 * 8 / 1e9])
+
+    def test_bandwidth_logs_are_written_for_mount_throughputs(self, make_config):
+        benchmark = FioBenchmark(make_config(), {})
+        benchmark.mount_dirs = ['/tmp/a']
+        with patch('hydra.utils.to_absolute_path', lambda path: path):
+            assert not any(arg.startswith('--write_bw_log') for arg in benchmark.get_command().args)
+            benchmark.mount_dirs = ['/tmp/a', '/tmp/b']
+            assert '--log_avg_msec=1000' in benchmark.get_command().args
+
+    def test_more_mounts_than_jobs(self, make_config):
+        with pytest.raises(ValueError):
+            FioBenchmark(make_config(), {})._mount_all(4, with_flamegraph=False)
+
+    def test_cleanup_continues_after_failure(self):
+        cleaned = []
+
+        def cleanup_mp(mount_dir):
+            cleaned.append(mount_dir)
+            if mount_dir == '/tmp/a':
+                raise RuntimeError('target is busy')
+
+        with patch.object(mountpoint, 'cleanup_mp', cleanup_mp):
+            with pytest.raises(RuntimeError):
+                mountpoint.cleanup_mounts(['/tmp/a', '/tmp/b'])
+        assert sorted(cleaned) == ['/tmp/a', '/tmp/b']
+
+
+class TestWarmPasses:
+    def test_pass_commands_until_warm_passes(self, make_config):
+        benchmark = FioBenchmark(make_config(), {})
+        benchmark.mount_dirs = ['/tmp/a']
+        with patch('hydra.utils.to_absolute_path', lambda path: path):
+            commands = [benchmark.get_pass_command(pass_index) for pass_index in range(1, 4)]
+        assert commands[2] is None
+        assert '--output=pass-1/fio.small_file_read.json' in commands[0].args
+        assert benchmark.pass_output_filepaths == ['pass-1/fio.small_file_read.json', 'pass-2/fio.small_file_read.json']
+
+    def test_throughput_sums_jobs_and_directions(self, tmp_path):
+        jobs = [{'read': {'bw_bytes': 100_000_000}, 'write': {'bw_bytes': 25_000_000}}] * 2
+        (tmp_path / 'fio.json').write_text(json.dumps({'jobs': jobs}))
+        assert fio_throughput_gbps(str(tmp_path / 'fio.json')) == pytest.approx(2.0)
@@ -0,0 +1,46 @@
+import gzip
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'analysis-scripts'))
+
+from flamediff import find_stack_files, function_shares, merge_stacks, write_diff_stacks  # noqa: E402
+
+
+def write_stacks(path, lines):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with gzip.open(path, 'wt') as f:
+        f.write('\n'.join(lines) + '\n')
+
+
+def write_iteration(iteration_dir, benchmark_type):
+    (iteration_dir / '.hydra').mkdir(parents=True)
+    (iteration_dir / '.hydra' / 'config.yaml').write_text(f'benchmark_type: {benchmark_type}\n')
+
+
+class TestFlamediff:
+    def test_merges_iterations_and_mounts_of_matching_configurations(self, tmp_path):
+        write_iteration(tmp_path / '0', 'fio')
+        write_stacks(tmp_path / '0' / 'stacks.txt.gz', ['main;read 3', 'main;read;memcpy 1'])
+        write_stacks(tmp_path / '0' / 'mount-1' / 'stacks.txt.gz', ['main;read 2'])
+        write_iteration(tmp_path / '1', 'prefetch')
+        write_stacks(tmp_path / '1' / 'stacks.txt.gz', ['main;prefetch 5'])
+
+        stack_files = find_stack_files(str(tmp_path), {'benchmark_type': 'fio'})
+        assert len(stack_files) == 2
+        assert merge_stacks(stack_files) == {'main;read': 5, 'main;read;memcpy': 1}
+
+    def test_function_shares(self):
+        shares = function_shares({'main;read': 3, 'main;read;memcpy': 1, 'main;f;f': 4})
+        assert shares['read'] == (pytest.approx(3 / 8), pytest.approx(4 / 8))
+        assert shares['memcpy'] == (pytest.approx(1 / 8), pytest.approx(1 / 8))
+        # Recursive frames are counted once per stack
+        assert shares['f'] == (pytest.approx(4 / 8), pytest.approx(4 / 8))
+        assert shares['main'] == (0, 1)
+
+    def test_diff_stacks_are_scaled_to_the_candidate(self, tmp_path):
+        path = tmp_path / 'diff.folded'
+        write_diff_stacks({'main;read': 10, 'main;write': 10}, {'main;read': 30, 'main;crc': 10}, str(path))
+        assert path.read_text().splitlines() == ['main;crc 0 10', 'main;read 20 30', 'main;write 20 0']
@@ -0,0 +1,321 @@
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'analysis-scripts'))
+
+from iteration_metrics import (  # noqa: E402
+    fio_metrics,
+    fio_throughput_series,
+    log_metrics,
+    manifest_metrics,
+    memory_metrics,
+    mount_memory_metrics,
+    mount_metrics,
+    parse_iteration_metrics,
+    pass_metrics,
+    perf_stat_metrics,
+    percentile,
+    reservation_metrics,
+    s3io_metrics,
+    startup_metrics,
+    steady_state_metrics,
+    upload_metrics,
+)
+
+
+def fio_output(read_bytes, write_bytes, percentiles_ns):
+    percentiles = {f'{p:.6f}': value for p, value in percentiles_ns.items()}
+    return {
+        'jobs': [
+            {
+                'read': {
+                    'io_bytes': read_bytes,
+                    'iops': 1.5,
+                    'clat_ns': {'percentile': percentiles if read_bytes else {}},
+                },
+                'write': {
+                    'io_bytes': write_bytes,
+                    'iops': 2.5,
+                    'clat_ns': {'percentile': percentiles if write_bytes else {}},
+                },
+            }
+        ]
+    }
+
+
+class TestLatencyMetrics:
+    def test_percentile_interpolates(self):
+        assert percentile([4.0, 1.0, 3.0, 2.0], 50) == 2.5
+        assert percentile([1.0, 2.0], 99.9) == pytest.approx(1.999)
+        assert percentile([7.0], 99) == 7.0
+
+    def test_fio_percentiles_of_transferring_direction(self):
+        output = fio_output(0, 100, {50.0: 1_000_000, 90.0: 2_000_000, 99.0: 5_000_000, 99.9: 8_000_000})
+        assert fio_metrics(output) == {
+            'iops': 2.5,
+            'clat_p50_ms': 1.0,
+            'clat_p90_ms': 2.0,
+            'clat_p99_ms': 5.0,
+            'clat_p99.9_ms': 8.0,
+        }
+
+    def test_time_to_first_byte_over_all_iterations(self, tmp_path):
+        output = {
+            'summary': {'total_bytes': 1, 'total_elapsed_seconds': 1},
+            'iterations': [{'first_byte_seconds': [0.01, 0.03]}, {'first_byte_seconds': [0.02]}],
+        }
+        (tmp_path / 'prefetch-output.json').write_text(json.dumps(output))
+
+        metrics = parse_iteration_metrics(str(tmp_path))
+        assert metrics['ttfb_p50_ms'] == pytest.approx(20.0)
+        assert set(metrics) == {'ttfb_p50_ms', 'ttfb_p90_ms', 'ttfb_p99_ms', 'ttfb_p99.9_ms'}
+
+
+class TestThroughputOverTime:
+    def test_series_sums_jobs_per_second(self, tmp_path):
+        # 125000 KiB/s is 1.024 Gbps
+        (tmp_path / 'fio_bw.1.log').write_text("1000, 125000, 0, 262144, 0\n2001, 125000, 0, 262144, 0\n")
+        (tmp_path / 'fio_bw.2.log').write_text("998, 125000, 0, 262144, 0\n2003, 250000, 0, 262144, 0\n")
+        series = fio_throughput_series(str(tmp_path))
+        assert series == [(1, pytest.approx(2.048)), (2, pytest.approx(3.072))]
+
+    def test_steady_state_after_ramp(self):
+        series = [(1, 1.0), (2, 5.0), (3, 9.5), (4, 10.0), (5, 10.0), (6, 9.8)]
+        assert steady_state_metrics(series) == {'ramp_seconds': 2, 'steady_throughput_gbps': pytest.approx(9.9)}
+
+    def test_steady_state_needs_multiple_intervals(self):
+        assert steady_state_metrics([(1, 1.0)]) == {}
+
+
+class TestS3ioMetrics:
+    def test_read_and_write_throughput(self):
+        data = {
+            'jobs': [
+                {'workload_type': 'read', 'total_bytes': 1_000_000_000, 'elapsed_seconds': 2.0},
+                {'workload_type': 'read', 'total_bytes': 1_000_000_000, 'elapsed_seconds': 4.0},
+                {'workload_type': 'write', 'total_bytes': 500_000_000, 'elapsed_seconds': 1.0},
+            ],
+            'summary': {'peak_memory_mib': 512.0},
+        }
+        assert s3io_metrics(data) == {
+            'read_throughput_gbps': 4.0,
+            'write_throughput_gbps': 4.0,
+            'peak_memory_mib': 512.0,
+        }
+
+
+class TestUploadMetrics:
+    def test_time_to_durable_and_write_throughput(self):
+        data = {
+            'iterations': [
+                {'bytes': 2_000_000_000, 'write_seconds': [1.0, 2.0], 'durable_seconds': [0.1, 0.3]},
+                {'bytes': 2_000_000_000, 'write_seconds': [2.0, 2.0], 'durable_seconds': [0.2, 0.2]},
+            ]
+        }
+        metrics = upload_metrics(data)
+        assert metrics['durable_p50_ms'] == pytest.approx(200.0)
+        assert metrics['durable_p99.9_ms'] == pytest.approx(299.7)
+        assert metrics['write_throughput_gbps'] == pytest.approx(8.0)
+
+    def test_no_uploads(self):
+        assert upload_metrics({'iterations': []}) == {}
+
+
+class TestStartupMetrics:
+    def test_percentiles_of_each_phase(self):
+        data = {
+            'repetitions': [
+                {'mount_seconds': 0.1, 'lookup_seconds': 0.11, 'first_byte_seconds': 0.15},
+                {'mount_seconds': 0.3, 'lookup_seconds': 0.32, 'first_byte_seconds': 0.4},
+                {'mount_seconds': 0.2, 'lookup_seconds': 0.21, 'first_byte_seconds': 0.25},
+            ]
+        }
+        metrics = startup_metrics(data)
+        assert metrics['mount_p50_ms'] == pytest.approx(200.0)
+        assert metrics['lookup_p50_ms'] == pytest.approx(210.0)
+        assert metrics['first_byte_p50_ms'] == pytest.approx(250.0)
+        assert metrics['first_byte_p90_ms'] == pytest.approx(370.0)
+
+    def test_no_repetitions(self):
+        assert startup_metrics({'repetitions': []}) == {}
+
+    def test_reported_without_throughput(self, tmp_path):
+        from autogroup import extract_iteration
+
+        repetitions = [{'mount_seconds': 0.1, 'lookup_seconds': 0.11, 'first_byte_seconds': 0.15}]
+        summary = {'first_byte_seconds': {'p50': 0.15}}
+        output = {'summary': summary, 'repetitions': repetitions}
+        (tmp_path / 'startup-output.json').write_text(json.dumps(output))
+
+        _, metrics = extract_iteration(str(tmp_path))
+        assert metrics['throughput_gbps'] is None
+        assert metrics['mount_p50_ms'] == pytest.approx(100.0)
+
+
+class TestManifestMetrics:
+    def test_rows_per_second_db_size_and_lookups(self):
+        data = {
+            'summary': {
+                'rows_per_second': 250000.0,
+                'db_size_bytes': 64 * 1024 * 1024,
+                'lookups': 1000,
+                'lookup_seconds': 0.05,
+            }
+        }
+        assert manifest_metrics(data) == {
+            'rows_per_second': 250000.0,
+            'db_size_mib': 64.0,
+            'lookup_us': pytest.approx(50.0),
+        }
+
+    def test_other_benchmarks(self):
+        assert manifest_metrics({'summary': {'total_bytes': 1, 'total_elapsed_seconds': 1}}) == {}
+
+
+class TestPerfStatMetrics:
+    def write_perf_stat(self, path, samples):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        lines = ['# started on Thu Jan  1 00:00:00 2026', '']
+        for interval, event, value in samples:
+            lines.append(json.dumps({'interval': interval, 'counter-value': value, 'unit': '', 'event': event}))
+        path.write_text('\n'.join(lines) + '\n')
+
+    def test_totals_and_ratios_over_mounts(self, tmp_path):
+        self.write_perf_stat(
+            tmp_path / 'perfstat.json',
+            [
+                (0.5, 'cycles', '1000.0'),
+                (0.5, 'instructions', '1500.0'),
+                (0.5, 'cache-references', '100.0'),
+                (0.5, 'cache-misses', '10.0'),
+                (1.0, 'cycles', '1000.0'),
+                (1.0, 'instructions', '1500.0'),
+                (1.0, 'cache-references', '<not counted>'),
+            ],
+        )
+        self.write_perf_stat(tmp_path / 'mount-1' / 'perfstat.json', [(2.0, 'cycles', '2000.0')])
+
+        metrics = perf_stat_metrics(str(tmp_path))
+        assert metrics['perf.cycles'] == 4000
+        assert metrics['perf.instructions'] == 3000
+        assert metrics['ipc'] == pytest.approx(0.75)
+        assert metrics['cache_miss_rate'] == pytest.approx(0.1)
+        # Rates are computed over the duration of each file, then added up
+        assert metrics['perf.cycles.per_second'] == pytest.approx(2000 / 1.0 + 2000 / 2.0)
+
+    def test_without_perf_stat(self, tmp_path):
+        assert perf_stat_metrics(str(tmp_path)) == {}
+
+    def test_per_byte_of_benchmark_output(self, tmp_path):
+        from autogroup import extract_iteration
+
+        summary = {'total_bytes': 1000, 'total_elapsed_seconds': 1.0}
+        (tmp_path / 'client-output.json').write_text(json.dumps({'summary': summary}))
+        self.write_perf_stat(tmp_path / 'perfstat.json', [(1.0, 'cycles', '5000.0'), (1.0, 'instructions', '8000.0')])
+
+        _, metrics = extract_iteration(str(tmp_path))
+        assert metrics['cycles_per_byte'] == pytest.approx(5.0)
+        assert metrics['instructions_per_byte'] == pytest.approx(8.0)
+
+
+class TestMountMetrics:
+    def test_slowest_and_fastest_mount(self):
+        data = {'mounts': [{'throughput_gbps': 3.0}, {'throughput_gbps': 1.0}, {'throughput_gbps': None}]}
+        assert mount_metrics(data) == {'mount_min_throughput_gbps': 1.0, 'mount_max_throughput_gbps': 3.0}
+
+    def test_single_mount(self):
+        assert mount_metrics({'target_pid': 1}) == {}
+
+
+class TestPassMetrics:
+    def test_cold_and_warm_passes(self):
+        data = {'passes': [{'throughput_gbps': 2.0}, {'throughput_gbps': 7.0}, {'throughput_gbps': 9.0}]}
+        assert pass_metrics(data) == {'cold_throughput_gbps': 2.0, 'warm_throughput_gbps': 8.0, 'cache_speedup': 4.0}
+
+    def test_single_pass(self):
+        assert pass_metrics({'passes': [{'throughput_gbps': 2.0}]}) == {}
+
+
+class TestMemoryMetrics:
+    def test_memory_summary_in_mib(self):
+        mib = 1024 * 1024
+        data = {
+            'rss_bytes': {'peak': 300 * mib, 'p99': 200 * mib, 'steady': 100 * mib},
+            'pss_bytes': None,
+        }
+        assert memory_metrics(data) == {'peak_rss_mib': 300, 'p99_rss_mib': 200, 'steady_rss_mib': 100}
+
+    def test_total_reservations(self):
+        data = {'memory_reservations': {'total': {'peak': 2 * 1024 * 1024, 'p99': 0, 'steady': 1024 * 1024}}}
+        assert reservation_metrics(data) == {'peak_reserved_mib': 2, 'steady_reserved_mib': 1}
+
+    def test_each_mount_and_host_total(self, tmp_path):
+        mib = 1024 * 1024
+        mounts = []
+        for index, peak_mib in enumerate([300, 100]):
+            (tmp_path / f'mount-{index}').mkdir()
+            rss = {'peak': peak_mib * mib, 'p99': peak_mib * mib, 'steady': 50 * mib}
+            (tmp_path / f'mount-{index}' / 'memory.json').write_text(json.dumps({'rss_bytes': rss, 'pss_bytes': None}))
+            reservations = {'total': {'peak': 2 * peak_mib * mib, 'p99': 0, 'steady': peak_mib * mib}}
+            mounts.append({'output_dir': f'mount-{index}', 'memory_reservations': reservations})
+        (tmp_path / 'metadata.json').write_text(json.dumps({'mounts': mounts}))
+
+        metrics = mount_memory_metrics(str(tmp_path))
+        assert metrics['mount-0.peak_rss_mib'] == 300
+        assert metrics['mount-1.peak_reserved_mib'] == 200
+        assert metrics['peak_rss_mib'] == 400
+        assert metrics['steady_rss_mib'] == 100
+        assert metrics['peak_reserved_mib'] == 800
+
+    def test_throughput_per_gib_of_all_mounts(self, tmp_path):
+        from autogroup import extract_iteration
+
+        summary = {'total_bytes': 1000, 'total_elapsed_seconds': 1.0}
+        (tmp_path / 'client-output.json').write_text(json.dumps({'summary': summary}))
+        for index in range(2):
+            (tmp_path / f'mount-{index}').mkdir()
+            rss = {'peak': 512 * 1024 * 1024, 'p99': 0, 'steady': 0}
+            (tmp_path / f'mount-{index}' / 'memory.json').write_text(json.dumps({'rss_bytes': rss}))
+
+        _, metrics = extract_iteration(str(tmp_path))
+        assert metrics['throughput_per_gib'] == pytest.approx(8e-6)
+
+    def test_single_mount(self, tmp_path):
+        (tmp_path / 'metadata.json').write_text(json.dumps({'target_pid': 1}))
+        assert mount_memory_metrics(str(tmp_path)) == {}
+
+
+class TestLogMetrics:
+    def test_statistics_of_each_metric(self):
+        data = {'s3.requests[op=get_object]': {'samples': 2, 'sum': 50, 'mean': 25, 'max': 42, 'last': 8}}
+        assert log_metrics(data) == {
+            'log.s3.requests[op=get_object].sum': 50,
+            'log.s3.requests[op=get_object].mean': 25,
+            'log.s3.requests[op=get_object].max': 42,
+        }
+
+    def test_each_mount_is_prefixed(self, tmp_path):
+        for index, total in enumerate([50, 70]):
+            (tmp_path / f'mount-{index}').mkdir()
+            data = {'s3.requests': {'samples': 2, 'sum': total, 'mean': total / 2, 'max': total, 'last': 0}}
+            (tmp_path / f'mount-{index}' / 'log_metrics.json').write_text(json.dumps(data))
+
+        metrics = parse_iteration_metrics(str(tmp_path))
+        assert metrics['mount-0.log.s3.requests.sum'] == 50
+        assert metrics['mount-1.log.s3.requests.sum'] == 70
+        assert 'log.s3.requests.sum' not in metrics
+
+
+class TestOtlpMetrics:
+    def test_each_mount_is_prefixed(self, tmp_path):
+        for index, last in enumerate([10, 20]):
+            (tmp_path / f'mount-{index}').mkdir()
+            data = {'fuse.io_size.count': {'samples': 3, 'sum': 30, 'mean': 10, 'max': last, 'last': last}}
+            (tmp_path / f'mount-{index}' / 'otlp_metrics.json').write_text(json.dumps(data))
+
+        metrics = parse_iteration_metrics(str(tmp_path))
+        assert metrics['mount-0.otlp.fuse.io_size.count.last'] == 10
+        assert metrics['mount-1.otlp.fuse.io_size.count.last'] == 20
@@ -0,0 +1,84 @@
+import threading
+import urllib.error
+import urllib.request
+import xml.etree.ElementTree as ET
+
+import pytest
+
+from benchmarks.local_s3 import LocalS3Server, ObjectStore, object_content, parse_range
+
+NAMESPACE = {'s3': 'http://s3.amazonaws.com/doc/2006-03-01/'}
+
+
+@pytest.fixture
+def server():
+    server = LocalS3Server(('127.0.0.1', 0), {'j0_1GiB.bin': 1024**3, 'dir/a': 10, 'dir/b': 20, 'top': 5})
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def request(server, method, path, data=None, headers=None):
+    req = urllib.request.Request(
+        f'{server.endpoint_url}/bucket/{path}', data=data, method=method, headers=headers or {}
+    )
+    with urllib.request.urlopen(req) as response:
+        return response.status, dict(response.headers), response.read()
+
+
+class TestObjectContent:
+    def test_content_is_deterministic_and_consistent_across_ranges(self):
+        whole = b''.join(object_content('key', 0, 3 * 1024 * 1024))
+        assert len(whole) == 3 * 1024 * 1024
+        assert (
+            b''.join(object_content('key', 1000, 2 * 1024 * 1024, chunk_size=4096))
+            == whole[1000 : 1000 + 2 * 1024 * 1024]
+        )
+        assert b''.join(object_content('other', 0, 1024)) != whole[:1024]
+
+    def test_parse_range(self):
+        assert parse_range('bytes=0-9', 100) == (0, 9)
+        assert parse_range('bytes=90-', 100) == (90, 99)
+        assert parse_range('bytes=-10', 100) == (90, 99)
+        assert parse_range('bytes=50-500', 100) == (50, 99)
+        assert parse_range('bytes=100-200', 100) is None
+
+
+class TestObjectStore:
+    def test_list_paginates_over_keys_and_common_prefixes(self):
+        store = ObjectStore({'a/1': 1, 'a/2': 1, 'b': 1, 'c/1': 1, 'd': 1})
+        contents, prefixes, next_key = store.list('', '/', 2, None, None)
+        assert (contents, prefixes, next_key) == ([('b', 1)], ['a/'], 'c/1')
+        contents, prefixes, next_key = store.list('', '/', 2, next_key, None)
+        assert (contents, prefixes, next_key) == ([('d', 1)], ['c/'], None)
+
+
+class TestLocalS3Server:
+    def test_ranged_get(self, server):
+        status, headers, body = request(server, 'GET', 'j0_1GiB.bin', headers={'Range': 'bytes=1048576-1048585'})
+        assert status == 206
+        assert headers['Content-Range'] == f'bytes 1048576-1048585/{1024**3}'
+        assert body == b''.join(object_content('j0_1GiB.bin', 1048576, 10))
+
+    def test_head_missing_object(self, server):
+        with pytest.raises(urllib.error.HTTPError) as error:
+            request(server, 'HEAD', 'missing')
+        assert error.value.code == 404
+
+    def test_list_with_delimiter(self, server):
+        _, _, body = request(server, 'GET', '?list-type=2&delimiter=/')
+        root = ET.fromstring(body)
+        assert [key.text for key in root.findall('s3:Contents/s3:Key', NAMESPACE)] == ['j0_1GiB.bin', 'top']
+        assert [prefix.text for prefix in root.findall('s3:CommonPrefixes/s3:Prefix', NAMESPACE)] == ['dir/']
+
+    def test_multipart_upload(self, server):
+        _, _, body = request(server, 'POST', 'new?uploads', data=b'')
+        upload_id = ET.fromstring(body).find('s3:UploadId', NAMESPACE).text
+        request(server, 'PUT', f'new?partNumber=1&uploadId={upload_id}', data=b'x' * 100)
+        request(server, 'PUT', f'new?partNumber=2&uploadId={upload_id}', data=b'x' * 50)
+        request(server, 'POST', f'new?uploadId={upload_id}', data=b'<CompleteMultipartUpload/>')
+
+        _, headers, _ = request(server, 'HEAD', 'new')
+        assert headers['Content-Length'] == '150'
@@ -0,0 +1,55 @@
+import json
+import math
+
+import pytest
+
+from benchmarks.log_metrics import LogMetricsSeries, memory_reservations, parse_metric_line
+
+LOG = """\
+2026-01-01T00:00:00.000001Z  INFO mountpoint_s3::cli: mounting bucket
+2026-01-01T00:00:05.000100Z  INFO mountpoint_s3_fs::metrics: fuse.op_latency(us)[op=read]: n=10: avg=12.50 p99=90 max=95
+2026-01-01T00:00:05.000200Z  INFO mountpoint_s3_fs::metrics: mem.bytes_reserved[area=prefetch]: 100
+2026-01-01T00:00:05.000300Z  INFO mountpoint_s3_fs::metrics: s3.requests[op=get_object]: 42 (n=42)
+2026-01-01T00:00:05.000400Z DEBUG fuser::request: FUSE(123) ino 0x0000000000000002 READ fh FileHandle(1)
+2026-01-01T00:00:10.000100Z  INFO mountpoint_s3_fs::metrics: mem.bytes_reserved[area=upload]: 50
+2026-01-01T00:00:10.000200Z  INFO mountpoint_s3_fs::metrics: s3.requests[op=get_object]: 8 (n=8)
+"""
+
+
+class TestLogMetricsParsing:
+    def test_counter(self):
+        timestamp, values = parse_metric_line(LOG.splitlines()[3])
+        assert values == {'s3.requests[op=get_object]': 42}
+        assert timestamp == pytest.approx(1767225605.0003)
+
+    def test_histogram_statistics(self):
+        _, values = parse_metric_line(LOG.splitlines()[1])
+        assert values['fuse.op_latency[op=read].n'] == 10
+        assert values['fuse.op_latency[op=read].p99'] == 90
+        assert values['fuse.op_latency[op=read].avg'] == 12.5
+
+    def test_other_lines(self):
+        assert parse_metric_line(LOG.splitlines()[0]) is None
+        assert parse_metric_line(LOG.splitlines()[4]) is None
+
+
+class TestLogMetricsSeries:
+    def test_one_row_per_publication(self):
+        series = LogMetricsSeries().add_lines(LOG.splitlines(keepends=True))
+        assert [row['time'] for row in series.rows] == pytest.approx([0, 5])
+        requests = series.column('s3.requests[op=get_object]')
+        assert requests == [42, 8]
+        assert math.isnan(series.column('mem.bytes_reserved[area=upload]')[0])
+
+    def test_summary_and_files(self, tmp_path):
+        series = LogMetricsSeries().add_lines(LOG.splitlines(keepends=True))
+        summary = series.write(str(tmp_path))
+        assert summary['s3.requests[op=get_object]']['sum'] == 50
+        assert json.loads((tmp_path / 'log_metrics.json').read_text()) == summary
+        assert (tmp_path / 'log_metrics.npy').exists()
+
+    def test_memory_reservations_total_carries_gauges_forward(self):
+        series = LogMetricsSeries().add_lines(LOG.splitlines(keepends=True))
+        reservations = memory_reservations(series)
+        assert reservations['prefetch']['peak'] == 100
+        assert reservations['total']['peak'] == 150
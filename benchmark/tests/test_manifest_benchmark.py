@@ -0,0 +1,43 @@
+import os
+
+import pytest
+
+from benchmarks import manifest_benchmark
+from benchmarks.command import CommandResult
+from benchmarks.manifest_benchmark import MANIFEST_OUTPUT_FILE, ManifestBenchmark
+
+
+@pytest.fixture
+def make_config(compose_config):
+    return lambda work_dir: compose_config(
+        'benchmarks.manifest.objects=1000',
+        'benchmarks.manifest.depth=2',
+        'benchmarks.manifest.fanout=4',
+        'benchmarks.manifest.channels=2',
+        'benchmarks.manifest.lookups=100',
+        f"benchmarks.manifest.work_dir='{work_dir}'",
+    )
+
+
+class TestManifestBenchmark:
+    def test_command_and_work_dir(self, make_config, tmp_path, monkeypatch):
+        monkeypatch.setattr(manifest_benchmark, 'build_example', lambda name, **kwargs: name)
+        benchmark = ManifestBenchmark(make_config(tmp_path / 'work'), {})
+        benchmark.setup()
+        assert os.path.dirname(benchmark.work_dir) == str(tmp_path / 'work')
+
+        args = benchmark.get_command().args
+        assert args[0] == 'manifest_benchmark'
+        assert args[args.index('--objects') + 1] == '1000'
+        assert args[args.index('--channels') + 1] == '2'
+        assert args[args.index('--work-dir') + 1] == benchmark.work_dir
+        assert args[args.index('--output-file') + 1] == MANIFEST_OUTPUT_FILE
+
+        metadata = benchmark.post_process(CommandResult(returncode=0))
+        assert metadata['manifest_output_file'] == MANIFEST_OUTPUT_FILE
+        assert not os.path.exists(benchmark.work_dir)
+
+    def test_builds_with_manifest_feature(self, make_config, tmp_path):
+        targets = ManifestBenchmark.build_targets(make_config(tmp_path))
+        assert targets[0].example_name == 'manifest_benchmark'
+        assert targets[0].features == ('mountpoint-s3-fs/manifest',)
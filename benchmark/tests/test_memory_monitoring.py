@@ -0,0 +1,49 @@
+import json
+import os
+import time
+
+import pytest
+
+from monitoring.memory import MemorySamplerTool, parse_smaps_rollup, summarize
+
+SMAPS_ROLLUP = """\
+00400000-7ffd5a1c1000 ---p 00000000 00:00 0                              [rollup]
+Rss:               10240 kB
+Pss:                8192 kB
+Pss_Anon:           4096 kB
+Pss_File:           4096 kB
+Swap:                  0 kB
+"""
+
+
+class TestMemoryParsing:
+    def test_smaps_rollup_in_bytes(self):
+        values = parse_smaps_rollup(SMAPS_ROLLUP)
+        assert values == {
+            'rss_bytes': 10240 * 1024,
+            'pss_bytes': 8192 * 1024,
+            'pss_anon_bytes': 4096 * 1024,
+            'swap_bytes': 0,
+        }
+
+    def test_summary(self):
+        summary = summarize([1.0] * 50 + [10.0] + [4.0] * 149)
+        assert summary == {'peak': 10.0, 'p99': 4.0, 'steady': 4.0}
+
+    def test_summary_skips_missing_samples(self):
+        assert summarize([float('nan')]) is None
+
+
+class TestMemorySampler:
+    @pytest.mark.skipif(not os.path.exists('/proc/self/smaps_rollup'), reason="requires smaps_rollup")
+    def test_samples_target_process(self, tmp_path):
+        tool = MemorySamplerTool(os.getpid(), interval_secs=0.01, memory_target_bytes=1, output_dir=tmp_path)
+        tool.start()
+        time.sleep(0.1)
+        tool.stop()
+
+        summary = json.loads((tmp_path / 'memory.json').read_text())
+        assert summary['samples'] > 1
+        assert summary['rss_bytes']['peak'] > 0
+        assert summary['exceeded_target']
+        assert (tmp_path / 'memory.npy').exists()
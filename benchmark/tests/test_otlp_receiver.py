@@ -0,0 +1,112 @@
+import gzip
+import json
+import math
+import struct
+import urllib.error
+import urllib.request
+
+import pytest
+
+from monitoring.otlp import (
+    OtlpReceiverTool,
+    decode_export_request,
+    exponential_percentile,
+    metric_values,
+)
+
+
+def varint(value):
+    out = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+def field(number, value):
+    """Encode a length-delimited field, or a varint field for ints."""
+    if isinstance(value, int):
+        return varint(number << 3) + varint(value)
+    if isinstance(value, str):
+        value = value.encode()
+    return varint(number << 3 | 2) + varint(len(value)) + value
+
+
+def fixed64(number, value, fmt='<Q'):
+    return varint(number << 3 | 1) + struct.pack(fmt, value)
+
+
+def attribute(key, value):
+    return field(1, key) + field(2, field(1, value))
+
+
+def export_request(*metrics):
+    scope_metrics = field(1, field(1, 'mountpoint-s3')) + b''.join(field(2, metric) for metric in metrics)
+    return field(1, field(1, b'') + field(2, scope_metrics))
+
+
+def counter(name, value, **attributes):
+    point = b''.join(field(7, attribute(k, v)) for k, v in attributes.items())
+    point += fixed64(3, 1_000_000_000) + fixed64(6, value, '<q')
+    return field(1, name) + field(7, field(1, point) + field(2, 2) + field(3, 1))
+
+
+def exponential_histogram(name, scale, offset, counts, maximum):
+    # Positive bucket counts are packed varints, the scale and offset are zigzag-encoded
+    buckets = field(1, offset * 2 if offset >= 0 else -offset * 2 - 1) + field(2, b''.join(varint(c) for c in counts))
+    point = fixed64(4, sum(counts)) + fixed64(5, 100.0, '<d') + field(6, scale * 2) + field(8, buckets)
+    point += fixed64(12, 1.0, '<d') + fixed64(13, maximum, '<d')
+    return field(1, name) + field(10, field(1, point))
+
+
+class TestDecoding:
+    def test_counter(self):
+        metrics = decode_export_request(export_request(counter('s3.requests', 42, op='get_object')))
+        assert metrics[0]['name'] == 's3.requests'
+        assert metrics[0]['type'] == 'sum'
+        assert metric_values(metrics) == {'s3.requests[op=get_object]': 42}
+
+    def test_exponential_histogram(self):
+        # Scale 0 has base 2, so bucket 1 holds (2, 4] and bucket 3 holds (8, 16]
+        metrics = decode_export_request(export_request(exponential_histogram('fuse.op_latency', 0, 1, [9, 0, 1], 12.0)))
+        values = metric_values(metrics)
+        assert values['fuse.op_latency.count'] == 10
+        assert values['fuse.op_latency.sum'] == 100
+        assert values['fuse.op_latency.p50'] == 4
+        # Capped by the maximum, rather than the upper bound of the bucket
+        assert values['fuse.op_latency.p99'] == 12
+
+    def test_exponential_percentile_of_zero_values(self):
+        point = {'count': 4, 'scale': 0, 'zero_count': 4, 'positive': (0, []), 'negative': (0, [])}
+        assert exponential_percentile(point, 0.5) == 0
+        assert math.isnan(exponential_percentile({**point, 'count': 5}, 0.99))
+
+
+class TestOtlpReceiver:
+    def post(self, receiver, path, body, headers=None):
+        request = urllib.request.Request(f'{receiver.endpoint}{path}', data=body, headers=headers or {}, method='POST')
+        with urllib.request.urlopen(request) as response:
+            return response.status
+
+    def test_records_exports_per_path(self, tmp_path):
+        receiver = OtlpReceiverTool(output_dir=str(tmp_path))
+        receiver.start()
+        try:
+            assert self.post(receiver, '/v1/metrics', export_request(counter('s3.requests', 1))) == 200
+            assert self.post(receiver, '/v1/metrics', export_request(counter('s3.requests', 3))) == 200
+            body = gzip.compress(export_request(counter('s3.requests', 7)))
+            assert self.post(receiver, '/mount-1/v1/metrics', body, {'Content-Encoding': 'gzip'}) == 200
+            with pytest.raises(urllib.error.HTTPError):
+                self.post(receiver, '/v1/traces', b'')
+        finally:
+            receiver.stop()
+
+        summary = json.loads((tmp_path / 'otlp_metrics.json').read_text())
+        assert summary['s3.requests'] == {'samples': 2, 'sum': 4, 'mean': 2, 'max': 3, 'last': 3}
+        assert (tmp_path / 'otlp_metrics.npy').exists()
+        mount_summary = json.loads((tmp_path / 'mount-1' / 'otlp_metrics.json').read_text())
+        assert mount_summary['s3.requests']['last'] == 7
@@ -0,0 +1,74 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from benchmarks.output_capture import (
+    LIVE_METRICS_FILE,
+    OutputCapture,
+    RotatingGzipWriter,
+    parse_progress_line,
+    read_segments,
+)
+
+
+class TestParseProgressLine:
+    def test_crt_run(self):
+        assert parse_progress_line("Run:2 Secs:10.50 Gb/s:95.25") == {
+            "run": 2,
+            "elapsed_seconds": 10.5,
+            "throughput_gbps": 95.25,
+        }
+
+    def test_prefetch_iteration_in_gibibits(self):
+        record = parse_progress_line("3: received 1073741824 bytes in 1.00s: 8.00 Gib/s")
+        assert record["iteration"] == 3
+        assert record["throughput_gbps"] == pytest.approx(8 * 1.073741824)
+
+    def test_upload_iteration(self):
+        record = parse_progress_line("0: uploaded 1073741824 bytes in 2.00s: 4.00 Gib/s")
+        assert record["bytes"] == 1073741824
+        assert record["throughput_gbps"] == pytest.approx(4 * 1.073741824)
+
+    def test_other_lines(self):
+        assert parse_progress_line("Total: received 1 bytes in 1.00s across 1 iterations: 1.00 Gb/s") is None
+
+
+class TestRotatingGzipWriter:
+    def test_rotates_and_drops_oldest_segments(self, tmp_path):
+        prefix = str(tmp_path / "stdout")
+        writer = RotatingGzipWriter(prefix, segment_bytes=10, max_segments=2)
+        for i in range(5):
+            writer.write(f"line {i:04d}\n".encode())
+        writer.close()
+
+        assert sorted(os.listdir(tmp_path)) == ["stdout.003.log.gz", "stdout.004.log.gz"]
+        assert read_segments(prefix) == b"line 0003\nline 0004\n"
+
+
+class TestOutputCapture:
+    def test_streams_output_and_progress(self, tmp_path):
+        script = (
+            "import sys\n"
+            "for i in range(100): print(f'{i}: received 10 bytes in 1.00s: 1.00 Gb/s')\n"
+            "print('err', file=sys.stderr)"
+        )
+        process = subprocess.Popen([sys.executable, "-c", script], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        capture = OutputCapture(str(tmp_path), segment_bytes=1024, tail_bytes=100)
+        capture.start(process.stdout, process.stderr)
+        process.wait()
+        capture.join()
+        result = capture.result(process.returncode)
+
+        assert result.returncode == 0
+        assert result.stdout.endswith("99: received 10 bytes in 1.00s: 1.00 Gb/s\n")
+        assert len(result.stdout) <= 100
+        assert result.stderr == "err\n"
+        assert len(result.progress) == 100
+        assert read_segments(str(tmp_path / "stdout")).count(b"\n") == 100
+
+        with open(tmp_path / LIVE_METRICS_FILE) as f:
+            records = [json.loads(line) for line in f]
+        assert [record["iteration"] for record in records] == list(range(100))
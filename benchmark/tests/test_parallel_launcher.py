@@ -0,0 +1,98 @@
+from collections import deque
+
+import pytest
+from omegaconf import OmegaConf
+
+from hydra_plugins.smart_sweeper import parallel_launcher
+from hydra_plugins.smart_sweeper.parallel_launcher import (
+    ParallelBenchmarkLauncher,
+    check_parallel_job,
+    next_schedulable_job,
+    partition_cpus,
+)
+
+
+class TestPartitionCpus:
+    def test_even_split(self):
+        """CPUs are shared out into disjoint contiguous sets."""
+        assert partition_cpus(range(8), 2) == [(0, 1, 2, 3), (4, 5, 6, 7)]
+
+    def test_explicit_cpus_per_job_leaves_remainder_unused(self):
+        assert partition_cpus([3, 1, 2, 0, 4], 2, cpus_per_job=2) == [(0, 1), (2, 3)]
+
+    def test_too_many_slots(self):
+        with pytest.raises(ValueError):
+            partition_cpus(range(4), 2, cpus_per_job=3)
+
+
+class TestNextSchedulableJob:
+    def test_no_capacity_schedules_in_order(self):
+        pending = deque([(0, 100.0), (1, 100.0)])
+        assert next_schedulable_job(pending, used_gbps=500.0, running_jobs=3, capacity_gbps=None) == (0, 100.0)
+        assert list(pending) == [(1, 100.0)]
+
+    def test_skips_jobs_exceeding_capacity(self):
+        """A later job that fits is co-scheduled ahead of one that would exceed the NIC capacity."""
+        pending = deque([(0, 100.0), (1, 50.0)])
+        assert next_schedulable_job(pending, used_gbps=100.0, running_jobs=1, capacity_gbps=160.0) == (1, 50.0)
+        assert list(pending) == [(0, 100.0)]
+
+    def test_nothing_fits(self):
+        pending = deque([(0, 100.0)])
+        assert next_schedulable_job(pending, used_gbps=100.0, running_jobs=1, capacity_gbps=150.0) is None
+        assert list(pending) == [(0, 100.0)]
+
+    def test_unknown_throughput_runs_alone(self):
+        pending = deque([(0, None)])
+        assert next_schedulable_job(pending, used_gbps=10.0, running_jobs=1, capacity_gbps=100.0) is None
+        assert next_schedulable_job(pending, used_gbps=0.0, running_jobs=0, capacity_gbps=100.0) == (0, None)
+
+
+class TestCheckParallelJob:
+    def make_config(self, **monitoring):
+        return OmegaConf.create(
+            {
+                'mountpoint': {'cache': {'drop_page_cache': False}},
+                'monitoring': {'with_procfs': True, 'with_bwm': False, **monitoring},
+            }
+        )
+
+    def test_accepts_job_without_host_wide_state(self):
+        check_parallel_job(self.make_config(), 0)
+
+    def test_rejects_mpstat(self):
+        with pytest.raises(ValueError, match='with_procfs'):
+            check_parallel_job(self.make_config(with_procfs=False), 0)
+
+    def test_rejects_dropping_page_cache(self):
+        config = self.make_config()
+        config.mountpoint.cache.drop_page_cache = True
+        with pytest.raises(ValueError, match='page cache'):
+            check_parallel_job(config, 0)
+
+
+class TestSlotCapacity:
+    def test_slots_owning_interfaces_do_not_share_capacity(self):
+        launcher = ParallelBenchmarkLauncher(max_concurrency=1, interface_names=['eth0'], nic_capacity_gbps=100.0)
+        assert launcher.slots[0].capacity_gbps == 100.0
+        assert launcher.nic_capacity_gbps is None
+
+    def test_slots_without_interfaces_share_capacity(self):
+        launcher = ParallelBenchmarkLauncher(max_concurrency=1, nic_capacity_gbps=100.0)
+        assert launcher.slots[0].capacity_gbps is None
+        assert launcher.nic_capacity_gbps == 100.0
+
+    def test_shared_capacity_is_detected_from_network_interfaces(self, compose_config, monkeypatch):
+        monkeypatch.setattr(
+            parallel_launcher, 'detect_nic_capacity_gbps', lambda interface_names: 50.0 * len(interface_names)
+        )
+        launcher = ParallelBenchmarkLauncher(max_concurrency=1)
+        launcher.setup(
+            hydra_context=None, task_function=None, config=compose_config('network.interface_names=[eth0,eth1]')
+        )
+        assert launcher.nic_capacity_gbps == 100.0
+
+    def test_unknown_shared_capacity_is_refused(self, compose_config):
+        launcher = ParallelBenchmarkLauncher(max_concurrency=1)
+        with pytest.raises(ValueError, match='nic_capacity_gbps'):
+            launcher.setup(hydra_context=None, task_function=None, config=compose_config())
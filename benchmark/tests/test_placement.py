@@ -0,0 +1,65 @@
+import pytest
+
+from benchmarks import placement
+from benchmarks.placement import benchmark_prefix, format_cpu_list, parse_cpu_list, placement_prefix, role_cpus
+
+
+class TestCpuList:
+    def test_parse(self):
+        assert parse_cpu_list('0-3,8,10-11') == [0, 1, 2, 3, 8, 10, 11]
+        assert parse_cpu_list(5) == [5]
+
+    def test_parse_empty(self):
+        with pytest.raises(ValueError):
+            parse_cpu_list('')
+
+    def test_format_merges_ranges(self):
+        assert format_cpu_list([11, 0, 1, 2, 3, 8, 10]) == '0-3,8,10-11'
+
+
+class TestPlacementPrefix:
+    def test_unplaced(self, compose_config):
+        assert placement_prefix(compose_config(), 'mount') == []
+
+    def test_cpus(self, compose_config):
+        cfg = compose_config("placement.mount.cpus='0-1,2'")
+        assert placement_prefix(cfg, 'mount') == ['taskset', '-c', '0-2']
+
+    def test_numa_node(self, compose_config, monkeypatch):
+        monkeypatch.setattr(placement.shutil, 'which', lambda name: '/usr/bin/numactl')
+        cfg = compose_config('placement.benchmark.numa_node=1')
+        assert placement_prefix(cfg, 'benchmark') == ['numactl', '--cpunodebind=1', '--membind=1']
+
+    def test_numa_node_without_numactl(self, compose_config, monkeypatch):
+        monkeypatch.setattr(placement.shutil, 'which', lambda name: None)
+        monkeypatch.setattr(placement, 'numa_node_cpus', lambda node: [4, 5, 6])
+        cfg = compose_config('placement.benchmark.numa_node=1')
+        assert placement_prefix(cfg, 'benchmark') == ['taskset', '-c', '4-6']
+
+    def test_nic_node(self, compose_config, monkeypatch):
+        monkeypatch.setattr(placement.shutil, 'which', lambda name: '/usr/bin/numactl')
+        monkeypatch.setattr(placement, 'nic_numa_node', lambda interface_names: 0)
+        cfg = compose_config('network.interface_names=[eth0]', 'placement.mount.numa_node=nic')
+        assert placement_prefix(cfg, 'mount') == ['numactl', '--cpunodebind=0', '--membind=0']
+
+    def test_nic_node_requires_interfaces(self, compose_config):
+        with pytest.raises(ValueError, match='interface_names'):
+            placement_prefix(compose_config('placement.mount.numa_node=nic'), 'mount')
+
+    def test_cpus_and_numa_node_are_exclusive(self, compose_config):
+        with pytest.raises(ValueError, match='not both'):
+            role_cpus(compose_config("placement.mount.cpus='0'", 'placement.mount.numa_node=0'), 'mount')
+
+    def test_benchmark_keeps_harness_cpus_when_only_monitoring_is_placed(self, compose_config):
+        cfg = compose_config("placement.monitoring.cpus='7'")
+        assert benchmark_prefix(cfg, [0, 1, 2, 3, 4, 5, 6]) == ['taskset', '-c', '0-6']
+        assert benchmark_prefix(compose_config(), [0, 1]) == []
+
+
+class TestPlaceHarness:
+    def test_pins_every_thread(self, compose_config, monkeypatch):
+        monkeypatch.setattr(placement.os, 'listdir', lambda path: ['100', '101'])
+        pinned = {}
+        monkeypatch.setattr(placement.os, 'sched_setaffinity', lambda tid, cpus: pinned.__setitem__(tid, cpus))
+        placement.place_harness(compose_config("placement.monitoring.cpus='2-3'"))
+        assert pinned == {100: [2, 3], 101: [2, 3]}
@@ -0,0 +1,72 @@
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'analysis-scripts'))
+
+from results_index import ResultsIndex  # noqa: E402
+
+
+def parse_iteration(iteration_dir):
+    with open(os.path.join(iteration_dir, 'result.json')) as f:
+        result = json.load(f)
+    return result['config'], {'throughput_gbps': result['throughput_gbps']}
+
+
+def parse_many_metrics(iteration_dir):
+    config, metrics = parse_iteration(iteration_dir)
+    return config, {**metrics, **{f'metric_{i}': float(i) for i in range(70)}}
+
+
+def write_iteration(base_dir, job_num, config, throughput_gbps):
+    iteration_dir = os.path.join(base_dir, 'sweep', str(job_num))
+    os.makedirs(iteration_dir, exist_ok=True)
+    with open(os.path.join(iteration_dir, 'result.json'), 'w') as f:
+        json.dump({'config': config, 'throughput_gbps': throughput_gbps}, f)
+    # Make changes visible despite coarse file system timestamps
+    os.utime(iteration_dir, (job_num + 1000, job_num + 1000))
+
+
+class TestResultsIndex:
+    def test_groups_by_varying_parameters(self, tmp_path):
+        write_iteration(tmp_path, 0, {'read_size': 1, 'iteration': 0, 'direct_io': False}, 10.0)
+        write_iteration(tmp_path, 1, {'read_size': 2, 'iteration': 0, 'direct_io': False}, 20.0)
+        write_iteration(tmp_path, 2, {'read_size': 1, 'iteration': 1, 'direct_io': False}, 30.0)
+        write_iteration(tmp_path, 3, {'read_size': 2, 'iteration': 1, 'direct_io': False}, None)
+
+        index = ResultsIndex(str(tmp_path / 'index.sqlite'))
+        assert index.update(str(tmp_path), parse_iteration, workers=1) == 4
+
+        assert index.varying_parameters(ignore=['iteration']) == ['read_size']
+        assert index.group_metrics(['read_size'], ['throughput_gbps']) == [
+            ((('read_size', '1'),), {'throughput_gbps': [10.0, 30.0]}),
+            ((('read_size', '2'),), {'throughput_gbps': [20.0]}),
+        ]
+
+    def test_only_parses_new_or_changed_iterations(self, tmp_path):
+        write_iteration(tmp_path, 0, {'read_size': 1}, 10.0)
+        write_iteration(tmp_path, 1, {'read_size': 2}, 20.0)
+        index_path = str(tmp_path / 'index.sqlite')
+        assert ResultsIndex(index_path).update(str(tmp_path), parse_iteration, workers=1) == 2
+
+        write_iteration(tmp_path, 2, {'read_size': 3}, 30.0)
+        index = ResultsIndex(index_path)
+        assert index.update(str(tmp_path), parse_iteration, workers=1) == 1
+        assert index.group_metrics([], ['throughput_gbps']) == [((), {'throughput_gbps': [10.0, 20.0, 30.0]})]
+
+    def test_groups_many_metrics(self, tmp_path):
+        write_iteration(tmp_path, 0, {'read_size': 1}, 10.0)
+        write_iteration(tmp_path, 1, {}, 20.0)
+
+        index = ResultsIndex(str(tmp_path / 'index.sqlite'))
+        index.update(str(tmp_path), parse_many_metrics, workers=1)
+        metrics = ['throughput_gbps', *(f'metric_{i}' for i in range(70))]
+        groups = sorted(index.group_metrics(['read_size'], metrics))
+        assert [key for key, _ in groups] == [(('read_size', '1'),), (('read_size', 'N/A'),)]
+        assert groups[0][1]['metric_69'] == [69.0]
+
+    def test_parser_version_change_rebuilds_index(self, tmp_path):
+        write_iteration(tmp_path, 0, {'read_size': 1}, 10.0)
+        index_path = str(tmp_path / 'index.sqlite')
+        assert ResultsIndex(index_path).update(str(tmp_path), parse_iteration, workers=1) == 1
+        assert ResultsIndex(index_path, parser_version=2).update(str(tmp_path), parse_iteration, workers=1) == 1
@@ -0,0 +1,55 @@
+import pytest
+
+from benchmarks.s3io_benchmark import S3ioBenchmark, render_toml
+
+
+@pytest.fixture
+def make_config(compose_config):
+    return lambda *overrides: compose_config(
+        's3_bucket=bucket',
+        'application_workers=3',
+        'object_size_in_gib=1',
+        'network.maximum_throughput_gbps=100',
+        *overrides,
+    )
+
+
+class TestS3ioJobFile:
+    def test_global_settings(self, make_config):
+        config = S3ioBenchmark(make_config('benchmarks.s3io.randseed=7'), {}).job_config()['global']
+        assert config['bucket'] == 'bucket'
+        assert config['object_size'] == 1024**3
+        assert config['max_duration'] == '30s'
+        assert config['throughput_target_gbps'] == 100.0
+        assert config['randseed'] == 7
+        assert config['bind'] is None
+
+    def test_one_read_job_per_worker(self, make_config):
+        sections = S3ioBenchmark(make_config(), {}).job_config()
+        assert sections['jobs.read_0'] == {'workload_type': 'read', 'object_key': 'j0_1GiB.bin'}
+        assert [name for name in sections if name.startswith('jobs.')] == ['jobs.read_0', 'jobs.read_1', 'jobs.read_2']
+
+    def test_mixed_workload_splits_workers(self, make_config):
+        sections = S3ioBenchmark(make_config('benchmarks.s3io.workload_type=mixed'), {}).job_config()
+        assert [name for name in sections if name.startswith('jobs.')] == ['jobs.read_0', 'jobs.read_1', 'jobs.write_0']
+
+    def test_unknown_workload_type(self, make_config):
+        with pytest.raises(ValueError):
+            S3ioBenchmark(make_config('benchmarks.s3io.workload_type=append'), {}).job_config()
+
+    def test_render_toml(self):
+        rendered = render_toml(
+            {
+                'global': {'bucket': 'a "b"', 'bind': ['eth0', 'eth1'], 'randseed': None, 'generate_object': False},
+                'jobs.read_0': {'object_size': 10},
+            }
+        )
+        assert rendered == (
+            '[global]\n'
+            'bucket = "a \\"b\\""\n'
+            'bind = ["eth0", "eth1"]\n'
+            'generate_object = false\n'
+            '\n'
+            '[jobs.read_0]\n'
+            'object_size = 10\n'
+        )
@@ -0,0 +1,45 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'analysis-scripts'))
+
+from compare import improvement  # noqa: E402
+from significance import bootstrap_median_difference, compare_samples, mann_whitney_u  # noqa: E402
+
+
+class TestMannWhitneyU:
+    def test_exact_p_value_of_separated_samples(self):
+        """With 3 samples each, the most extreme ordering has probability 1/20 on each side."""
+        assert mann_whitney_u([1, 2, 3], [4, 5, 6]) == (9, pytest.approx(0.1))
+
+    def test_identical_samples_are_not_significant(self):
+        _, p_value = mann_whitney_u([1.0, 1.0, 1.0], [1.0, 1.0, 1.0])
+        assert p_value == 1.0
+
+    def test_normal_approximation_with_ties(self):
+        u, p_value = mann_whitney_u([1, 2, 3, 4, 5], [3, 4, 5, 6, 7])
+        assert u == 20.5
+        assert p_value == pytest.approx(0.1138, abs=1e-3)
+
+
+class TestCompareSamples:
+    def test_regression_effect_size(self):
+        comparison = compare_samples([10.0, 10.2, 9.9, 10.1, 10.0], [9.0, 9.1, 8.9, 9.2, 9.0])
+        assert comparison.p_value < 0.05
+        assert comparison.relative_change == pytest.approx(-0.1)
+        assert comparison.rank_biserial == -1.0
+
+    def test_bootstrap(self):
+        assert bootstrap_median_difference([10.0, 10.2, 9.9], [9.0, 9.1, 8.9]) == 0.0
+        assert compare_samples([1.0, 2.0], [1.0, 2.0], test='bootstrap').p_value == 1.0
+
+
+class TestImprovement:
+    def test_direction_of_metrics(self):
+        assert improvement('throughput_gbps', 0.1) == 0.1
+        assert improvement('rows_per_second', 0.1) == 0.1
+        assert improvement('ipc', 0.1) == 0.1
+        assert improvement('cache_speedup', 0.1) == 0.1
+        assert improvement('clat_p99_ms', 0.1) == -0.1
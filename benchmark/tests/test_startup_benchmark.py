@@ -0,0 +1,136 @@
+import json
+import subprocess
+
+import pytest
+
+from benchmarks import startup_benchmark, startup_probe
+from benchmarks.startup_benchmark import MOUNT_CONFIG_FILE, STARTUP_CONFIG_FILE, StartupBenchmark
+
+
+@pytest.fixture
+def make_config(compose_config):
+    return lambda *overrides: compose_config(
+        's3_bucket=bucket',
+        "endpoint_url='http://127.0.0.1:9000'",
+        'crt_eventloop_threads=2',
+        'network.maximum_throughput_gbps=100',
+        'mountpoint.prefix=data/',
+        'benchmarks.startup.repetitions=3',
+        'benchmarks.startup.manifest_path=manifest.csv',
+        "benchmarks.startup.manifest_checksum='NHslfQ=='",
+        *overrides,
+    )
+
+
+class TestManifestMount:
+    @pytest.fixture
+    def benchmark(self, make_config, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setattr(startup_benchmark, 'build_example', lambda name, **kwargs: f'/bin/{name}')
+        benchmark = StartupBenchmark(make_config(), {})
+        benchmark.setup()
+        yield benchmark
+        benchmark.post_process(startup_benchmark.CommandResult(returncode=0))
+
+    def test_mounts_the_manifest_in_the_foreground(self, benchmark):
+        with open(STARTUP_CONFIG_FILE) as f:
+            probe_config = json.load(f)
+        assert probe_config['args'][0] == '/bin/mount_from_config'
+        assert probe_config['foreground']
+        assert probe_config['lookup_path'] == 'manifest/j0_1GiB.bin'
+        assert probe_config['env']['UNSTABLE_CRT_EVENTLOOP_THREADS'] == '2'
+        assert probe_config['env']['AWS_ENDPOINT_URL'] == 'http://127.0.0.1:9000'
+
+        with open(MOUNT_CONFIG_FILE) as f:
+            mount_config = json.load(f)
+        assert mount_config['mountpoint'] == probe_config['mount_dir']
+        assert mount_config['endpoint_url'] == 'http://127.0.0.1:9000'
+        assert mount_config['throughput_config'] == {'type': 'Explicit', 'throughput': 100.0}
+        assert mount_config['channels'][0]['bucket_name'] == 'bucket'
+        assert mount_config['channels'][0]['prefix'] == 'data/'
+        assert mount_config['channels'][0]['manifest_checksum'] == 'NHslfQ=='
+
+    def test_builds_mount_from_config(self, make_config):
+        targets = StartupBenchmark.build_targets(make_config())
+        assert [target.example_name for target in targets] == ['mount_from_config']
+        assert 'mountpoint-s3-fs/manifest' in targets[0].features
+
+
+class TestCache:
+    def test_rejects_express_cache(self, make_config, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        config = make_config(
+            'benchmarks.startup.manifest_path=null', 'mountpoint.cache.xz_bucket=cache--usw2-az1--x-s3'
+        )
+        with pytest.raises(ValueError, match='xz_bucket'):
+            StartupBenchmark(config, {}).setup()
+
+    def test_each_repetition_caches_to_its_own_directory(self):
+        args = ['mount-s3', 'bucket', '/mnt', '--cache=/nvme/mountpoint-cache-a', '--max-cache-size=100']
+        assert startup_probe.cache_args(args, '/nvme/mountpoint-cache-a', '/nvme/mountpoint-cache-b') == [
+            'mount-s3',
+            'bucket',
+            '/mnt',
+            '--cache=/nvme/mountpoint-cache-b',
+            '--max-cache-size=100',
+        ]
+
+
+class HungProcess:
+    def __init__(self):
+        self.killed = False
+
+    def poll(self):
+        return -9 if self.killed else None
+
+    def wait(self, timeout=None):
+        if not self.killed:
+            raise subprocess.TimeoutExpired('mount-s3', timeout)
+        return -9
+
+    def kill(self):
+        self.killed = True
+
+
+class TestStartupProbe:
+    def test_hung_mount_is_killed_on_timeout(self, tmp_path, monkeypatch):
+        process = HungProcess()
+        monkeypatch.setattr(startup_probe.subprocess, 'Popen', lambda args, **kwargs: process)
+        config = {
+            'mount_dir': str(tmp_path),
+            'lookup_path': 'j0_1GiB.bin',
+            'args': ['mount-s3'],
+            'env': {},
+            'foreground': False,
+            'timeout_secs': 0.01,
+            'read_bytes': 1,
+        }
+        with pytest.raises(subprocess.TimeoutExpired):
+            startup_probe.run_repetition(config)
+        assert process.killed
+
+    def test_writes_distribution_of_each_phase(self, tmp_path, monkeypatch):
+        timings = iter([0.1, 0.3, 0.2])
+
+        def run_repetition(config):
+            mount_seconds = next(timings)
+            return {
+                'bytes': 1,
+                'mount_seconds': mount_seconds,
+                'lookup_seconds': mount_seconds + 0.01,
+                'first_byte_seconds': mount_seconds + 0.05,
+            }
+
+        monkeypatch.setattr(startup_probe, 'run_repetition', run_repetition)
+        config_path = tmp_path / 'startup-config.json'
+        output_path = tmp_path / 'startup-output.json'
+        config_path.write_text(json.dumps({'repetitions': 3, 'output_file': str(output_path)}))
+        startup_probe.main(str(config_path))
+
+        output = json.loads(output_path.read_text())
+        assert len(output['repetitions']) == 3
+        summary = output['summary']
+        assert 'total_bytes' not in summary
+        assert summary['mount_seconds']['p50'] == pytest.approx(0.2)
+        assert summary['mount_seconds']['max'] == pytest.approx(0.3)
+        assert summary['first_byte_seconds']['min'] == pytest.approx(0.15)
@@ -0,0 +1,76 @@
+import json
+
+from hydra_plugins.smart_sweeper.smart_benchmark_sweeper import SmartBenchmarkSweeper
+from hydra_plugins.smart_sweeper.sweep_manifest import (
+    FAILED,
+    MISSING,
+    SUCCEEDED,
+    ManifestJob,
+    SweepManifest,
+    job_state,
+    overrides_hash,
+)
+
+
+def write_job(job_dir, success=True, output=True):
+    job_dir.mkdir(parents=True)
+    (job_dir / 'metadata.json').write_text(json.dumps({'success': success}))
+    if output:
+        (job_dir / 'upload-output.json').write_text(json.dumps({'summary': {}}))
+
+
+class TestSweepManifest:
+    def test_job_numbers_are_kept_across_resumes(self, tmp_path):
+        manifest = SweepManifest.load(tmp_path)
+        combinations = [['benchmark_type=fio', f'iteration={i}'] for i in range(3)]
+        assert [job.job_num for job in manifest.assign_job_nums(combinations)] == [0, 1, 2]
+        manifest.save()
+
+        # Combinations are matched by their overrides, new ones are numbered after the recorded ones
+        resumed = SweepManifest.load(tmp_path)
+        combinations = [['iteration=3', 'benchmark_type=fio'], ['iteration=1', 'benchmark_type=fio']]
+        assert [job.job_num for job in resumed.assign_job_nums(combinations)] == [3, 1]
+        assert sorted(resumed.jobs) == [0, 1, 2, 3]
+
+    def test_hash_ignores_order(self):
+        assert overrides_hash(['a=1', 'b=2']) == overrides_hash(['b=2', 'a=1'])
+        assert overrides_hash(['a=1', 'b=2']) != overrides_hash(['a=1', 'b=3'])
+
+    def test_job_state(self, tmp_path):
+        write_job(tmp_path / '0')
+        write_job(tmp_path / '1', success=False)
+        write_job(tmp_path / '2', output=False)
+        (tmp_path / '3').mkdir()
+        write_job(tmp_path / '5', output=False)
+        (tmp_path / '5' / 'upload-output.json').write_text('{"truncated": ')
+        write_job(tmp_path / '6', output=False)
+        (tmp_path / '6' / 'startup-output.json').write_text(json.dumps({'summary': {'first_byte_seconds': {}}}))
+        assert job_state(str(tmp_path / '0')) == SUCCEEDED
+        assert job_state(str(tmp_path / '1')) == FAILED
+        assert job_state(str(tmp_path / '2')) == FAILED
+        assert job_state(str(tmp_path / '3')) == FAILED
+        assert job_state(str(tmp_path / '4')) == MISSING
+        assert job_state(str(tmp_path / '5')) == FAILED
+        assert job_state(str(tmp_path / '6')) == SUCCEEDED
+
+
+class RecordingLauncher:
+    def __init__(self):
+        self.launches = []
+
+    def launch(self, job_overrides, initial_job_idx):
+        self.launches.append((initial_job_idx, list(job_overrides)))
+        return []
+
+
+class TestResume:
+    def test_launches_consecutive_runs_of_job_numbers(self):
+        sweeper = SmartBenchmarkSweeper(resume=True)
+        sweeper.launcher = RecordingLauncher()
+        jobs = [ManifestJob(job_num=num, hash=str(num), overrides=[f'iteration={num}']) for num in (4, 1, 2, 7)]
+        sweeper._launch_jobs(jobs)
+        assert sweeper.launcher.launches == [
+            (1, [['iteration=1'], ['iteration=2']]),
+            (4, [['iteration=4']]),
+            (7, [['iteration=7']]),
+        ]
@@ -0,0 +1,90 @@
+import json
+from types import SimpleNamespace
+
+from hydra_plugins.smart_sweeper.results import pareto_ranks, read_cpu_cores
+from hydra_plugins.smart_sweeper.smart_benchmark_sweeper import SmartBenchmarkSweeper, mount_configuration
+
+# Throughput in Gbps and CPU cores of each number of FUSE threads
+RESULTS = {'1': (2.0, 1.0), '4': (8.0, 2.0), '16': (10.0, 4.0), '64': (9.0, 8.0)}
+
+
+class FakeLauncher:
+    """Writes the output of each job as if it ran, with results depending on `mountpoint.fuse_threads`."""
+
+    def __init__(self, base_dir):
+        self.base_dir = base_dir
+        self.launches = []
+
+    def launch(self, job_overrides, initial_job_idx):
+        self.launches.append(list(job_overrides))
+        results = []
+        for job_idx, overrides in enumerate(job_overrides, start=initial_job_idx):
+            fuse_threads = dict(override.split('=', 1) for override in overrides)['mountpoint.fuse_threads']
+            throughput, cores = RESULTS[fuse_threads]
+            job_dir = self.base_dir / str(job_idx)
+            job_dir.mkdir()
+            fio_output = {'jobs': [{'read': {'io_bytes': int(throughput * 1e9 / 8), 'runtime': 1000}}]}
+            (job_dir / 'fio.sequential_read.json').write_text(json.dumps(fio_output))
+            (job_dir / 'metadata.json').write_text(json.dumps({'success': True, 'target_cpu_cores': cores}))
+            results.append(SimpleNamespace(hydra_cfg=None, working_dir=str(job_dir)))
+        return results
+
+
+class TestParetoRanks:
+    def test_frontier_has_rank_zero(self):
+        points = [(2.0, 1.0), (8.0, 2.0), (10.0, 4.0), (9.0, 8.0), (1.0, 2.0)]
+        assert pareto_ranks(points) == [0, 0, 0, 1, 1]
+
+    def test_equal_points_do_not_dominate_each_other(self):
+        assert pareto_ranks([(1.0, 1.0), (1.0, 1.0)]) == [0, 0]
+
+
+class TestMountConfiguration:
+    def test_maps_overrides_to_mount_options(self):
+        overrides = [
+            'benchmark_type=fio',
+            'mountpoint.fuse_threads=16',
+            'mountpoint.mountpoint_max_background=256',
+            'mountpoint.mountpoint_congestion_threshold=null',
+            'mountpoint.read_ahead_kb=1024',
+        ]
+        assert mount_configuration(overrides) == {
+            'args': ['--max-threads=16'],
+            'env': {'UNSTABLE_MOUNTPOINT_MAX_BACKGROUND': '256'},
+            'read_ahead_kb': 1024,
+        }
+
+
+class TestSuccessiveHalving:
+    def test_keeps_the_best_configurations(self, tmp_path):
+        sweeper = SmartBenchmarkSweeper(tune={'enabled': True, 'min_iterations': 1, 'max_iterations': 4, 'eta': 2})
+        launcher = FakeLauncher(tmp_path)
+        sweeper.launcher = launcher
+        combinations = [
+            ['benchmark_type=fio', f'mountpoint.fuse_threads={threads}', 'iteration=0'] for threads in RESULTS
+        ]
+        sweeper._sweep_tune(combinations, tmp_path)
+
+        # 4 configurations for 1 iteration, the 2 best for 2, then the best for 4
+        assert [len(batch) for batch in launcher.launches] == [4, 2, 2]
+        assert launcher.launches[2] == [
+            ['benchmark_type=fio', 'mountpoint.fuse_threads=16', 'iteration=2'],
+            ['benchmark_type=fio', 'mountpoint.fuse_threads=16', 'iteration=3'],
+        ]
+
+        summary = json.loads((tmp_path / 'tune.json').read_text())
+        by_threads = {configuration['overrides'][1]: configuration for configuration in summary['configurations']}
+        assert [by_threads[f'mountpoint.fuse_threads={threads}']['pareto'] for threads in RESULTS] == [
+            True,
+            True,
+            True,
+            False,
+        ]
+        assert by_threads['mountpoint.fuse_threads=16']['iterations'] == 4
+        assert by_threads['mountpoint.fuse_threads=64']['rung'] == 0
+        assert summary['recommended']['mount'] == {'args': ['--max-threads=16'], 'env': {}, 'read_ahead_kb': None}
+
+    def test_read_cpu_cores(self, tmp_path):
+        (tmp_path / 'metadata.json').write_text(json.dumps({'target_cpu_cores': 1.5}))
+        assert read_cpu_cores(str(tmp_path)) == 1.5
+        assert read_cpu_cores(str(tmp_path / 'missing')) is None
@@ -0,0 +1,38 @@
+import pytest
+
+from benchmarks.upload_benchmark import UPLOAD_OUTPUT_FILE, UploadBenchmark
+
+
+@pytest.fixture
+def make_config(compose_config):
+    return lambda *overrides: compose_config(
+        's3_bucket=bucket',
+        'application_workers=4',
+        'object_size_in_gib=1',
+        'write_part_size=8388608',
+        *overrides,
+    )
+
+
+def get_args(cfg):
+    benchmark = UploadBenchmark(cfg, {})
+    benchmark.executable_path = 'upload_benchmark'
+    return benchmark.get_command().args
+
+
+class TestUploadCommand:
+    def test_one_writer_per_application_worker(self, make_config):
+        args = get_args(make_config())
+        assert args[:3] == ['upload_benchmark', 'bucket', 'upload_benchmark.bin']
+        assert args[args.index('--concurrency') + 1] == '4'
+        assert args[args.index('--object-size') + 1] == str(1024**3)
+        assert args[args.index('--write-part-size') + 1] == '8388608'
+        assert args[args.index('--output-file') + 1] == UPLOAD_OUTPUT_FILE
+        assert '--incremental-upload' not in args
+        assert '--checksum-algorithm' not in args
+
+    def test_incremental_upload_and_checksums(self, make_config):
+        cfg = make_config('benchmarks.upload.incremental_upload=true', 'mountpoint.upload_checksums=off')
+        args = get_args(cfg)
+        assert '--incremental-upload' in args
+        assert args[args.index('--checksum-algorithm') + 1] == 'off'
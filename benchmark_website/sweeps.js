@@ -0,0 +1,425 @@
+'use strict';
+(function() {
+  // Results loaded when the page has no `data` query parameter, relative to the page
+  const DEFAULT_DATA_URL = 'sweeps.json';
+  // Most runs of a history loaded at once, spread over its whole time range (override with `max_runs`)
+  const DEFAULT_MAX_RUNS = 120;
+  // Metric of `autogroup.py --json-output` holding the throughput of each iteration
+  const THROUGHPUT_METRIC = 'throughputs';
+  // Latency metrics reported by `autogroup.py` as percentiles, e.g. `clat_p99_ms` or `first_byte_p50_ms`
+  const PERCENTILE_METRIC = /^(.+)_(p50|p90|p99|p99\.9)_ms$/;
+  const PERCENTILES = ['p50', 'p90', 'p99', 'p99.9'];
+  const colors = ['#3273dc', '#ff3860', '#23d160', '#ff9f43', '#b86bff', '#209cee', '#ffdd57', '#4a4a4a'];
+
+  const state = {
+    runs: [],
+    runIndex: 0,
+    metric: THROUGHPUT_METRIC,
+    facet: '',
+    filters: {},
+    charts: [],
+  };
+
+  function quantile(sorted, q) {
+    const position = (sorted.length - 1) * q;
+    const lower = Math.floor(position);
+    const upper = Math.ceil(position);
+    return sorted[lower] + (sorted[upper] - sorted[lower]) * (position - lower);
+  }
+
+  function boxStats(values) {
+    const sorted = values.filter(v => v !== null && v !== undefined).sort((a, b) => a - b);
+    if (sorted.length === 0) {
+      return null;
+    }
+    return {
+      min: sorted[0],
+      q1: quantile(sorted, 0.25),
+      median: quantile(sorted, 0.5),
+      q3: quantile(sorted, 0.75),
+      max: sorted[sorted.length - 1],
+      count: sorted.length,
+    };
+  }
+
+  function median(values) {
+    const stats = values ? boxStats(values) : null;
+    return stats ? stats.median : null;
+  }
+
+  // Each result is a configuration: its parameters are scalars, its metrics lists of one value per iteration
+  function parameterNames(results) {
+    const names = new Set();
+    for (const result of results) {
+      for (const [key, value] of Object.entries(result)) {
+        if (!Array.isArray(value) && key !== 'count') {
+          names.add(key);
+        }
+      }
+    }
+    return [...names].sort((a, b) => (a === 'benchmark_type' ? -1 : b === 'benchmark_type' ? 1 : a.localeCompare(b)));
+  }
+
+  function metricNames(results) {
+    const names = new Set();
+    for (const result of results) {
+      for (const [key, value] of Object.entries(result)) {
+        if (Array.isArray(value)) {
+          names.add(key);
+        }
+      }
+    }
+    return [...names].sort((a, b) => (a === THROUGHPUT_METRIC ? -1 : b === THROUGHPUT_METRIC ? 1 : a.localeCompare(b)));
+  }
+
+  function metricLabel(metric) {
+    return metric === THROUGHPUT_METRIC ? 'throughput_gbps' : metric;
+  }
+
+  function distinctValues(results, param) {
+    const values = [...new Set(results.map(result => String(result[param])))];
+    return values.sort((a, b) => {
+      const [x, y] = [Number(a), Number(b)];
+      return isNaN(x) || isNaN(y) ? a.localeCompare(b) : x - y;
+    });
+  }
+
+  function configLabel(result, params) {
+    return params.length > 0 ? params.map(param => param + '=' + result[param]).join(', ') : 'all';
+  }
+
+  // Accepts the output of `autogroup.py --json-output`, or a history of runs each pointing at one
+  function normalizeRuns(json, label) {
+    if (Array.isArray(json)) {
+      return [{ label, results: json }];
+    }
+    if (json && Array.isArray(json.runs)) {
+      return json.runs.map((run, index) => ({
+        label: run.label || run.date || run.commit || String(index),
+        date: run.date,
+        commit: run.commit,
+        results: run.results,
+      }));
+    }
+    throw new Error('expected a list of configurations, or an object with a list of runs');
+  }
+
+  // Keeps at most `maxRuns` runs, the last one in each of as many equal spans of time (or of runs, without dates)
+  function downsampleRuns(runs, maxRuns) {
+    if (runs.length <= maxRuns) {
+      return runs;
+    }
+    const times = runs.map(run => Date.parse(run.date));
+    const dated = times.every(time => !isNaN(time));
+    const order = runs.map((_, index) => index);
+    if (dated) {
+      order.sort((a, b) => times[a] - times[b]);
+    }
+    const position = index => (dated ? times[order[index]] : index);
+    const first = position(0);
+    const span = position(order.length - 1) - first || 1;
+    const buckets = new Map();
+    order.forEach((runIndex, index) => {
+      const bucket = Math.floor(((position(index) - first) / span) * (maxRuns - 1));
+      buckets.set(bucket, runs[runIndex]);
+    });
+    return [...buckets.values()];
+  }
+
+  async function fetchJson(url) {
+    const response = await fetch(url);
+    if (!response.ok) {
+      throw new Error(url + ': ' + response.status + ' ' + response.statusText);
+    }
+    return response.json();
+  }
+
+  async function loadRuns(dataUrl, maxRuns) {
+    const url = new URL(dataUrl, window.location.href);
+    const runs = downsampleRuns(normalizeRuns(await fetchJson(url), dataUrl), maxRuns);
+    // Results of a history's runs are fetched relative to the history, only for the runs kept
+    return Promise.all(
+      runs.map(async run =>
+        typeof run.results === 'string' ? { ...run, results: await fetchJson(new URL(run.results, url)) } : run
+      )
+    );
+  }
+
+  function setStatus(message) {
+    document.getElementById('status').textContent = message;
+  }
+
+  function showRuns(runs) {
+    if (runs.length === 0 || runs.some(run => !Array.isArray(run.results))) {
+      throw new Error('no results to show');
+    }
+    state.runs = runs;
+    state.runIndex = runs.length - 1;
+    state.filters = {};
+    state.facet = '';
+    const metrics = metricNames(runs[state.runIndex].results);
+    state.metric = metrics.includes(THROUGHPUT_METRIC) ? THROUGHPUT_METRIC : metrics[0];
+    renderControls();
+    render();
+  }
+
+  function createSelect(label, options, selected, onChange) {
+    const wrapper = document.createElement('label');
+    wrapper.className = 'control';
+    wrapper.appendChild(document.createTextNode(label));
+    const select = document.createElement('select');
+    for (const [value, text] of options) {
+      const option = document.createElement('option');
+      option.value = value;
+      option.textContent = text;
+      option.selected = value === selected;
+      select.appendChild(option);
+    }
+    select.onchange = () => onChange(select.value);
+    wrapper.appendChild(select);
+    return wrapper;
+  }
+
+  function renderControls() {
+    const controls = document.getElementById('controls');
+    controls.textContent = '';
+    const results = state.runs[state.runIndex].results;
+    const params = parameterNames(results);
+
+    if (state.runs.length > 1) {
+      const runOptions = state.runs.map((run, index) => [String(index), run.label]);
+      controls.appendChild(
+        createSelect('Run', runOptions, String(state.runIndex), value => {
+          state.runIndex = Number(value);
+          renderControls();
+          render();
+        })
+      );
+    }
+    const metricOptions = metricNames(results).map(metric => [metric, metricLabel(metric)]);
+    controls.appendChild(
+      createSelect('Metric', metricOptions, state.metric, value => {
+        state.metric = value;
+        render();
+      })
+    );
+    const facetOptions = [['', 'none'], ...params.map(param => [param, param])];
+    controls.appendChild(
+      createSelect('Facet by', facetOptions, state.facet, value => {
+        state.facet = value;
+        render();
+      })
+    );
+    for (const param of params) {
+      const values = distinctValues(results, param);
+      if (values.length < 2) {
+        continue;
+      }
+      const options = [['', 'all'], ...values.map(value => [value, value])];
+      controls.appendChild(
+        createSelect(param, options, state.filters[param] || '', value => {
+          state.filters[param] = value;
+          render();
+        })
+      );
+    }
+  }
+
+  function matchesFilters(result) {
+    return Object.entries(state.filters).every(([param, value]) => value === '' || String(result[param]) === value);
+  }
+
+  function addChart(parent, config) {
+    const canvas = document.createElement('canvas');
+    canvas.className = 'benchmark-chart';
+    parent.appendChild(canvas);
+    Chart.platform.disableCSSInjection = true;
+    state.charts.push(new Chart(canvas, config));
+  }
+
+  function addSection(title) {
+    const section = document.createElement('div');
+    section.className = 'benchmark-set';
+    const heading = document.createElement('h2');
+    heading.className = 'sweep-title';
+    heading.textContent = title;
+    section.appendChild(heading);
+    const graphs = document.createElement('div');
+    graphs.className = 'benchmark-graphs';
+    section.appendChild(graphs);
+    document.getElementById('main').appendChild(section);
+    return graphs;
+  }
+
+  // Box plots are drawn as floating bars sharing each category, with the median as a flat point
+  function renderBoxPlot(parent, title, labels, stats, metric) {
+    const color = colors[0];
+    const datasets = [
+      {
+        label: 'min-max',
+        data: stats.map(s => (s ? [s.min, s.max] : null)),
+        backgroundColor: color,
+        barPercentage: 0.05,
+      },
+      {
+        label: 'p25-p75',
+        data: stats.map(s => (s ? [s.q1, s.q3] : null)),
+        backgroundColor: color + '60',
+        borderColor: color,
+        borderWidth: 1,
+        barPercentage: 0.6,
+      },
+      {
+        label: 'median',
+        type: 'line',
+        data: stats.map(s => (s ? s.median : null)),
+        showLine: false,
+        pointStyle: 'line',
+        pointRadius: 12,
+        pointHoverRadius: 12,
+        borderColor: '#000',
+        borderWidth: 2,
+      },
+    ];
+    addChart(parent, {
+      type: 'bar',
+      data: { labels, datasets },
+      options: {
+        title: { display: true, text: title },
+        legend: { display: false },
+        scales: {
+          xAxes: [{ stacked: true }],
+          yAxes: [{ stacked: false, scaleLabel: { display: true, labelString: metricLabel(metric) } }],
+        },
+        tooltips: {
+          mode: 'index',
+          intersect: false,
+          filter: item => item.datasetIndex === 2,
+          callbacks: {
+            label: item => {
+              const s = stats[item.index];
+              return [
+                'median: ' + s.median,
+                'p25-p75: ' + s.q1 + ' - ' + s.q3,
+                'min-max: ' + s.min + ' - ' + s.max,
+                'iterations: ' + s.count,
+              ];
+            },
+          },
+        },
+      },
+    });
+  }
+
+  function renderPercentiles(parent, prefix, labels, results) {
+    const datasets = PERCENTILES.map((percentile, index) => ({
+      label: percentile,
+      data: results.map(result => median(result[prefix + '_' + percentile + '_ms'])),
+      backgroundColor: colors[index] + '90',
+      borderColor: colors[index],
+      borderWidth: 1,
+    })).filter(dataset => dataset.data.some(value => value !== null));
+    addChart(parent, {
+      type: 'bar',
+      data: { labels, datasets },
+      options: {
+        title: { display: true, text: prefix + ' latency percentiles (median of iterations)' },
+        scales: {
+          yAxes: [{ type: 'logarithmic', scaleLabel: { display: true, labelString: 'ms' } }],
+        },
+      },
+    });
+  }
+
+  // Median of the metric of each configuration in every loaded run
+  function renderTrend(parent, configs, params) {
+    const datasets = configs.map((config, index) => ({
+      label: configLabel(config, params),
+      data: state.runs.map(run => {
+        const result = run.results.find(r => params.every(param => String(r[param]) === String(config[param])));
+        return result ? median(result[state.metric]) : null;
+      }),
+      fill: false,
+      spanGaps: true,
+      borderColor: colors[index % colors.length],
+      backgroundColor: colors[index % colors.length],
+    }));
+    addChart(parent, {
+      type: 'line',
+      data: { labels: state.runs.map(run => run.label), datasets },
+      options: {
+        title: { display: true, text: metricLabel(state.metric) + ' over time (median of iterations)' },
+        scales: { yAxes: [{ scaleLabel: { display: true, labelString: metricLabel(state.metric) } }] },
+      },
+    });
+  }
+
+  function render() {
+    for (const chart of state.charts) {
+      chart.destroy();
+    }
+    state.charts = [];
+    document.getElementById('main').textContent = '';
+
+    const run = state.runs[state.runIndex];
+    const results = run.results.filter(matchesFilters);
+    if (results.length === 0) {
+      setStatus('No configuration of ' + run.label + ' matches the filters');
+      return;
+    }
+    setStatus(run.label + (run.commit ? ' (' + run.commit + ')' : '') + ': ' + results.length + ' configurations');
+
+    // Configurations are labelled by the parameters which differ between them, other than the facet
+    const params = parameterNames(results).filter(
+      param => param !== state.facet && distinctValues(results, param).length > 1
+    );
+    const facetValues = state.facet ? distinctValues(results, state.facet) : [null];
+    for (const facetValue of facetValues) {
+      const facetResults = facetValue === null ? results : results.filter(r => String(r[state.facet]) === facetValue);
+      const labels = facetResults.map(result => configLabel(result, params));
+      const graphs = addSection(facetValue === null ? run.label : state.facet + '=' + facetValue);
+      const stats = facetResults.map(result => boxStats(result[state.metric] || []));
+      renderBoxPlot(graphs, metricLabel(state.metric) + ' per configuration', labels, stats, state.metric);
+
+      const prefixes = new Set();
+      for (const metric of metricNames(facetResults)) {
+        const match = PERCENTILE_METRIC.exec(metric);
+        if (match) {
+          prefixes.add(match[1]);
+        }
+      }
+      for (const prefix of prefixes) {
+        renderPercentiles(graphs, prefix, labels, facetResults);
+      }
+    }
+
+    if (state.runs.length > 1) {
+      const trendParams = parameterNames(results).filter(param => distinctValues(results, param).length > 1);
+      renderTrend(addSection('History'), results, trendParams);
+    }
+  }
+
+  function init() {
+    const query = new URLSearchParams(window.location.search);
+    const dataUrl = query.get('data') || DEFAULT_DATA_URL;
+    const maxRuns = Number(query.get('max_runs')) || DEFAULT_MAX_RUNS;
+
+    document.getElementById('file-input').onchange = event => {
+      const file = event.target.files[0];
+      if (!file) {
+        return;
+      }
+      file
+        .text()
+        .then(text => showRuns(normalizeRuns(JSON.parse(text), file.name)))
+        .catch(error => setStatus('Failed to load ' + file.name + ': ' + error.message));
+    };
+
+    setStatus('Loading ' + dataUrl + '...');
+    loadRuns(dataUrl, maxRuns)
+      .then(showRuns)
+      .catch(error => setStatus('Failed to load ' + dataUrl + ': ' + error.message + '. Open a results file instead.'));
+  }
+
+  init();
+})();
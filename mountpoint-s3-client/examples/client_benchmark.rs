@@ -1,7 +1,7 @@
 use std::path::{Path, PathBuf};
 use std::pin::pin;
-use std::sync::Arc;
 use std::sync::atomic::{AtomicU64, Ordering};
+use std::sync::{Arc, Mutex};
 use std::thread;
 use std::time::{Duration, Instant};
 
@@ -53,14 +53,17 @@ fn run_benchmark(
     while iteration < num_iterations && Instant::now() < timeout {
         let iter_start = Instant::now();
         let received_size = Arc::new(AtomicU64::new(0));
+        let first_byte_latencies = Arc::new(Mutex::new(Vec::new()));
 
         thread::scope(|scope| {
             for key in keys {
                 let client = client.clone();
                 let received_size_clone = Arc::clone(&received_size);
+                let first_byte_latencies = Arc::clone(&first_byte_latencies);
                 scope.spawn(move || {
                     futures::executor::block_on(async move {
                         let mut received_obj_len = 0u64;
+                        let request_start = Instant::now();
                         let mut request = client
                             .get_object(bucket, key, &GetObjectParams::new())
                             .await
@@ -76,6 +79,10 @@ fn run_benchmark(
                         while Instant::now() < timeout {
                             match request.next().await {
                                 Some(Ok(part)) => {
+                                    if received_obj_len == 0 {
+                                        let first_byte_latency = request_start.elapsed().as_secs_f64();
+                                        first_byte_latencies.lock().unwrap().push(first_byte_latency);
+                                    }
                                     let part_len = part.data.len();
                                     tracing::info!(
                                         target: "benchmarking_instrumentation",
@@ -121,10 +128,12 @@ fn run_benchmark(
             (received_size as f64) / elapsed.as_secs_f64() / (1000 * 1000 * 1000 / 8) as f64
         );
 
+        let first_byte_latencies = first_byte_latencies.lock().unwrap().clone();
         iter_results.push(json!({
             "iteration": iteration,
             "bytes": received_size,
             "elapsed_seconds": elapsed.as_secs_f64(),
+            "first_byte_seconds": first_byte_latencies,
         }));
 
         iteration += 1;
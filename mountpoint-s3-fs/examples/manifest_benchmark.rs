@@ -0,0 +1,186 @@
+//! Benchmark of ingesting CSV manifests into the metadata store.
+//!
+//! Generates a synthetic manifest for each channel, with objects spread over a tree of directories
+//! `fanout` wide and `depth` deep, ingests them with [ingest_manifest], and reports the rows ingested per second and
+//! the size of the metadata store. Then looks up a sample of the objects through [Manifest], checking they are found.
+
+use std::fs::File;
+use std::io::BufWriter;
+use std::path::{Path, PathBuf};
+use std::sync::Arc;
+use std::time::Instant;
+
+use anyhow::{Context, Result, anyhow};
+use clap::Parser;
+use csv::WriterBuilder;
+use mountpoint_s3_client::checksums::crc32c::{Crc32c, Hasher};
+use mountpoint_s3_fs::checksums::{Crc32cBase64, combine_checksums};
+use mountpoint_s3_fs::manifest::{ChannelConfig, CsvEntry, Manifest, ingest_manifest};
+use mountpoint_s3_fs::metablock::ROOT_INODE_NO;
+use mountpoint_s3_fs::s3::S3Path;
+use serde_json::{json, to_writer};
+use time::OffsetDateTime;
+
+const ETAG: &str = "3bebe4037c8f040e0e573e191d34b2c6-1";
+const OBJECT_SIZE: u64 = 1024 * 1024;
+
+#[derive(Parser, Debug)]
+struct ManifestBenchmarkArgs {
+    #[clap(
+        long,
+        help = "Number of objects in the manifest of each channel",
+        default_value = "1000000"
+    )]
+    pub objects: u64,
+
+    #[clap(long, help = "Number of directory levels above the objects", default_value = "3")]
+    pub depth: u32,
+
+    #[clap(long, help = "Number of subdirectories of each directory", default_value = "10")]
+    pub fanout: u64,
+
+    #[clap(long, help = "Number of channels, each with its own manifest", default_value = "1")]
+    pub channels: usize,
+
+    #[clap(long, help = "Number of objects looked up after ingesting", default_value = "10000")]
+    pub lookups: u64,
+
+    #[clap(long, help = "Directory to write the manifests and the metadata store to")]
+    pub work_dir: PathBuf,
+
+    #[clap(long, help = "Output file to write the results to", value_name = "OUTPUT_FILE")]
+    pub output_file: Option<PathBuf>,
+}
+
+/// Partial key of the `index`th object of a manifest, in the order of a listing.
+fn object_key(args: &ManifestBenchmarkArgs, index: u64) -> String {
+    let leaf_count = args.fanout.pow(args.depth);
+    // objects are spread evenly over the leaf directories, in contiguous runs
+    let mut leaf = index * leaf_count / args.objects;
+    let mut components = Vec::with_capacity(args.depth as usize + 1);
+    for _ in 0..args.depth {
+        components.push(format!("d{:04}", leaf % args.fanout));
+        leaf /= args.fanout;
+    }
+    components.reverse();
+    components.push(format!("f{index:010}.bin"));
+    components.join("/")
+}
+
+/// Writes the manifest of a channel, returning its checksum.
+fn write_manifest(args: &ManifestBenchmarkArgs, path: &Path) -> Result<Crc32c> {
+    let file = File::create(path).with_context(|| format!("Failed to create {path:?}"))?;
+    let mut writer = WriterBuilder::new()
+        .has_headers(false)
+        .from_writer(BufWriter::new(file));
+    let mut running_checksum = Crc32c::new(0);
+    for index in 0..args.objects {
+        let partial_key = object_key(args, index);
+        let mut hasher = Hasher::new();
+        hasher.update(partial_key.as_bytes());
+        hasher.update(ETAG.as_bytes());
+        hasher.update(OBJECT_SIZE.to_be_bytes().as_ref());
+        let entry = CsvEntry {
+            partial_key,
+            etag: ETAG.to_string(),
+            size: OBJECT_SIZE,
+            checksum: Crc32cBase64::new(hasher.finalize().value()),
+        };
+        running_checksum = combine_checksums(running_checksum, entry.checksum.value(), entry.total_size());
+        writer.serialize(entry)?;
+    }
+    writer.flush()?;
+    Ok(running_checksum)
+}
+
+/// Looks up an object component by component from the root, as the file system does, returning its inode number.
+fn lookup(manifest: &Manifest, channels: &[Arc<S3Path>], channel_dir: &str, partial_key: &str) -> Result<u64> {
+    let mut ino = ROOT_INODE_NO;
+    for name in std::iter::once(channel_dir).chain(partial_key.split('/')) {
+        let entry = manifest
+            .manifest_lookup(ino, name)?
+            .ok_or_else(|| anyhow!("{partial_key} not found in {channel_dir}"))?;
+        ino = entry.into_lookup(channels, OffsetDateTime::now_utc())?.ino();
+    }
+    Ok(ino)
+}
+
+fn main() -> Result<()> {
+    tracing_subscriber::fmt::init();
+    let args = ManifestBenchmarkArgs::parse();
+    if args.objects == 0 || args.fanout == 0 || args.channels == 0 {
+        return Err(anyhow!("objects, fanout and channels must be positive"));
+    }
+
+    let start = Instant::now();
+    let mut channel_configs = Vec::with_capacity(args.channels);
+    let mut manifest_bytes = 0;
+    for channel in 0..args.channels {
+        let manifest_path = args.work_dir.join(format!("manifest_{channel}.csv"));
+        let checksum = write_manifest(&args, &manifest_path)?;
+        manifest_bytes += std::fs::metadata(&manifest_path)?.len();
+        channel_configs.push(ChannelConfig {
+            directory_name: format!("channel_{channel}"),
+            bucket_name: "amzn-s3-demo-bucket".to_string(),
+            prefix: format!("channel_{channel}/"),
+            manifest_path,
+            manifest_checksum: Crc32cBase64::new(checksum.value()),
+        });
+    }
+    let generate_elapsed = start.elapsed();
+    println!(
+        "generated {} manifests of {} objects ({manifest_bytes} bytes) in {:.2}s",
+        args.channels,
+        args.objects,
+        generate_elapsed.as_secs_f64()
+    );
+
+    let db_path = args.work_dir.join("metadata.db");
+    let start = Instant::now();
+    ingest_manifest(&channel_configs, &db_path)?;
+    let ingest_elapsed = start.elapsed();
+    let rows = args.objects * args.channels as u64;
+    let rows_per_second = rows as f64 / ingest_elapsed.as_secs_f64();
+    let db_size_bytes = std::fs::metadata(&db_path)?.len();
+    println!(
+        "ingested {rows} rows in {:.2}s: {rows_per_second:.0} rows/s, metadata store of {db_size_bytes} bytes",
+        ingest_elapsed.as_secs_f64()
+    );
+
+    let manifest = Manifest::new(&db_path)?;
+    let channels: Vec<_> = manifest.load_channels()?.into_iter().map(Arc::new).collect();
+    let lookups = args.lookups.min(rows);
+    let start = Instant::now();
+    for lookup_index in 0..lookups {
+        // spread the lookups over all channels and objects
+        let row = lookup_index * rows / lookups.max(1);
+        let channel = (row / args.objects) as usize;
+        let channel_dir = &channel_configs[channel].directory_name;
+        lookup(
+            &manifest,
+            &channels,
+            channel_dir,
+            &object_key(&args, row % args.objects),
+        )?;
+    }
+    let lookup_elapsed = start.elapsed();
+    println!("looked up {lookups} objects in {:.2}s", lookup_elapsed.as_secs_f64());
+
+    if let Some(output_path) = &args.output_file {
+        let output_file = File::create(output_path).context("Failed to create output file")?;
+        let results = json!({
+            "summary": {
+                "total_bytes": manifest_bytes,
+                "total_elapsed_seconds": ingest_elapsed.as_secs_f64(),
+                "rows": rows,
+                "rows_per_second": rows_per_second,
+                "db_size_bytes": db_size_bytes,
+                "generate_seconds": generate_elapsed.as_secs_f64(),
+                "lookups": lookups,
+                "lookup_seconds": lookup_elapsed.as_secs_f64(),
+            },
+        });
+        to_writer(output_file, &results).context("Failed to write to output file")?;
+    }
+    Ok(())
+}
@@ -1,7 +1,7 @@
 use std::error::Error;
 use std::path::PathBuf;
-use std::sync::Arc;
 use std::sync::atomic::{AtomicU64, Ordering};
+use std::sync::{Arc, Mutex};
 use std::thread;
 use std::time::{Duration, Instant};
 
@@ -192,6 +192,7 @@ fn main() -> anyhow::Result<()> {
     let timeout: Instant = total_start.checked_add(max_duration).expect("Duration overflow error");
     while iteration < args.iterations && Instant::now() < timeout {
         let received_bytes = Arc::new(AtomicU64::new(0));
+        let first_byte_latencies = Arc::new(Mutex::new(Vec::new()));
         let start = Instant::now();
         let manager = Prefetcher::default_builder(client.clone()).build(
             runtime.clone(),
@@ -204,6 +205,7 @@ fn main() -> anyhow::Result<()> {
 
             for (idx, (object_id, size)) in object_metadata.iter().enumerate() {
                 let received_bytes = received_bytes.clone();
+                let first_byte_latencies = first_byte_latencies.clone();
                 let object_id = object_id.clone();
                 let handle_id = HandleId::new(idx as u64);
                 let request = manager.prefetch(bucket.to_string(), object_id.clone(), handle_id, *size);
@@ -211,8 +213,14 @@ fn main() -> anyhow::Result<()> {
 
                 let task = scope.spawn(move || {
                     let result = block_on(wait_for_download(request, *size, read_size as u64, timeout));
-                    if let Ok(bytes_read) = result {
+                    if let Ok((bytes_read, first_byte_latency)) = result {
                         received_bytes.fetch_add(bytes_read, Ordering::SeqCst);
+                        if let Some(first_byte_latency) = first_byte_latency {
+                            first_byte_latencies
+                                .lock()
+                                .unwrap()
+                                .push(first_byte_latency.as_secs_f64());
+                        }
                     } else {
                         // As object download failures can produce
                         // misleading results, exit the benchmarks
@@ -239,10 +247,12 @@ fn main() -> anyhow::Result<()> {
             elapsed.as_secs_f64(),
             (received_size as f64) / elapsed.as_secs_f64() / (1024 * 1024 * 1024 / 8) as f64
         );
+        let first_byte_latencies = first_byte_latencies.lock().unwrap().clone();
         iter_results.push(json!({
             "iteration": iteration,
             "bytes": received_size,
             "elapsed_seconds": elapsed.as_secs_f64(),
+            "first_byte_seconds": first_byte_latencies,
         }));
         iteration += 1;
     }
@@ -270,19 +280,23 @@ fn main() -> anyhow::Result<()> {
     Ok(())
 }
 
+/// Read the object until its end or the timeout, and return the bytes read and the latency of the first read.
 async fn wait_for_download(
     mut request: PrefetchGetObject<S3CrtClient>,
     size: u64,
     read_size: u64,
     timeout: Instant,
-) -> Result<u64, Box<dyn Error>> {
+) -> Result<(u64, Option<Duration>), Box<dyn Error>> {
+    let start = Instant::now();
+    let mut first_byte_latency = None;
     let mut offset = 0;
     let mut total_bytes_read = 0;
     while offset < size && Instant::now() < timeout {
         let bytes = request.read(offset, read_size as usize).await?;
+        first_byte_latency.get_or_insert_with(|| start.elapsed());
         let bytes_read = bytes.len() as u64;
         offset += bytes_read;
         total_bytes_read += bytes_read;
     }
-    Ok(total_bytes_read)
+    Ok((total_bytes_read, first_byte_latency))
 }
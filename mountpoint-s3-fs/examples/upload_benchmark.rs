@@ -1,5 +1,7 @@
+use std::path::PathBuf;
 use std::sync::Arc;
-use std::time::Instant;
+use std::thread;
+use std::time::{Duration, Instant};
 
 use clap::Parser;
 use mountpoint_s3_client::config::{Allocator, EndpointConfig, RustLogAdapter, S3ClientConfig, Uri};
@@ -9,6 +11,7 @@ use mountpoint_s3_fs::mem_limiter::{MemoryLimiter, effective_total_memory};
 use mountpoint_s3_fs::memory::PagedPool;
 use mountpoint_s3_fs::upload::{Uploader, UploaderConfig};
 use mountpoint_s3_fs::{Runtime, ServerSideEncryption};
+use serde_json::{json, to_writer};
 use tracing_subscriber::EnvFilter;
 use tracing_subscriber::fmt::Subscriber;
 use tracing_subscriber::util::SubscriberInitExt;
@@ -83,6 +86,36 @@ struct UploadBenchmarkArgs {
         default_value = "crc32c"
     )]
     pub checksum_algorithm: String,
+
+    #[clap(
+        long,
+        help = "Number of objects uploaded concurrently, each to its own key `<key>_<index>` when more than one",
+        default_value = "1"
+    )]
+    pub concurrency: usize,
+
+    #[clap(long, help = "Output file to write the results to", value_name = "OUTPUT_FILE")]
+    pub output_file: Option<PathBuf>,
+}
+
+/// Timings of the upload of one object
+struct UploadTimings {
+    bytes: usize,
+    /// Time to write the object, before completing the upload
+    write_elapsed: Duration,
+    /// Time from completing the upload, as on `close()` or `fsync()`, until the object is durable in S3,
+    /// that is until `CompleteMultipartUpload` (or the last `PutObject` of incremental uploads) returns
+    durable_elapsed: Duration,
+}
+
+impl UploadBenchmarkArgs {
+    fn object_key(&self, writer: usize) -> String {
+        if self.concurrency > 1 {
+            format!("{}_{}", self.key, writer)
+        } else {
+            self.key.clone()
+        }
+    }
 }
 
 fn main() {
@@ -106,6 +139,9 @@ fn main() {
     let client = Arc::new(S3CrtClient::new(config).expect("couldn't create client"));
     let runtime = Runtime::new(client.event_loop_group());
 
+    let total_start = Instant::now();
+    let mut total_bytes = 0;
+    let mut iter_results = Vec::new();
     for i in 0..args.iterations {
         let max_memory_target = if let Some(target) = args.max_memory_target {
             target * 1024 * 1024
@@ -137,34 +173,73 @@ fn main() {
         );
 
         let start = Instant::now();
-        if args.incremental_upload {
-            futures::executor::block_on(run_append_uploader(&uploader, &args, i));
-        } else {
-            futures::executor::block_on(run_mpu_uploader(&uploader, &args, i));
-        }
+        let timings: Vec<UploadTimings> = thread::scope(|scope| {
+            let writers: Vec<_> = (0..args.concurrency)
+                .map(|writer| {
+                    let uploader = &uploader;
+                    let args = &args;
+                    scope.spawn(move || {
+                        let key = args.object_key(writer);
+                        if args.incremental_upload {
+                            futures::executor::block_on(run_append_uploader(uploader, args, key, i))
+                        } else {
+                            futures::executor::block_on(run_mpu_uploader(uploader, args, key, i))
+                        }
+                    })
+                })
+                .collect();
+            writers.into_iter().map(|writer| writer.join().unwrap()).collect()
+        });
         let elapsed = start.elapsed();
-        let uploaded_size_mib = (args.object_size as f64) / (1024 * 1024) as f64;
+        let uploaded_bytes: usize = timings.iter().map(|timing| timing.bytes).sum();
+        total_bytes += uploaded_bytes;
         println!(
-            "iteration {}: uploaded {:.2} MiB in {:.2}s: {:.2}MiB/s",
-            i,
-            uploaded_size_mib,
+            "{i}: uploaded {uploaded_bytes} bytes in {:.2}s: {:.2} Gib/s",
             elapsed.as_secs_f64(),
-            uploaded_size_mib / elapsed.as_secs_f64(),
+            (uploaded_bytes as f64) / elapsed.as_secs_f64() / (1024 * 1024 * 1024 / 8) as f64
         );
+        iter_results.push(json!({
+            "iteration": i,
+            "bytes": uploaded_bytes,
+            "elapsed_seconds": elapsed.as_secs_f64(),
+            "write_seconds": timings.iter().map(|timing| timing.write_elapsed.as_secs_f64()).collect::<Vec<_>>(),
+            "durable_seconds": timings.iter().map(|timing| timing.durable_elapsed.as_secs_f64()).collect::<Vec<_>>(),
+        }));
 
         // clean up
-        futures::executor::block_on(client.delete_object(&args.bucket, &args.key)).unwrap();
+        for writer in 0..args.concurrency {
+            futures::executor::block_on(client.delete_object(&args.bucket, &args.object_key(writer))).unwrap();
+        }
+    }
+    let total_elapsed = total_start.elapsed();
+
+    if let Some(output_path) = &args.output_file {
+        let output_file = std::fs::File::create(output_path).expect("Failed to create output file");
+        let results = json!({
+            "summary": {
+                "total_bytes": total_bytes,
+                "total_elapsed_seconds": total_elapsed.as_secs_f64(),
+                "iterations": args.iterations,
+                "concurrency": args.concurrency,
+            },
+            "iterations": iter_results
+        });
+        to_writer(output_file, &results).expect("Failed to write to output file");
     }
 }
 
-async fn run_mpu_uploader<Client>(uploader: &Uploader<Client>, args: &UploadBenchmarkArgs, iteration: usize)
+async fn run_mpu_uploader<Client>(
+    uploader: &Uploader<Client>,
+    args: &UploadBenchmarkArgs,
+    key: String,
+    iteration: usize,
+) -> UploadTimings
 where
     Client: ObjectClient + Clone + Send + Sync + 'static,
 {
     let start = Instant::now();
 
     let bucket = args.bucket.clone();
-    let key = args.key.clone();
     let mut upload_request = uploader.start_atomic_upload(bucket, key).unwrap();
 
     let mut total_bytes_written = 0;
@@ -187,17 +262,27 @@ where
         elapsed.as_secs_f64(),
         total_mib_written / elapsed.as_secs_f64(),
     );
+    let complete_start = Instant::now();
     upload_request.complete().await.unwrap();
+    UploadTimings {
+        bytes: total_bytes_written,
+        write_elapsed: elapsed,
+        durable_elapsed: complete_start.elapsed(),
+    }
 }
 
-async fn run_append_uploader<Client>(uploader: &Uploader<Client>, args: &UploadBenchmarkArgs, iteration: usize)
+async fn run_append_uploader<Client>(
+    uploader: &Uploader<Client>,
+    args: &UploadBenchmarkArgs,
+    key: String,
+    iteration: usize,
+) -> UploadTimings
 where
     Client: ObjectClient + Clone + Send + Sync + 'static,
 {
     let start = Instant::now();
 
     let bucket = args.bucket.clone();
-    let key = args.key.clone();
     let mut upload_request = uploader.start_incremental_upload(bucket.clone(), key.clone(), 0, None);
 
     let mut total_bytes_written = 0;
@@ -220,5 +305,11 @@ where
         elapsed.as_secs_f64(),
         total_mib_written / elapsed.as_secs_f64(),
     );
+    let complete_start = Instant::now();
     upload_request.complete().await.unwrap();
+    UploadTimings {
+        bytes: total_bytes_written,
+        write_elapsed: elapsed,
+        durable_elapsed: complete_start.elapsed(),
+    }
 }
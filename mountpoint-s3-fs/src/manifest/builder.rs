@@ -1,6 +1,8 @@
 use std::collections::HashSet;
 use std::io::{self, BufReader};
 use std::path::{Path, PathBuf};
+use std::sync::mpsc::{Receiver, SyncSender, sync_channel};
+use std::thread;
 use std::{collections::HashMap, fs::File};
 
 use mountpoint_s3_client::checksums::Crc32c;
@@ -163,6 +165,15 @@ impl InputManifestEntry {
     }
 }
 
+/// Number of parsed entries each channel's parsing thread sends to the builder at once.
+const PARSED_CHUNK_SIZE: usize = 4096;
+
+/// Number of parsed chunks each channel's parsing thread may get ahead of the builder by.
+const PARSED_CHUNKS_QUEUED: usize = 16;
+
+/// A chunk of entries parsed from a channel's manifest.
+type ParsedChunk = Vec<Result<InputManifestEntry, InputManifestError>>;
+
 /// Ingests CSV manifests into the the metadata store.
 ///
 /// Accepts a slice of [ChannelConfig], with each channel having a dedicated CSV manifest.
@@ -208,7 +219,38 @@ pub fn ingest_manifest(channel_configs: &[ChannelConfig], db_path: &Path) -> Res
 ///
 /// Compared to [ingest_manifest] this method accepts an iterator of parsed [InputManifestEntry].
 /// Method [ingest_manifest] actually delegates db creation to this method, but this one is also used in tests.
-pub fn create_db<EntriesIterator: Iterator<Item = Result<InputManifestEntry, InputManifestError>>>(
+///
+/// Each channel's entries are parsed on a thread of their own, and batches are written to the metadata store on another
+/// thread, while entries are assigned their IDs in order. So IDs do not depend on the number of channels or the batch
+/// size: entries are numbered in the order of the channels, then of their manifests, as when ingested sequentially.
+///
+/// The database is not synced to disk while it is written, so it is removed if its creation fails.
+pub fn create_db<EntriesIterator: Iterator<Item = Result<InputManifestEntry, InputManifestError>> + Send>(
+    db_path: &Path,
+    channel_manifests: Vec<ChannelManifest<EntriesIterator>>,
+    batch_size: usize,
+) -> Result<(), InputManifestError> {
+    if db_path.exists() {
+        return Err(InputManifestError::DbExists);
+    }
+    let result = build_db(db_path, channel_manifests, batch_size);
+    if result.is_err() {
+        match std::fs::remove_file(db_path) {
+            Err(err) if err.kind() != io::ErrorKind::NotFound => {
+                tracing::warn!(
+                    ?err,
+                    "failed to remove the partial metadata store at {}",
+                    db_path.display()
+                );
+            }
+            _ => {}
+        }
+    }
+    result
+}
+
+/// Writes the metadata store, closing it before returning.
+fn build_db<EntriesIterator: Iterator<Item = Result<InputManifestEntry, InputManifestError>> + Send>(
     db_path: &Path,
     channel_manifests: Vec<ChannelManifest<EntriesIterator>>,
     batch_size: usize,
@@ -231,6 +273,7 @@ struct ManifestBuilder {
 impl ManifestBuilder {
     fn new(db_path: &Path, batch_size: usize) -> Result<Self, InputManifestError> {
         let db = Db::new(db_path)?;
+        db.configure_for_bulk_load()?;
         db.create_table()?;
 
         Ok(Self {
@@ -268,15 +311,43 @@ impl ManifestBuilder {
         }
     }
 
-    fn insert_entries<EntriesIterator: Iterator<Item = Result<InputManifestEntry, InputManifestError>>>(
+    fn insert_entries<EntriesIterator: Iterator<Item = Result<InputManifestEntry, InputManifestError>> + Send>(
         &mut self,
         channel_manifests: Vec<ChannelManifest<EntriesIterator>>,
     ) -> Result<(), InputManifestError> {
-        for (channel_id, channel_manifest) in channel_manifests.into_iter().enumerate() {
+        thread::scope(|scope| {
+            // parse the manifests of all channels concurrently, each one ahead of the builder by a few chunks
+            let mut parsed_channels = Vec::with_capacity(channel_manifests.len());
+            for ChannelManifest {
+                directory_name,
+                s3_path,
+                entries,
+            } in channel_manifests
+            {
+                let (sender, receiver) = sync_channel(PARSED_CHUNKS_QUEUED);
+                scope.spawn(move || parse_entries(entries, sender));
+                parsed_channels.push((directory_name, s3_path, receiver));
+            }
+
+            let writer = BatchWriter::spawn(scope, self.db.clone());
+            let result = self.assign_ids(parsed_channels, &writer);
+            // a failed write stops the writer, and with it the builder: report the write error rather than its effect
+            writer.finish().and(result)
+        })
+    }
+
+    /// Assigns IDs to the entries of each channel in turn and creates their parent directories, sending full batches
+    /// to the writer.
+    fn assign_ids(
+        &mut self,
+        parsed_channels: Vec<(String, S3Path, Receiver<ParsedChunk>)>,
+        writer: &BatchWriter,
+    ) -> Result<(), InputManifestError> {
+        for (channel_id, (directory_name, s3_path, parsed_entries)) in parsed_channels.into_iter().enumerate() {
             // insert synthetic channel dir
             let channel_root_id = self.next_id;
-            let channel_directory_name = ValidName::try_from(channel_manifest.directory_name.as_str())
-                .map_err(|_| InputManifestError::InvalidChannel(channel_manifest.directory_name.clone()))?;
+            let channel_directory_name = ValidName::try_from(directory_name.as_str())
+                .map_err(|_| InputManifestError::InvalidChannel(directory_name.clone()))?;
             self.insert_buffer.push(DbEntry::new(
                 channel_root_id,
                 ROOT_INODE_NO,
@@ -285,51 +356,42 @@ impl ManifestBuilder {
                 channel_directory_name,
                 None,
                 None,
-                &channel_manifest.s3_path,
+                &s3_path,
             )?);
             self.next_id += 1;
 
             // insert keys from the manifest (and corresponding dirs)
-            for entry in channel_manifest.entries {
+            for entry in parsed_entries.into_iter().flatten() {
                 if let Err(InputManifestError::DirectoryMarker(key)) = entry {
                     tracing::warn!(
                         "directory marker will be ignored: {}, channel directory may be empty: {}",
                         key,
-                        channel_manifest.directory_name
+                        directory_name
                     );
                     continue;
                 }
                 let entry = entry?;
 
                 // insert the parent directories
-                let (parent_id, parent_partial_key) = self.ensure_dirs_inserted(
-                    &entry.partial_key,
-                    channel_id,
-                    channel_root_id,
-                    &channel_manifest.s3_path,
-                )?;
+                let (parent_id, parent_partial_key) =
+                    self.ensure_dirs_inserted(&entry.partial_key, channel_id, channel_root_id, &s3_path)?;
 
                 // push new file entry to the insert_buffer
-                let db_entry = entry.into_db_entry(
-                    self.next_id,
-                    parent_id,
-                    channel_id,
-                    parent_partial_key,
-                    &channel_manifest.s3_path,
-                )?;
+                let db_entry =
+                    entry.into_db_entry(self.next_id, parent_id, channel_id, parent_partial_key, &s3_path)?;
                 self.insert_buffer.push(db_entry);
                 self.next_id += 1;
 
                 // if insert_buffer is full, write to db
-                if self.insert_buffer.len() >= self.batch_size {
-                    self.flush_insert_buffer()?;
+                if self.insert_buffer.len() >= self.batch_size && !self.flush_insert_buffer(writer) {
+                    return Ok(()); // the writer failed, its error is reported instead
                 }
             }
 
             self.dir_ids.clear(); // dirs across channels do not overlap, forget them
         }
 
-        self.flush_insert_buffer()?; // flush remaining entries to db
+        self.flush_insert_buffer(writer); // flush remaining entries to db
 
         Ok(())
     }
@@ -376,12 +438,65 @@ impl ManifestBuilder {
         Ok((parent_id, parent_partial_key))
     }
 
-    fn flush_insert_buffer(&mut self) -> Result<(), InputManifestError> {
-        if !self.insert_buffer.is_empty() {
-            self.db.insert_batch(&self.insert_buffer)?;
-            self.insert_buffer.clear();
+    /// Sends the buffered entries to the writer, returns false if the writer stopped on an error.
+    fn flush_insert_buffer(&mut self, writer: &BatchWriter) -> bool {
+        if self.insert_buffer.is_empty() {
+            return true;
+        }
+        let batch = std::mem::replace(&mut self.insert_buffer, Vec::with_capacity(self.batch_size));
+        writer.write(batch)
+    }
+}
+
+/// Parses entries on the thread of a channel, sending them to the builder in chunks until they are exhausted,
+/// or the builder stopped on an error.
+fn parse_entries<EntriesIterator: Iterator<Item = Result<InputManifestEntry, InputManifestError>>>(
+    entries: EntriesIterator,
+    sender: SyncSender<ParsedChunk>,
+) {
+    let mut chunk = Vec::with_capacity(PARSED_CHUNK_SIZE);
+    for entry in entries {
+        chunk.push(entry);
+        if chunk.len() >= PARSED_CHUNK_SIZE {
+            let full_chunk = std::mem::replace(&mut chunk, Vec::with_capacity(PARSED_CHUNK_SIZE));
+            if sender.send(full_chunk).is_err() {
+                return;
+            }
         }
-        Ok(())
+    }
+    if !chunk.is_empty() {
+        let _ = sender.send(chunk);
+    }
+}
+
+/// Writes batches of entries to the metadata store on a thread of its own, while the builder prepares the next ones.
+struct BatchWriter<'scope> {
+    sender: SyncSender<Vec<DbEntry>>,
+    thread: thread::ScopedJoinHandle<'scope, Result<(), InputManifestError>>,
+}
+
+impl<'scope> BatchWriter<'scope> {
+    fn spawn<'env>(scope: &'scope thread::Scope<'scope, 'env>, db: Db) -> Self {
+        // queue a single batch, so that at most one is waiting while another one is written
+        let (sender, receiver) = sync_channel::<Vec<DbEntry>>(1);
+        let thread = scope.spawn(move || {
+            for batch in receiver {
+                db.insert_batch(&batch)?;
+            }
+            Ok(())
+        });
+        Self { sender, thread }
+    }
+
+    /// Queues a batch to be written, returns false if the writer stopped on an error.
+    fn write(&self, batch: Vec<DbEntry>) -> bool {
+        self.sender.send(batch).is_ok()
+    }
+
+    /// Waits for the queued batches to be written, and returns the first error.
+    fn finish(self) -> Result<(), InputManifestError> {
+        drop(self.sender);
+        self.thread.join().expect("manifest writer thread must not panic")
     }
 }
 #[cfg(test)]
@@ -425,6 +540,7 @@ mod tests {
         )
         .expect_err("must be an error");
         assert!(matches!(err, InputManifestError::ConstraintViolation(_)));
+        assert!(!db_path.exists(), "partial metadata store must be removed");
     }
 
     #[test_case(&[
@@ -458,6 +574,48 @@ mod tests {
         }
     }
 
+    #[test_case(1; "batch of 1")]
+    #[test_case(4; "batch of 4")]
+    #[test_case(100000; "single batch")]
+    fn test_ids_assigned_in_manifest_order(batch_size: usize) {
+        let db_dir = tempfile::tempdir().unwrap();
+        let db_path = db_dir.path().join("s3_keys.db3");
+        let channel_keys: [(&str, &[&str]); 2] = [
+            ("channel_0", &["dir1/a.txt", "dir1/dir2/b.txt", "c.txt"]),
+            ("channel_1", &["dir1/d.txt"]),
+        ];
+        let channel_manifests = channel_keys
+            .into_iter()
+            .map(|(directory_name, keys)| ChannelManifest {
+                directory_name: directory_name.to_string(),
+                s3_path: S3Path::new(Bucket::new("bucket").unwrap(), Default::default()),
+                entries: keys
+                    .iter()
+                    .map(|key| InputManifestEntry::new_without_checksum(*key, DUMMY_ETAG, DUMMY_SIZE)),
+            })
+            .collect();
+        create_db(&db_path, channel_manifests, batch_size).expect("db creation must succeed");
+
+        // IDs are assigned in the order of the channels, then of their manifests, whatever the batch size
+        let db = Db::new(&db_path).unwrap();
+        let expected = [
+            (2, ROOT_INODE_NO, "channel_0"),
+            (3, 2, "dir1"),
+            (4, 3, "a.txt"),
+            (5, 3, "dir2"),
+            (6, 5, "b.txt"),
+            (7, 2, "c.txt"),
+            (8, ROOT_INODE_NO, "channel_1"),
+            (9, 8, "dir1"),
+            (10, 9, "d.txt"),
+        ];
+        for (id, parent_id, name) in expected {
+            let entry = db.select_entry(parent_id, name).unwrap().expect("entry must exist");
+            assert_eq!(entry.id, id, "id of {name}");
+        }
+        assert_eq!(db.select_entry_by_id(11).unwrap(), None);
+    }
+
     #[test]
     fn test_directory_marker_ignored() {
         let db_dir = tempfile::tempdir().unwrap();
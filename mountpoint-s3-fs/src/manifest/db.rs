@@ -163,6 +163,21 @@ impl Db {
         })
     }
 
+    /// Tunes the connection for building the database in bulk.
+    ///
+    /// The database is written once, and removed by [super::create_db] if that fails, so it is not synced to disk while
+    /// it is written, and the connection holds the exclusive lock throughout. The page cache is enlarged for sorting
+    /// when indexing.
+    pub fn configure_for_bulk_load(&self) -> Result<()> {
+        let conn = self.conn.lock().expect("lock must succeed");
+        conn.execute_batch(
+            "PRAGMA synchronous=OFF;
+             PRAGMA locking_mode=EXCLUSIVE;
+             PRAGMA temp_store=MEMORY;
+             PRAGMA cache_size=-262144;",
+        )
+    }
+
     /// Retrieves a database entry by its unique ID.
     pub fn select_entry_by_id(&self, id: u64) -> Result<Option<DbEntry>> {
         let start = Instant::now();
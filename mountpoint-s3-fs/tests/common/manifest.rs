@@ -4,7 +4,7 @@ use rusqlite::Connection;
 use std::path::{Path, PathBuf};
 use tempfile::TempDir;
 
-pub fn create_manifest<I: Iterator<Item = Result<InputManifestEntry, InputManifestError>>>(
+pub fn create_manifest<I: Iterator<Item = Result<InputManifestEntry, InputManifestError>> + Send>(
     channel_manifests: Vec<ChannelManifest<I>>,
     batch_size: usize,
 ) -> Result<(TempDir, PathBuf), InputManifestError> {